@@ -1,12 +1,15 @@
 # app_v4.py - Streamlit Dashboard with Recording Control
 import streamlit as st
-import subprocess
 import json
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import time
 import os
+from recorder_process import RecorderProcess
+from session_store import SessionStore, DEFAULT_DB, data_version
+from search_index import SearchIndex
+from live_journal import archive_journal
 
 st.set_page_config(page_title="XPath Analytics Recorder", page_icon="🎯", layout="wide")
 
@@ -50,7 +53,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 STATE_FILE = Path(__file__).parent / ".recording_state.json"
-LIVE_CAPTURE_FILE = Path(__file__).parent / ".live_capture.jsonl"
+LIVE_JOURNAL = Path(__file__).parent / ".live_capture"
+LEGACY_CAPTURE_FILE = Path(__file__).parent / ".live_capture.jsonl"
 
 # Initialize session state
 if 'recording' not in st.session_state:
@@ -96,6 +100,9 @@ if format_csv:
 if format_py:
     formats.append('py')
 
+capture_snapshots = st.checkbox("Capture DOM snapshot per step (for offline reprocessing)", value=False)
+lean_mode = st.checkbox("Lean mode (block images, fonts, analytics and chat widgets)", value=False)
+
 # Start/Stop buttons
 if not st.session_state.recording:
     if st.button("🚀 Start Recording", type="primary", use_container_width=True):
@@ -120,17 +127,17 @@ if not st.session_state.recording:
             with open(STATE_FILE, 'w') as f:
                 json.dump(state, f)
             
-            # Clear previous live capture file
-            if LIVE_CAPTURE_FILE.exists():
-                LIVE_CAPTURE_FILE.unlink()
+            # Archive the previous live journal (compressed) instead of deleting it
+            for previous in (LIVE_JOURNAL, LEGACY_CAPTURE_FILE):
+                archive_journal(previous)
             
-            st.session_state.process = subprocess.Popen(
-                ['python', 'recorder.py', url_input, format_str, output_dir, str(LIVE_CAPTURE_FILE)],
-                cwd=output_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # Output is drained on background threads so the recorder never blocks on a full pipe
+            cmd = ['python', 'recorder.py', url_input, format_str, output_dir, str(LIVE_JOURNAL)]
+            if capture_snapshots:
+                cmd.append('--snapshots')
+            if lean_mode:
+                cmd.append('--lean')
+            st.session_state.process = RecorderProcess(cmd, cwd=output_dir).start()
             st.session_state.recording = True
             st.rerun()
 
@@ -138,11 +145,24 @@ else:
     # Show recording status
     st.warning("🔴 **Recording in progress...** Click elements in the browser window.")
     st.info(f"📍 URL: {url_input}")
+
+    if st.session_state.process:
+        status = st.session_state.process.snapshot()
+        s_col1, s_col2, s_col3 = st.columns(3)
+        s_col1.metric("Recorder", status["state"] if status["running"] else "EXITED")
+        s_col2.metric("Captured", status["captured"])
+        s_col3.metric("Updates", status["updates"])
+        if status["error"]:
+            st.error(f"❌ Recorder error: {status['error']}")
+        with st.expander("Recorder output"):
+            st.code("\n".join(line for _, _, line in st.session_state.process.lines(50)) or "(no output yet)")
     
     if st.button("Stop Recording", type="secondary", use_container_width=True):
+        saved_files = []
         if st.session_state.process:
-            st.session_state.process.terminate()
-            time.sleep(1)  # Wait for files to be saved
+            # Waits for the recorder's DONE line, so files are saved when this returns
+            status = st.session_state.process.stop()
+            saved_files = status["saved_files"]
             st.session_state.process = None
         st.session_state.recording = False
         
@@ -150,7 +170,7 @@ else:
         if STATE_FILE.exists():
             STATE_FILE.unlink()
         
-        st.success("Recording stopped. Processing data...")
+        st.success(f"Recording stopped. Saved {len(saved_files)} file(s).")
         time.sleep(1)
         st.rerun()
 
@@ -160,37 +180,120 @@ st.divider()
 # ============ RESULTS SECTION ============
 st.subheader("📊 View Results")
 
-# Find all JSON files
-json_files = sorted(Path(__file__).parent.glob("xpaths_*.json"), reverse=True)
-
-if not json_files:
+# Everything below is cached on the store's data version (db + WAL mtimes), so
+# reruns from widget changes reuse it and a newly saved session invalidates it.
+VIEW_COLUMNS = {
+    "Simple View (no XPath)": (["label", "action", "strategy", "values"],
+                               ["Element Name", "Action", "Strategy Used", "Value Entered"]),
+    "Developer View (XPath Only)": (["label", "xpath", "action"], ["Element", "XPath", "Action"]),
+    "QA View (Label + Action + Value)": (["label", "action", "values"], ["Element", "Action", "Value"]),
+}
+
+
+@st.cache_data(show_spinner=False)
+def find_legacy_files(folder, folder_mtime, version):
+    # recordings saved before the store existed, not imported yet
+    store = SessionStore()
+    stored_paths = store.source_paths()
+    store.close()
+    return [str(p) for p in sorted(Path(folder).glob("xpaths_*.json")) if str(p.resolve()) not in stored_paths]
+
+
+@st.cache_data(show_spinner=False)
+def load_sessions(version, url_filter, since):
+    store = SessionStore()
+    sessions = store.list_sessions(url_filter, since)
+    store.close()
+    return sessions
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_session_data(version, session_id):
+    store = SessionStore()
+    data = store.session_data(session_id)
+    store.close()
+    return data
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def session_view(version, session_id, view_option):
+    df = pd.DataFrame(load_session_data(version, session_id)["xpaths"])
+    df["action"] = df["action"].replace("change", "Input")
+    if view_option in VIEW_COLUMNS:
+        columns, names = VIEW_COLUMNS[view_option]
+        df = df[columns].copy()
+        df.columns = names
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def download_payload(version, session_id, fmt):
+    # built once per session and data version, not on every rerun
+    if fmt == "csv":
+        return session_view(version, session_id, "Full Data (with XPath)").to_csv(index=False)
+    return json.dumps(load_session_data(version, session_id), indent=2)
+
+
+if not Path(DEFAULT_DB).exists():
+    SessionStore().close()   # creates the database on first run
+version = data_version(DEFAULT_DB)
+
+app_dir = Path(__file__).parent
+legacy_files = find_legacy_files(str(app_dir), app_dir.stat().st_mtime_ns, version)
+if legacy_files and st.button(f"Import {len(legacy_files)} session file(s) into the store"):
+    store = SessionStore()
+    for path in legacy_files:
+        store.import_file(path)
+    store.close()
+    st.rerun()
+
+filter_col1, filter_col2 = st.columns([3, 1])
+with filter_col1:
+    url_filter = st.text_input("Filter by URL:", placeholder="part of the URL")
+with filter_col2:
+    since = st.date_input("Captured since:", value=None)
+
+sessions = load_sessions(version, url_filter or None, since.isoformat() if since else None)
+
+search_query = st.text_input("🔎 Search all sessions:", placeholder="label, value, XPath, group or URL - e.g. select branch")
+if search_query:
+    index = SearchIndex()
+    index.update()   # picks up sessions saved or imported since the last search
+    search_start = time.perf_counter()
+    hits = index.search(search_query, limit=200)
+    index.close()
+    st.caption(f"{len(hits)} matching events in {(time.perf_counter() - search_start) * 1000:.1f} ms")
+    if hits:
+        hits_df = pd.DataFrame(hits)[["session_id", "captured_at", "group", "label", "value", "xpath", "session_url"]]
+        hits_df.columns = ["Session", "Captured", "Group", "Element", "Value", "XPath", "URL"]
+        st.dataframe(hits_df, use_container_width=True, hide_index=True)
+    # only sessions with a match stay in the selector
+    hit_sessions = {hit["session_id"] for hit in hits}
+    sessions = [s for s in sessions if s["id"] in hit_sessions]
+
+if not sessions:
     st.info("No captured sessions yet. Start a recording above!")
     st.stop()
 
-# File selector
-selected_file = st.selectbox(
+# Session selector
+selected_session = st.selectbox(
     "Select captured session:",
-    json_files,
-    format_func=lambda x: x.name
+    sessions,
+    format_func=lambda s: f"#{s['id']}  {s['captured_at'][:19]}  |  {s['url']}  ({s['total_elements']} elements)"
 )
 
-# Load data
-with open(selected_file) as f:
-    data = json.load(f)
+st.success(f"✅ Loaded {selected_session['total_elements']} elements from session")
 
-st.success(f"✅ Loaded {data['total_elements']} elements from session")
-
-# Summary stats
+# Summary stats (from the session manifest, no event scan)
 st.subheader("📊 Summary")
 col1, col2, col3, col4 = st.columns(4)
 
-clicks = sum(1 for x in data["xpaths"] if x["action"] == "click")
-changes = sum(1 for x in data["xpaths"] if x["action"] == "change")
-
-col1.metric("Total Elements", data["total_elements"])
-col2.metric("Clicks", clicks)
-col3.metric("Input (Changes)", changes)
-col4.metric("URL", data["url"][:30] + "...")
+col1.metric("Total Elements", selected_session["total_elements"])
+col2.metric("Clicks", selected_session["clicks"])
+col3.metric("Input (Changes)", selected_session["inputs"])
+col4.metric("URL", selected_session["url"][:30] + "...")
+if selected_session["groups"]:
+    st.caption("Groups: " + ", ".join(selected_session["groups"]))
 
 # View options
 st.subheader("📋 Captured Data")
@@ -206,28 +309,8 @@ view_option = st.radio(
     horizontal=True
 )
 
-# Create dataframe
-df = pd.DataFrame(data["xpaths"])
-df["action"] = df["action"].replace("change", "Input")
-
 # Display based on selection
-if view_option == "Full Data (with XPath)":
-    st.dataframe(df, use_container_width=True)
-
-elif view_option == "Simple View (no XPath)":
-    simple_df = df[["label", "action", "strategy", "values"]].copy()
-    simple_df.columns = ["Element Name", "Action", "Strategy Used", "Value Entered"]
-    st.dataframe(simple_df, use_container_width=True)
-
-elif view_option == "Developer View (XPath Only)":
-    dev_df = df[["label", "xpath", "action"]].copy()
-    dev_df.columns = ["Element", "XPath", "Action"]
-    st.dataframe(dev_df, use_container_width=True)
-
-elif view_option == "QA View (Label + Action + Value)":
-    qa_df = df[["label", "action", "values"]].copy()
-    qa_df.columns = ["Element", "Action", "Value"]
-    st.dataframe(qa_df, use_container_width=True)
+st.dataframe(session_view(version, selected_session["id"], view_option), use_container_width=True)
 
 st.divider()
 
@@ -237,11 +320,12 @@ st.subheader("📥 Download")
 col1, col2 = st.columns(2)
 
 with col1:
-    csv_data = df.to_csv(index=False)
-    st.download_button("Download CSV", csv_data, file_name="xpaths_export.csv", mime="text/csv")
+    st.download_button("Download CSV", download_payload(version, selected_session["id"], "csv"),
+                       file_name="xpaths_export.csv", mime="text/csv")
 
 with col2:
-    st.download_button("Download JSON", json.dumps(data, indent=2), file_name="xpaths_export.json", mime="application/json")
+    st.download_button("Download JSON", download_payload(version, selected_session["id"], "json"),
+                       file_name="xpaths_export.json", mime="application/json")
 
 st.divider()
 st.markdown("*Built by QA Automation Team • Impacto Digital*")
@@ -0,0 +1,235 @@
+# asset_cache.py - Content-addressed static asset cache for replay runs
+# Static responses (scripts, styles, fonts, images, media) are recorded once into
+# a local store and served from it by routing on later runs. Documents and API
+# calls (xhr/fetch/websocket) always go to the server.
+#
+# Layout:  <dir>/objects/<sha256>     response bodies, shared by every URL with the same content
+#          <dir>/entries/<sha1>.json  per-URL metadata: hash, status, headers, validators, freshness
+#
+# Freshness: immutable/fingerprinted assets (e.g. /_next/static/) stay fresh for
+# IMMUTABLE_SECONDS; others use Cache-Control max-age, or DEFAULT_FRESH_SECONDS.
+# A stale entry is revalidated with If-None-Match / If-Modified-Since and only
+# re-downloaded when the server reports a change.
+#
+# Usage: python asset_cache.py stats [dir]
+#        python asset_cache.py har [dir] <out.har>
+#        python asset_cache.py clear [dir]
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+
+DEFAULT_CACHE_DIR = str(Path(__file__).parent / ".asset_cache")
+STATIC_RESOURCE_TYPES = ("script", "stylesheet", "font", "image", "media")
+DEFAULT_FRESH_SECONDS = 3600
+IMMUTABLE_SECONDS = 30 * 24 * 3600
+# content-hashed build output never changes under the same URL
+FINGERPRINTED_RE = re.compile(r"(/_next/static/|[.-][0-9a-f]{8,}\.(js|css|woff2?|png|jpe?g|svg|webp)$)", re.I)
+# not replayable from a stored body
+DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "set-cookie", "connection")
+
+
+def freshness_seconds(url, headers):
+    cache_control = headers.get("cache-control", "").lower()
+    if "immutable" in cache_control or FINGERPRINTED_RE.search(url.split("?")[0]):
+        return IMMUTABLE_SECONDS
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return int(match.group(1))
+    return DEFAULT_FRESH_SECONDS
+
+
+def cacheable(headers):
+    cache_control = headers.get("cache-control", "").lower()
+    return "no-store" not in cache_control and "private" not in cache_control
+
+
+class AssetCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+        (self.directory / "objects").mkdir(parents=True, exist_ok=True)
+        (self.directory / "entries").mkdir(parents=True, exist_ok=True)
+        self.stats = {"hits": 0, "revalidated": 0, "stored": 0, "passthrough": 0, "bytes_served": 0}
+
+    def entry_path(self, url):
+        return self.directory / "entries" / (hashlib.sha1(url.encode('utf-8')).hexdigest() + ".json")
+
+    def object_path(self, digest):
+        return self.directory / "objects" / digest
+
+    def lookup(self, url):
+        path = self.entry_path(url)
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):   # half-written by another worker
+            return None
+
+    def read(self, entry):
+        try:
+            with open(self.object_path(entry["sha256"]), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url, status, headers, body):
+        digest = hashlib.sha256(body).hexdigest()
+        obj = self.object_path(digest)
+        if not obj.exists():
+            _atomic_write(obj, body)
+        headers = {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS}
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "size": len(body),
+            "status": status,
+            "headers": headers,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "fresh_seconds": freshness_seconds(url, headers),
+            "stored_at": time.time(),
+        }
+        self.save_entry(entry)
+        self.stats["stored"] += 1
+        return entry
+
+    def save_entry(self, entry):
+        _atomic_write(self.entry_path(entry["url"]), json.dumps(entry).encode('utf-8'))
+
+    def is_fresh(self, entry):
+        return entry["stored_at"] + entry["fresh_seconds"] > time.time()
+
+    def is_static(self, request):
+        return request.method == "GET" and request.resource_type in STATIC_RESOURCE_TYPES
+
+    async def handle(self, route):
+        request = route.request
+        if not self.is_static(request):
+            self.stats["passthrough"] += 1
+            await route.continue_()
+            return
+
+        url = request.url
+        entry = self.lookup(url)
+        body = self.read(entry) if entry else None
+        if entry and body is not None and self.is_fresh(entry):
+            self.stats["hits"] += 1
+            self.stats["bytes_served"] += len(body)
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+            return
+
+        headers = dict(request.headers)
+        if entry and body is not None:
+            if entry["etag"]:
+                headers["if-none-match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["if-modified-since"] = entry["last_modified"]
+        response = await route.fetch(headers=headers)
+
+        if response.status == 304 and entry and body is not None:
+            entry["stored_at"] = time.time()
+            self.save_entry(entry)
+            self.stats["revalidated"] += 1
+            self.stats["bytes_served"] += len(body)
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+            return
+
+        fetched = await response.body()
+        if response.status == 200 and cacheable(response.headers):
+            self.store(url, response.status, response.headers, fetched)
+        await route.fulfill(response=response, body=fetched)
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['hits']} hits, {s['revalidated']} revalidated, {s['stored']} stored, "
+                f"{s['bytes_served'] / 1024 / 1024:.1f} MB served from cache")
+
+    def entries(self):
+        for path in sorted((self.directory / "entries").glob("*.json")):
+            with open(path) as f:
+                yield json.load(f)
+
+
+_open_caches = {}   # one cache per directory per process
+
+
+def open_cache(directory):
+    if directory not in _open_caches:
+        _open_caches[directory] = AssetCache(directory)
+    return _open_caches[directory]
+
+
+def _atomic_write(path, data):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def export_har(cache, out):
+    # HAR 1.2 in Playwright's "attach" layout: bodies are referenced by _file
+    base = cache.directory.resolve()
+    entries = []
+    for entry in cache.entries():
+        entries.append({
+            "startedDateTime": datetime.fromtimestamp(entry["stored_at"]).isoformat(),
+            "time": 0,
+            "request": {"method": "GET", "url": entry["url"], "httpVersion": "HTTP/1.1", "headers": [],
+                        "queryString": [], "cookies": [], "headersSize": -1, "bodySize": 0},
+            "response": {
+                "status": entry["status"], "statusText": "", "httpVersion": "HTTP/1.1", "cookies": [],
+                "headers": [{"name": k, "value": v} for k, v in entry["headers"].items()],
+                "content": {"size": entry["size"], "mimeType": entry["headers"].get("content-type", ""),
+                            "_file": str(base / "objects" / entry["sha256"])},
+                "redirectURL": "", "headersSize": -1, "bodySize": entry["size"],
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": 0, "receive": 0},
+        })
+    with open(out, 'w') as f:
+        json.dump({"log": {"version": "1.2", "creator": {"name": "asset_cache.py", "version": "1"},
+                           "entries": entries}}, f, indent=2)
+    return len(entries)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("stats", "har", "clear") or (args[0] == "har" and len(args) < 2):
+        print("Usage: python asset_cache.py stats [dir]", flush=True)
+        print("       python asset_cache.py har [dir] <out.har>", flush=True)
+        print("       python asset_cache.py clear [dir]", flush=True)
+        sys.exit(1)
+
+    command = args[0]
+    if command == "har":
+        directory = args[1] if len(args) > 2 else DEFAULT_CACHE_DIR
+        count = export_har(AssetCache(directory), args[-1])
+        print(f"Exported: {count} entries", flush=True)
+        print(f"Saved: {args[-1]}", flush=True)
+        return
+
+    directory = args[1] if len(args) > 1 else DEFAULT_CACHE_DIR
+    if command == "clear":
+        shutil.rmtree(directory, ignore_errors=True)
+        print("Cleared.", flush=True)
+        return
+
+    cache = AssetCache(directory)
+    entries = list(cache.entries())
+    objects = list((cache.directory / "objects").iterdir())
+    fresh = sum(1 for e in entries if cache.is_fresh(e))
+    print(f"URLs: {len(entries)} ({fresh} fresh) | Objects: {len(objects)} | "
+          f"Size: {sum(o.stat().st_size for o in objects) / 1024 / 1024:.1f} MB", flush=True)
+
+
+if __name__ == "__main__":
+    main()
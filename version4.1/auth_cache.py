@@ -0,0 +1,219 @@
+# auth_cache.py - Cached authenticated storage state for recording and replay
+# Playwright storage state (cookies + localStorage) is cached per environment
+# (origin) and user with an expiry. A cached state is validated once per process
+# on first use and only re-created - by replaying a recorded login session - when
+# it is missing, expired or fails validation. Every context of a run reuses it.
+#
+# recorder.py and replay_runner.py take --auth-user=<name> [--auth-login=<login_session.json>]
+# [--auth-validate=<xpath>]; the login session is only needed when the cache is cold.
+#
+# Usage: python auth_cache.py login <url> <user> <login_session.json> [--auth-validate=<xpath>]
+#        python auth_cache.py list
+#        python auth_cache.py clear [<url> <user>]
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlparse
+
+from playwright.sync_api import sync_playwright
+
+from session_io import load_session
+
+try:
+    import fcntl
+except ImportError:   # Windows: refreshes are not serialized across processes
+    fcntl = None
+
+
+CACHE_DIR = Path(__file__).parent / ".auth_cache"
+DEFAULT_TTL_SECONDS = 8 * 3600
+# overrides the recorded value of password fields when replaying a login session
+PASSWORD_ENV = "XPATH_AUTH_PASSWORD"
+LOGIN_PATH_RE = re.compile(r"(login|signin|sign-in|auth)", re.I)
+
+
+def environment_of(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+class AuthCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._validated = {}   # path -> state validated in this process
+
+    def path(self, env, user):
+        digest = hashlib.sha1(f"{env}|{user}".encode('utf-8')).hexdigest()[:12]
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{urlparse(env).netloc}_{user}").strip("_")
+        return self.cache_dir / f"{slug}_{digest}.json"
+
+    def get(self, env, user):
+        # cached state, or None if missing/expired
+        path = self.path(env, user)
+        if not path.exists():
+            return None
+        with open(path) as f:
+            entry = json.load(f)
+        if entry["expires_at"] < time.time():
+            return None
+        return entry["state"]
+
+    def put(self, env, user, state, ttl_seconds=None):
+        now = time.time()
+        entry = {
+            "env": env,
+            "user": user,
+            "created_at": datetime.fromtimestamp(now).isoformat(),
+            "expires_at": now + (ttl_seconds or self.ttl_seconds),
+            "state": state,
+        }
+        path = self.path(env, user)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def invalidate(self, env, user):
+        self._validated.pop(str(self.path(env, user)), None)
+        self.path(env, user).unlink(missing_ok=True)
+
+    def entries(self):
+        found = []
+        for path in sorted(self.cache_dir.glob("*.json")):
+            with open(path) as f:
+                entry = json.load(f)
+            found.append({k: entry[k] for k in ("env", "user", "created_at", "expires_at")} | {"path": str(path)})
+        return found
+
+    def ensure(self, url, user, login_session, validate_xpath=None):
+        # valid storage state for (environment of url, user); logs in only when needed
+        env = environment_of(url)
+        key = str(self.path(env, user))
+        if key in self._validated:
+            return self._validated[key]
+
+        with self._lock(env, user):
+            state = self.get(env, user)
+            if state is not None and validate_state(url, state, validate_xpath):
+                print(f"[AUTH] Using cached session for {user} @ {env}", flush=True)
+            else:
+                if not login_session:
+                    raise RuntimeError(f"no valid cached session for {user} @ {env}, pass --auth-login=<login_session.json>")
+                print(f"[AUTH] Logging in as {user} @ {env}", flush=True)
+                state = login_with_session(login_session)
+                self.put(env, user, state)
+        self._validated[key] = state
+        return state
+
+    def _lock(self, env, user):
+        return _FileLock(self.path(env, user).with_suffix(".lock"))
+
+
+class _FileLock:
+    # serializes refreshes so parallel workers do not all log in at once
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def __enter__(self):
+        self.handle = open(self.path, 'w')
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.handle.close()
+
+
+def validate_state(url, state, validate_xpath=None, timeout_ms=15000):
+    # logged in if the page does not bounce to a login URL (and shows validate_xpath, if given)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context(storage_state=state)
+        page = context.new_page()
+        try:
+            page.goto(url, wait_until="load", timeout=timeout_ms)
+            if LOGIN_PATH_RE.search(urlparse(page.url).path) and not LOGIN_PATH_RE.search(urlparse(url).path):
+                return False
+            if validate_xpath:
+                page.locator(f"xpath={validate_xpath}").first.wait_for(timeout=timeout_ms)
+            return True
+        except Exception:
+            return False
+        finally:
+            browser.close()
+
+
+def login_with_session(login_session, timeout_ms=15000):
+    # replays a recorded login session and returns the resulting storage state
+    session = load_session(login_session)
+    password = os.environ.get(PASSWORD_ENV)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        page = context.new_page()
+        page.goto(session["url"], wait_until="load", timeout=timeout_ms)
+        for entry in session["xpaths"]:
+            locator = page.locator(f"xpath={entry['xpath']}")
+            fingerprint = entry.get("fingerprint") or {}
+            if entry["action"] == "click":
+                locator.click(timeout=timeout_ms)
+            elif fingerprint.get("type") in ("checkbox", "radio"):
+                locator.set_checked(str(entry["values"]).lower() == "true", timeout=timeout_ms)
+            elif fingerprint.get("tag") == "select":
+                locator.select_option(str(entry["values"]), timeout=timeout_ms)
+            else:
+                value = password if password and fingerprint.get("type") == "password" else str(entry["values"])
+                locator.fill(value, timeout=timeout_ms)
+        page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        state = context.storage_state()
+        browser.close()
+    return state
+
+
+def auth_state_for(url, options):
+    # storage state for --auth-user, or None when recording/replaying anonymously
+    user = options.get('auth-user')
+    if not isinstance(user, str):
+        return None
+    return AuthCache().ensure(url, user, options.get('auth-login') or None, options.get('auth-validate') or None)
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, options = parse_args(sys.argv[1:])
+    cache = AuthCache()
+    if args and args[0] == "login" and len(args) == 4:
+        cache.invalidate(environment_of(args[1]), args[2])
+        cache.ensure(args[1], args[2], args[3], options.get('auth-validate') or None)
+        print(f"Saved: {cache.path(environment_of(args[1]), args[2])}", flush=True)
+    elif args and args[0] == "list":
+        for entry in cache.entries():
+            status = "valid" if entry["expires_at"] > time.time() else "expired"
+            print(f"{entry['env']} | {entry['user']} | {entry['created_at'][:19]} | {status}", flush=True)
+    elif args and args[0] == "clear":
+        if len(args) == 3:
+            cache.invalidate(environment_of(args[1]), args[2])
+        else:
+            for path in cache.cache_dir.glob("*.json"):
+                path.unlink()
+        print("Cleared.", flush=True)
+    else:
+        print("Usage: python auth_cache.py login <url> <user> <login_session.json> [--auth-validate=<xpath>]", flush=True)
+        print("       python auth_cache.py list", flush=True)
+        print("       python auth_cache.py clear [<url> <user>]", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
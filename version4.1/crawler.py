@@ -0,0 +1,234 @@
+# crawler.py - Same-site BFS crawler that enumerates locators on every page
+# Runs N browser contexts concurrently, de-duplicates URLs by normalized key and
+# writes one session file per page as it goes.
+#
+# Usage: python crawler.py <start_url> [output_dir] [--concurrency=4] [--max-depth=3]
+#            [--max-pages=200] [--include-hidden]
+#
+# Local fixture site: python -m http.server 8000 -d fixtures/site
+#                     python crawler.py http://localhost:8000/ crawl_out
+
+import re
+import sys
+import json
+import time
+import asyncio
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode, urljoin, urldefrag
+
+from playwright.async_api import async_playwright
+
+from recorder import LOCATOR_JS, ENUMERATE_JS, parse_args
+
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+SKIP_EXTENSIONS = (".pdf", ".zip", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".css", ".js", ".xml")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    # scheme/host lowercased, default port, fragment and tracking params dropped,
+    # query sorted, trailing slash and index.html folded
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    path = re.sub(r"/{2,}", "/", parsed.path or "/")
+    if path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    if len(path) > 1 and path.endswith("/"):
+        path = path[:-1]
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS))
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+
+class VisitedSet:
+    # stores 8-byte digests of normalized URLs instead of the URL strings
+    def __init__(self):
+        self._digests = set()
+
+    @staticmethod
+    def _key(url):
+        return hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest()
+
+    def add(self, url):
+        # True if the URL was not seen before
+        key = self._key(url)
+        if key in self._digests:
+            return False
+        self._digests.add(key)
+        return True
+
+    def __contains__(self, url):
+        return self._key(url) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+
+LINKS_JS = """
+() => Array.from(document.querySelectorAll('a[href]'), (a) => a.href)
+"""
+
+
+class Crawler:
+    def __init__(self, start_url, output_dir, concurrency=4, max_depth=3, max_pages=200,
+                 include_hidden=False, timeout_ms=30000):
+        self.start_url = start_url
+        self.origin = urlparse(normalize_url(start_url)).netloc
+        self.output_dir = Path(output_dir)
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.include_hidden = include_hidden
+        self.timeout_ms = timeout_ms
+
+        self.visited = VisitedSet()
+        self.queue = asyncio.Queue()
+        self.scheduled = 0
+        self.live_workers = 0
+        self.stats = {"pages": 0, "errors": 0, "elements": 0, "links_seen": 0}
+
+    def same_site(self, url):
+        parsed = urlparse(url)
+        return parsed.scheme in ("http", "https") and urlparse(normalize_url(url)).netloc == self.origin
+
+    def schedule(self, url, depth):
+        if depth > self.max_depth or self.scheduled >= self.max_pages:
+            return
+        if not self.same_site(url) or urlparse(url).path.lower().endswith(SKIP_EXTENSIONS):
+            return
+        if self.visited.add(url):
+            self.scheduled += 1
+            # the normalized form is only the dedupe key; navigate to the real URL
+            self.queue.put_nowait((urldefrag(url)[0], depth))
+
+    async def worker(self, browser, worker_id):
+        # each worker owns an isolated browser context
+        context = None
+        try:
+            try:
+                context = await browser.new_context()
+                page = await context.new_page()
+            except Exception as e:
+                print(f"[ERROR] worker {worker_id}: {e}", flush=True)
+                self.live_workers -= 1
+                if not self.live_workers:
+                    self.drain(f"no browser context: {e}")   # nobody is left to crawl what is queued
+                return
+            while True:
+                url, depth = await self.queue.get()
+                try:
+                    await self.crawl_page(page, url, depth)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    self.write_index({"url": url, "depth": depth, "error": str(e)})
+                    print(f"[ERROR] {url}: {e}", flush=True)
+                finally:
+                    self.queue.task_done()
+        finally:
+            if context:
+                await context.close()
+
+    def drain(self, error):
+        # fails every queued URL, so queue.join() returns
+        while not self.queue.empty():
+            url, depth = self.queue.get_nowait()
+            self.stats["errors"] += 1
+            self.write_index({"url": url, "depth": depth, "error": error})
+            print(f"[ERROR] {url}: {error}", flush=True)
+            self.queue.task_done()
+
+    async def crawl_page(self, page, url, depth):
+        start = time.perf_counter()
+        await page.goto(url, wait_until="load", timeout=self.timeout_ms)
+        await page.evaluate(LOCATOR_JS)
+        entries = await page.evaluate(ENUMERATE_JS, {"scope": None, "includeHidden": self.include_hidden})
+        links = await page.evaluate(LINKS_JS)
+        elapsed = time.perf_counter() - start
+
+        # redirects: record where we actually landed
+        final_url = page.url
+        if final_url != url:
+            self.visited.add(final_url)
+
+        for link in links:
+            self.stats["links_seen"] += 1
+            self.schedule(urljoin(final_url, link), depth + 1)
+
+        self.stats["pages"] += 1
+        self.stats["elements"] += len(entries)
+        filename = self.save_page(final_url, entries)
+        self.write_index({"url": url, "final_url": final_url, "depth": depth,
+                          "elements": len(entries), "seconds": round(elapsed, 3), "file": filename.name})
+        print(f"[{self.stats['pages']}] depth {depth} | {len(entries)} elements | {final_url}", flush=True)
+
+    def save_page(self, page_url, entries):
+        for entry in entries:
+            entry["page"] = page_url
+        data = {
+            "url": page_url,
+            "captured_at": datetime.now().isoformat(),
+            "total_elements": len(entries),
+            "xpaths": entries
+        }
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", urlparse(page_url).path).strip("_") or "root"
+        filename = self.output_dir / f"xpaths_{self.stats['pages']:04d}_{slug[:60]}.json"
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+        return filename
+
+    def write_index(self, record):
+        with open(self.output_dir / "crawl_index.jsonl", 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    async def run(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        self.schedule(self.start_url, 0)
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            self.live_workers = self.concurrency
+            workers = [asyncio.create_task(self.worker(browser, i)) for i in range(self.concurrency)]
+            await self.queue.join()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await browser.close()
+
+        self.stats["seconds"] = round(time.perf_counter() - start, 2)
+        self.stats["unique_urls"] = len(self.visited)
+        return self.stats
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if not args:
+        print("Usage: python crawler.py <start_url> [output_dir] [--concurrency=4] [--max-depth=3] "
+              "[--max-pages=200] [--include-hidden]", flush=True)
+        sys.exit(1)
+
+    output_dir = args[1] if len(args) > 1 else f"crawl_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    crawler = Crawler(
+        args[0],
+        output_dir,
+        concurrency=int(options.get('concurrency', 4)),
+        max_depth=int(options.get('max-depth', 3)),
+        max_pages=int(options.get('max-pages', 200)),
+        include_hidden=bool(options.get('include-hidden')),
+    )
+    print(f"CRAWLING: {args[0]}", flush=True)
+    stats = asyncio.run(crawler.run())
+    print(f"Pages: {stats['pages']} | Errors: {stats['errors']} | Elements: {stats['elements']} | "
+          f"Time: {stats['seconds']}s", flush=True)
+    print(f"Saved: {output_dir}", flush=True)
+    print("DONE", flush=True)
+
+
+if __name__ == "__main__":
+    main()
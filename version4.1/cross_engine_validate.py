@@ -0,0 +1,167 @@
+# cross_engine_validate.py - Resolve a saved session's locators in Chromium, Firefox and WebKit
+# Each engine runs in its own worker process, so the three checks run in parallel.
+#
+# Usage: python cross_engine_validate.py <session.json|csv> [--url=<url>]
+#            [--engines=chromium,firefox,webkit] [--out=<report.json>]
+
+import sys
+import csv
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from playwright.sync_api import sync_playwright
+
+from locator_batch import resolve_batch, match_status
+from recorder import parse_args
+from session_io import load_session, unique_locators
+
+
+ENGINES = ["chromium", "firefox", "webkit"]
+
+
+# runs in a worker process - one browser engine per worker
+def validate_engine(engine, pages, timeout_ms=30000):
+    report = {"engine": engine, "error": None, "launch_ms": 0, "pages": {}}
+    try:
+        with sync_playwright() as p:
+            start = time.perf_counter()
+            browser = getattr(p, engine).launch(headless=True)
+            report["launch_ms"] = (time.perf_counter() - start) * 1000
+
+            page = browser.new_page()
+            for page_url, xpaths in pages.items():
+                # a page that fails is reported in this engine's row; the other pages still run
+                try:
+                    start = time.perf_counter()
+                    page.goto(page_url, wait_until="load", timeout=timeout_ms)
+                    goto_ms = (time.perf_counter() - start) * 1000
+
+                    results, round_trip_ms = resolve_batch(page, xpaths)
+                    report["pages"][page_url] = {
+                        "goto_ms": goto_ms,
+                        "resolve_ms": round_trip_ms,
+                        "results": dict(zip(xpaths, results)),
+                        "error": None,
+                    }
+                except Exception as e:
+                    report["pages"][page_url] = {"goto_ms": None, "resolve_ms": None, "results": {}, "error": str(e)}
+                    page.close()
+                    page = browser.new_page()
+            browser.close()
+    except Exception as e:
+        report["error"] = str(e)
+    return report
+
+
+def build_matrix(locators, engine_reports):
+    rows = []
+    for loc in locators:
+        row = {"label": loc["label"], "xpath": loc["xpath"], "strategy": loc["strategy"], "page": loc["page"]}
+        counts = []
+        for report in engine_reports:
+            engine = report["engine"]
+            page = report["pages"].get(loc["page"], {})
+            result = page.get("results", {}).get(loc["xpath"])
+            if result is None:
+                row[f"{engine}_count"] = None
+                row[f"{engine}_ms"] = None
+                row[f"{engine}_status"] = f"page error: {page['error']}" if page.get("error") else "not run"
+                continue
+            row[f"{engine}_count"] = result["count"]
+            row[f"{engine}_ms"] = round(result["ms"], 3)
+            row[f"{engine}_status"] = match_status(result["count"], result["error"])
+            counts.append(result["count"])
+
+        if not counts:
+            row["status"] = "page error" if any(row[f"{r['engine']}_status"].startswith("page error")
+                                                for r in engine_reports) else "not run"
+        elif all(c == 1 for c in counts):
+            row["status"] = "ok"
+        elif len(set(counts)) > 1:
+            row["status"] = "inconsistent"
+        else:
+            row["status"] = "non-unique" if counts[0] > 1 else "unresolved"
+        rows.append(row)
+    return rows
+
+
+def validate_session(session, engines=ENGINES):
+    locators = unique_locators(session["xpaths"])
+    pages = {}
+    for loc in locators:
+        pages.setdefault(loc["page"], []).append(loc["xpath"])
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(engines)) as pool:
+        engine_reports = list(pool.map(validate_engine, engines, [pages] * len(engines)))
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "session": session["path"],
+        "url": session["url"],
+        "validated_at": datetime.now().isoformat(),
+        "wall_ms": wall_ms,
+        "engines": [
+            {"engine": r["engine"], "error": r["error"], "launch_ms": r["launch_ms"],
+             "pages": {u: {"goto_ms": p["goto_ms"], "resolve_ms": p["resolve_ms"], "error": p["error"]}
+                       for u, p in r["pages"].items()}}
+            for r in engine_reports
+        ],
+        "matrix": build_matrix(locators, engine_reports),
+    }
+
+
+def save_report(report, filename):
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    csv_file = filename.rsplit('.', 1)[0] + ".csv"
+    if report["matrix"]:
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(report["matrix"][0].keys()))
+            writer.writeheader()
+            writer.writerows(report["matrix"])
+    return csv_file
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if not args:
+        print("Usage: python cross_engine_validate.py <session.json|csv> [--url=<url>] "
+              "[--engines=chromium,firefox,webkit] [--out=<report.json>]", flush=True)
+        sys.exit(1)
+
+    session = load_session(args[0])
+    if options.get('url'):
+        for entry in session["xpaths"]:
+            entry["page"] = options['url']
+        session["url"] = options['url']
+    if not session["url"]:
+        print("ERROR: session has no URL, pass --url=<url>", flush=True)
+        sys.exit(1)
+
+    engines = options['engines'].split(',') if options.get('engines') else ENGINES
+    report = validate_session(session, engines)
+
+    out = options.get('out') or f"cross_engine_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    csv_file = save_report(report, out)
+
+    for engine in report["engines"]:
+        status = f"ERROR: {engine['error']}" if engine["error"] else f"launch {engine['launch_ms']:.0f} ms"
+        print(f"[{engine['engine']}] {status}", flush=True)
+        for page_url, page in engine["pages"].items():
+            if page["error"]:
+                print(f"[{engine['engine']}] ERROR: {page_url}: {page['error']}", flush=True)
+    statuses = {}
+    for row in report["matrix"]:
+        statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+    print(f"Locators: {len(report['matrix'])} | " + " | ".join(f"{k}: {v}" for k, v in sorted(statuses.items())), flush=True)
+    print(f"Wall time: {report['wall_ms']:.0f} ms", flush=True)
+    print(f"Saved: {out}", flush=True)
+    print(f"Saved: {csv_file}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# dom_snapshots.py - Per-step DOM snapshots for offline reprocessing
+# The page serializes a compact DOM (one node per line, no scripts/styles) after
+# each recorded step; SnapshotStore dedupes it by hash and stores it as a
+# line diff against the previous snapshot, on a background thread.
+
+import json
+import zlib
+import queue
+import hashlib
+import difflib
+import threading
+from pathlib import Path
+from datetime import datetime
+
+
+# Installs window.__xpathSnapshot() - returns the compact serialized DOM
+SNAPSHOT_JS = """
+(function () {
+    const SKIP = new Set(['script', 'style', 'noscript', 'template', 'link', 'meta']);
+    const VOID = new Set(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                          'source', 'track', 'wbr']);
+
+    function esc(s) {
+        return String(s).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+    }
+
+    function walk(node, out) {
+        if (node.nodeType === 3) {
+            const text = node.nodeValue.trim();
+            if (text) out.push(esc(text));
+            return;
+        }
+        if (node.nodeType !== 1) return;
+        const tag = node.tagName.toLowerCase();
+        if (SKIP.has(tag)) return;
+
+        let open = '<' + tag;
+        for (const attr of node.attributes) {
+            if (attr.name === 'style' || attr.name.startsWith('on')) continue;
+            open += ' ' + attr.name + '="' + esc(attr.value) + '"';
+        }
+        // keep what the user typed, not just the initial attribute
+        if ((tag === 'input' || tag === 'textarea' || tag === 'select') && !node.hasAttribute('value')) {
+            open += ' value="' + esc(node.value || '') + '"';
+        }
+        if (node.checked) open += ' checked="checked"';
+        out.push(open + '>');
+        if (VOID.has(tag)) return;
+
+        if (tag === 'svg') {
+            out.push('</svg>');
+            return;
+        }
+        for (const child of node.childNodes) walk(child, out);
+        out.push('</' + tag + '>');
+    }
+
+    window.__xpathSnapshot = function () {
+        const out = [];
+        walk(document.documentElement, out);
+        return out.join('\\n');
+    };
+})();
+"""
+
+
+class SnapshotStore:
+    def __init__(self, directory, budget_bytes=50 * 1024 * 1024, keyframe_every=25):
+        self.directory = Path(directory)
+        self.objects_dir = self.directory / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.directory / "index.jsonl"
+        self.budget_bytes = budget_bytes
+        self.keyframe_every = keyframe_every
+
+        self.bytes_written = 0
+        self.stats = {"captured": 0, "deduplicated": 0, "stored": 0, "skipped": 0}
+        self._known = set()         # hashes already stored
+        self._prev_hash = None
+        self._prev_lines = None
+        self._since_keyframe = 0
+        self._budget_warned = False
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    # called from the recorder's event handler - must not block
+    def capture(self, step, url, html):
+        self._queue.put((step, url, html, datetime.now().isoformat()))
+
+    def close(self, timeout=30):
+        self._queue.put(None)
+        self._thread.join(timeout)
+        return self.stats
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._store(*item)
+            except Exception as e:
+                print(f"[SNAPSHOT] Failed to store step {item[0]}: {e}", flush=True)
+
+    def _store(self, step, url, html, timestamp):
+        self.stats["captured"] += 1
+        digest = hashlib.sha1(html.encode('utf-8')).hexdigest()
+        entry = {"step": step, "url": url, "timestamp": timestamp, "hash": digest}
+
+        if digest in self._known:
+            self.stats["deduplicated"] += 1
+            entry["kind"] = "dedup"
+        else:
+            lines = html.split('\n')
+            if self._prev_lines is None or self._since_keyframe >= self.keyframe_every:
+                record = {"kind": "full", "lines": lines}
+                self._since_keyframe = 0
+            else:
+                record = {"kind": "delta", "base": self._prev_hash, "ops": make_delta(self._prev_lines, lines)}
+                self._since_keyframe += 1
+
+            blob = zlib.compress(json.dumps(record).encode('utf-8'), 9)
+            if self.bytes_written + len(blob) > self.budget_bytes:
+                self.stats["skipped"] += 1
+                entry["kind"] = "skipped"
+                if not self._budget_warned:
+                    print(f"[SNAPSHOT] Budget of {self.budget_bytes} bytes reached, skipping further snapshots", flush=True)
+                    self._budget_warned = True
+            else:
+                (self.objects_dir / f"{digest}.z").write_bytes(blob)
+                self.bytes_written += len(blob)
+                self._known.add(digest)
+                self.stats["stored"] += 1
+                entry["kind"] = record["kind"]
+                entry["bytes"] = len(blob)
+                self._prev_hash = digest
+                self._prev_lines = lines
+
+        with open(self.index_file, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+
+# delta ops: ["=", start, end] copies lines from the base, ["+", [lines]] inserts new ones
+def make_delta(old_lines, new_lines):
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(["=", i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(["+", new_lines[j1:j2]])
+    return ops
+
+
+def apply_delta(base_lines, ops):
+    lines = []
+    for op in ops:
+        if op[0] == "=":
+            lines.extend(base_lines[op[1]:op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+
+def read_index(directory):
+    entries = []
+    with open(Path(directory) / "index.jsonl") as f:
+        for line in f:
+            entries.append(json.loads(line))
+    return entries
+
+
+def load_snapshot(directory, digest, _cache=None):
+    # rebuilds a snapshot by following its delta chain back to a full keyframe
+    cache = _cache if _cache is not None else {}
+    chain = []
+    while digest not in cache:
+        record = json.loads(zlib.decompress((Path(directory) / "objects" / f"{digest}.z").read_bytes()))
+        chain.append((digest, record))
+        if record["kind"] == "full":
+            break
+        digest = record["base"]
+
+    for digest, record in reversed(chain):
+        if record["kind"] == "full":
+            cache[digest] = record["lines"]
+        else:
+            cache[digest] = apply_delta(cache[record["base"]], record["ops"])
+    return '\n'.join(cache[chain[0][0]] if chain else cache[digest])
+
+
+def iter_snapshots(directory):
+    # yields (index entry, html) for every stored step, sharing one reconstruction cache
+    cache = {}
+    for entry in read_index(directory):
+        if entry["kind"] == "skipped":
+            continue
+        yield entry, load_snapshot(directory, entry["hash"], cache)
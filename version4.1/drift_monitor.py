@@ -0,0 +1,286 @@
+# drift_monitor.py - Post-deploy locator drift monitoring with Merkle-style DOM hashes
+# Every element gets a hash of its tag, stable attributes, direct text and child
+# hashes. Each locator remembers the hash of an ancestor "anchor" subtree; later
+# runs skip pages whose root hash is unchanged and only re-verify locators whose
+# anchor subtree changed. Status changes, and pages that fail to load, are
+# appended to a history log.
+#
+# Usage: python drift_monitor.py check <session files...> [--state=drift_state.json]
+#            [--anchor-depth=3] [--url=<override>]
+#        python drift_monitor.py history [--state=drift_state.json] [--label=<label>]
+
+import sys
+import json
+import time
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+from playwright.sync_api import sync_playwright
+
+from locator_batch import match_status
+from recorder import LOCATOR_JS, parse_args
+from session_io import load_session, unique_locators
+
+
+# Installs window.__drift = { hashAll(anchorPaths), locate(xpaths, anchorDepth) }
+DRIFT_JS = """
+(function () {
+    const { getAbsoluteXPath } = window.__xpathLocator;
+    const ATTRS = ['id', 'name', 'type', 'role', 'data-testid', 'aria-label', 'placeholder', 'href'];
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+    let hashes = new Map();
+
+    function cyrb53(str) {
+        let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+        for (let i = 0; i < str.length; i++) {
+            const ch = str.charCodeAt(i);
+            h1 = Math.imul(h1 ^ ch, 2654435761);
+            h2 = Math.imul(h2 ^ ch, 1597334677);
+        }
+        h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+        h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+        return (h2 >>> 0).toString(16).padStart(8, '0') + (h1 >>> 0).toString(16).padStart(8, '0');
+    }
+
+    // post-order: a node's hash covers its whole subtree
+    function hashNode(el) {
+        let s = el.tagName;
+        for (const attr of ATTRS) {
+            const value = el.getAttribute(attr);
+            if (value !== null) s += '|' + attr + '=' + value;
+        }
+        // class-strategy locators depend on class names; order and spacing do not matter
+        const classes = (el.getAttribute('class') || '').trim().split(/\\s+/).filter(Boolean).sort().join(' ');
+        if (classes) s += '|class=' + classes;
+        for (const child of el.childNodes) {
+            if (child.nodeType === 1) {
+                if (!SKIP.has(child.tagName)) s += '(' + hashNode(child) + ')';
+            } else if (child.nodeType === 3) {
+                const text = child.nodeValue.trim();
+                if (text) s += '"' + text.slice(0, 100);
+            }
+        }
+        const h = cyrb53(s);
+        hashes.set(el, h);
+        return h;
+    }
+
+    function byXPath(xpath) {
+        try {
+            return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function hashAll(anchorPaths) {
+        const start = performance.now();
+        hashes = new Map();
+        const root = hashNode(document.documentElement);
+        const anchors = {};
+        for (const path of anchorPaths) {
+            const el = byXPath(path);
+            anchors[path] = el ? hashes.get(el) || null : null;
+        }
+        return { root, anchors, nodes: hashes.size, ms: performance.now() - start };
+    }
+
+    function locate(xpaths, anchorDepth) {
+        return xpaths.map((xpath) => {
+            let count = 0, error = null, anchorPath = null, anchorHash = null;
+            try {
+                const result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                count = result.snapshotLength;
+                if (count === 1) {
+                    let anchor = result.snapshotItem(0);
+                    for (let i = 0; i < anchorDepth && anchor.parentElement && anchor.parentElement !== document.body; i++) {
+                        anchor = anchor.parentElement;
+                    }
+                    anchorPath = getAbsoluteXPath(anchor);
+                    anchorHash = hashes.get(anchor) || null;
+                }
+            } catch (e) {
+                error = String(e.message || e);
+            }
+            return { count, error, anchorPath, anchorHash };
+        });
+    }
+
+    window.__drift = { hashAll, locate };
+})();
+"""
+
+
+def locator_key(entry):
+    return f"{entry['label']}|{entry['xpath']}"
+
+
+def load_state(path):
+    if Path(path).exists():
+        with open(path) as f:
+            return json.load(f)
+    return {"pages": {}}
+
+
+def save_state(state, path):
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    tmp.replace(path)
+
+
+def append_history(history_file, records):
+    with open(history_file, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def group_hashes(page_state):
+    # a group's hash combines the anchor hashes of its locators
+    groups = {}
+    for loc in page_state["locators"].values():
+        groups.setdefault(loc["group"] or "(ungrouped)", []).append(loc["anchor_hash"] or "-")
+    return {g: hashlib.sha1("|".join(sorted(h)).encode()).hexdigest()[:16] for g, h in groups.items()}
+
+
+def check_page(page, page_url, locators, page_state, anchor_depth, run_at):
+    # returns (page_state, history records, summary)
+    page.goto(page_url, wait_until="load")
+    page.evaluate(LOCATOR_JS)
+    page.evaluate(DRIFT_JS)
+
+    known = page_state["locators"] if page_state else {}
+    anchor_paths = sorted({l["anchor_path"] for l in known.values() if l["anchor_path"]})
+    hashed = page.evaluate("(paths) => window.__drift.hashAll(paths)", anchor_paths)
+
+    summary = {"page": page_url, "run_at": run_at, "nodes": hashed["nodes"], "hash_ms": hashed["ms"],
+               "locators": len(locators), "reverified": 0, "skipped": 0}
+    if page_state and page_state["root_hash"] == hashed["root"] and set(known) == {locator_key(l) for l in locators}:
+        summary["status"] = "unchanged"
+        summary["skipped"] = len(locators)
+        return page_state, [], summary
+
+    # only locators that are new, already broken, or whose anchor subtree hash changed
+    to_check = []
+    for loc in locators:
+        prev = known.get(locator_key(loc))
+        if not prev or prev["status"] != "unique" or not prev["anchor_path"] \
+                or hashed["anchors"].get(prev["anchor_path"]) != prev["anchor_hash"]:
+            to_check.append(loc)
+    summary["reverified"] = len(to_check)
+    summary["skipped"] = len(locators) - len(to_check)
+    summary["status"] = "changed" if page_state else "baseline"
+
+    start = time.perf_counter()
+    located = page.evaluate("([xpaths, depth]) => window.__drift.locate(xpaths, depth)",
+                            [[l["xpath"] for l in to_check], anchor_depth])
+    summary["verify_ms"] = (time.perf_counter() - start) * 1000
+
+    history = []
+    new_locators = {key: value for key, value in known.items() if key in {locator_key(l) for l in locators}}
+    for loc, res in zip(to_check, located):
+        key = locator_key(loc)
+        status = match_status(res["count"], res["error"])
+        prev = known.get(key)
+        if prev and prev["status"] != status:
+            history.append({"run_at": run_at, "page": page_url, "label": loc["label"], "group": loc["group"],
+                            "xpath": loc["xpath"], "from": prev["status"], "to": status, "matches": res["count"],
+                            "event": "recovered" if status == "unique" else "broke"})
+        new_locators[key] = {
+            "label": loc["label"],
+            "group": loc["group"],
+            "xpath": loc["xpath"],
+            "status": status,
+            "matches": res["count"],
+            "anchor_path": res["anchorPath"],
+            "anchor_hash": res["anchorHash"],
+            "checked_at": run_at,
+        }
+
+    page_state = {"root_hash": hashed["root"], "locators": new_locators, "updated_at": run_at}
+    page_state["groups"] = group_hashes(page_state)
+    return page_state, history, summary
+
+
+def run_check(session_paths, state_file, anchor_depth=3, url_override=None):
+    state = load_state(state_file)
+    history_file = Path(state_file).with_suffix(".history.jsonl")
+    run_at = datetime.now().isoformat()
+
+    pages = {}
+    for path in session_paths:
+        for loc in unique_locators(load_session(path)["xpaths"]):
+            pages.setdefault(url_override or loc["page"], []).append(loc)
+
+    summaries = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        for page_url, locators in pages.items():
+            try:
+                page_state, history, summary = check_page(page, page_url, locators, state["pages"].get(page_url),
+                                                          anchor_depth, run_at)
+            except Exception as e:
+                # the page keeps its last known state; the run goes on with the other pages
+                error = str(e).splitlines()[0]
+                summary = {"page": page_url, "run_at": run_at, "status": "error", "error": error,
+                           "locators": len(locators), "reverified": 0, "skipped": 0}
+                append_history(history_file, [{"run_at": run_at, "event": "error", "page": page_url, "error": error},
+                                              {"run_at": run_at, "event": "run", **summary}])
+                summaries.append(summary)
+                print(f"[error] {page_url} | {error}", flush=True)
+                page.close()
+                page = browser.new_page()
+                continue
+            state["pages"][page_url] = page_state
+            append_history(history_file, history + [{"run_at": run_at, "event": "run", **summary}])
+            # saved per page, so transitions already in the history are not appended again next run
+            save_state(state, state_file)
+            summaries.append(summary)
+            broken = [h for h in history if h["event"] == "broke"]
+            print(f"[{summary['status']}] {page_url} | re-verified {summary['reverified']}/{summary['locators']}"
+                  f" | broke {len(broken)}", flush=True)
+        browser.close()
+
+    save_state(state, state_file)
+    return summaries
+
+
+def print_history(state_file, label=None):
+    history_file = Path(state_file).with_suffix(".history.jsonl")
+    if not history_file.exists():
+        print("No history yet.", flush=True)
+        return
+    with open(history_file) as f:
+        for line in f:
+            record = json.loads(line)
+            if record["event"] == "error" and not label:
+                print(f"{record['run_at'][:19]} | error     | {record['page']} | {record['error']}", flush=True)
+            if record["event"] in ("run", "error") or (label and record["label"] != label):
+                continue
+            print(f"{record['run_at'][:19]} | {record['event']:9} | {record['group'] or '-'} | "
+                  f"{record['label']} | {record['from']} -> {record['to']} | {record['xpath']}", flush=True)
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    state_file = options.get('state') or "drift_state.json"
+    if args and args[0] == "history":
+        print_history(state_file, options.get('label') or None)
+    elif len(args) > 1 and args[0] == "check":
+        summaries = run_check(args[1:], state_file, int(options.get('anchor-depth', 3)), options.get('url') or None)
+        total = sum(s["locators"] for s in summaries)
+        reverified = sum(s["reverified"] for s in summaries)
+        errors = sum(1 for s in summaries if s["status"] == "error")
+        print(f"Pages: {len(summaries)} | Re-verified: {reverified}/{total} locators | Page errors: {errors}", flush=True)
+        print(f"Saved: {state_file}", flush=True)
+    else:
+        print("Usage: python drift_monitor.py check <session files...> [--state=drift_state.json] "
+              "[--anchor-depth=3] [--url=<override>]", flush=True)
+        print("       python drift_monitor.py history [--state=drift_state.json] [--label=<label>]", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
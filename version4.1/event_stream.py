@@ -0,0 +1,303 @@
+# event_stream.py - Binary framed event protocol for the recorder -> dashboard stream
+# A stream starts with MAGIC and is a sequence of frames: kind (1 byte), payload
+# length and CRC32 of the payload (4 bytes each), then a msgpack payload.
+#   STRING frames [id, text] intern the values of INTERNED fields (labels,
+#     xpaths, ...): each is written once and then referenced by id
+#   SHAPE frames [id, field names, positions of interned values] define a record layout
+#   EVENT frames [seq, timestamp in integer microseconds, shape id, field values],
+#     plus the UTC offset in seconds for a timezone-aware timestamp (naive ones are local time)
+# A frame cut off by a writer mid-read is left for the next read instead of
+# failing the parse; a CRC mismatch anywhere else is reported as corruption.
+# A repeated MAGIC resets the string table, so streams can be concatenated.
+# JSONL streams (plain or gzipped) are still readable, and can be converted both ways.
+#
+# Usage: python event_stream.py to-frames <in.jsonl[.gz]> <out.xpev>
+#        python event_stream.py to-jsonl <in.xpev[.gz]> <out.jsonl>
+#        python event_stream.py stats <file>
+
+import os
+import sys
+import gzip
+import json
+import time
+import zlib
+import struct
+import functools
+import itertools
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+
+
+MAGIC = b"XPEVNT01"
+FRAME = struct.Struct("<II")   # payload length, crc32(payload); follows the kind byte
+STRING, SHAPE, EVENT = 1, 2, 3
+INTERNED = frozenset(("type", "label", "xpath", "strategy", "action", "page", "url", "name", "group"))
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_micros(timestamp):
+    # (epoch microseconds, UTC offset in seconds, or None for a naive local timestamp)
+    dt = datetime.fromisoformat(timestamp)
+    offset = dt.utcoffset()
+    if offset is None:
+        return int(dt.replace(microsecond=0).timestamp()) * 1_000_000 + dt.microsecond, None
+    return (dt - EPOCH) // timedelta(microseconds=1), offset // timedelta(seconds=1)
+
+
+@functools.lru_cache(maxsize=4096)
+def _iso_second(seconds):
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def from_micros(micros, offset=None):
+    # same text as datetime.isoformat(); the per-second part of local timestamps is cached
+    if offset is not None:
+        return (EPOCH + timedelta(microseconds=micros)).astimezone(timezone(timedelta(seconds=offset))).isoformat()
+    seconds, micro = divmod(micros, 1_000_000)
+    return f"{_iso_second(seconds)}.{micro:06d}" if micro else _iso_second(seconds)
+
+
+def frame(kind, data):
+    payload = msgpack.packb(data, use_bin_type=True)
+    return bytes([kind]) + FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class FrameEncoder:
+    def __init__(self):
+        self.ids = {}      # text -> id of every string already defined in the stream
+        self.shapes = {}   # (field names, interned positions) -> shape id
+
+    def learn(self, kind, payload):
+        # picks up a definition written by another encoder of the same stream
+        if kind == STRING:
+            string_id, text = msgpack.unpackb(payload)
+            self.ids[text] = string_id
+        elif kind == SHAPE:
+            shape_id, keys, positions = msgpack.unpackb(payload)
+            self.shapes[(tuple(keys), tuple(positions))] = shape_id
+
+    def encode(self, record):
+        # the EVENT frame for record, preceded by definitions of strings/shapes not seen before
+        out, keys, values, positions = [], [], [], []
+        micros = offset = None
+        for key, value in record.items():
+            if key == "seq":
+                continue
+            if key == "timestamp" and isinstance(value, str):
+                try:
+                    micros, offset = to_micros(value)
+                    continue
+                except ValueError:
+                    pass   # not ISO: kept as a plain field
+            if key in INTERNED and isinstance(value, str):
+                string_id = self.ids.get(value)
+                if string_id is None:
+                    string_id = self.ids[value] = len(self.ids)
+                    out.append(frame(STRING, [string_id, value]))
+                positions.append(len(values))
+                value = string_id
+            keys.append(key)
+            values.append(value)
+
+        shape = (tuple(keys), tuple(positions))
+        shape_id = self.shapes.get(shape)
+        if shape_id is None:
+            shape_id = self.shapes[shape] = len(self.shapes)
+            out.append(frame(SHAPE, [shape_id, keys, positions]))
+        event = [record.get("seq"), micros, shape_id, values]
+        out.append(frame(EVENT, event if offset is None else event + [offset]))
+        return b"".join(out)
+
+
+class FrameDecoder:
+    def __init__(self):
+        self.table = {}
+        self.shapes = {}
+
+    def define(self, kind, payload):
+        if kind == STRING:
+            string_id, text = msgpack.unpackb(payload)
+            self.table[string_id] = text
+        elif kind == SHAPE:
+            shape_id, keys, positions = msgpack.unpackb(payload)
+            self.shapes[shape_id] = (keys, positions)
+
+    def event(self, payload):
+        seq, micros, shape_id, values, *offset = msgpack.unpackb(payload)
+        keys, positions = self.shapes[shape_id]
+        table = self.table
+        for i in positions:
+            values[i] = table[values[i]]
+        record = {} if seq is None else {"seq": seq}
+        record.update(zip(keys, values))
+        if micros is not None:
+            record["timestamp"] = from_micros(micros, *offset)
+        return record
+
+
+def iter_frames(data, pos=0):
+    # (kind, payload, end offset) per complete frame of data from pos on; kind None
+    # marks a repeated MAGIC. Stops quietly at a frame still being written.
+    unpack, size, n = FRAME.unpack_from, FRAME.size, len(data)
+    while pos < n:
+        kind = data[pos]
+        if kind == MAGIC[0]:
+            if pos + len(MAGIC) > n:
+                return
+            if data[pos:pos + len(MAGIC)] != MAGIC:
+                raise ValueError(f"corrupt stream at byte {pos}")
+            pos += len(MAGIC)
+            yield None, None, pos
+            continue
+        if pos + 1 + size > n:
+            return
+        length, crc = unpack(data, pos + 1)
+        end = pos + 1 + size + length
+        if end > n:
+            return
+        payload = data[pos + 1 + size:end]
+        if zlib.crc32(payload) != crc:
+            if end == n:
+                return   # torn write at the end: complete on the next read
+            raise ValueError(f"CRC mismatch in frame at byte {pos}")
+        yield kind, payload, end
+        pos = end
+
+
+def iter_records(f):
+    # records from a binary-framed or a JSON-lines stream, told apart by the leading MAGIC
+    head = f.read(len(MAGIC))
+    if head != MAGIC:
+        for line in itertools.chain([head + f.readline()], f) if head else []:
+            if line.strip():
+                yield json.loads(line)
+        return
+    decoder = FrameDecoder()
+    for kind, payload, _ in iter_frames(f.read()):
+        if kind is None:
+            decoder = FrameDecoder()
+        elif kind == EVENT:
+            yield decoder.event(payload)
+        else:
+            decoder.define(kind, payload)
+
+
+def open_stream(path):
+    # binary file object for path, gunzipped when it is gzip-compressed
+    f = open(path, 'rb')
+    if f.read(2) == b"\x1f\x8b":
+        f.seek(0)
+        return gzip.GzipFile(fileobj=f)
+    f.seek(0)
+    return f
+
+
+def read_events(path):
+    with open_stream(path) as f:
+        yield from iter_records(f)
+
+
+class StreamWriter:
+    # appends events to a frame file that other processes may also append to;
+    # callers serialize appends (the live journal holds its lock)
+    def __init__(self, path):
+        self.path = Path(path)
+        self.reset(None)
+
+    def reset(self, inode):
+        self.inode = inode
+        self.size = 0
+        self.encoder = FrameEncoder()
+        self.first = None   # (seq, timestamp) of the first event
+        self.last_seq = None
+
+    def sync(self):
+        # picks up strings and seqs from frames appended since the last sync
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self.reset(None)
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.size:
+            self.reset(stat.st_ino)   # a new file at this path
+        if stat.st_size == self.size:
+            return
+        last_event = None
+        with open(self.path, 'rb') as f:
+            if self.size == 0:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{self.path} is not an event stream")
+                self.size = len(MAGIC)
+            else:
+                f.seek(self.size)
+            base = self.size
+            for kind, payload, end in iter_frames(f.read()):
+                if kind == EVENT:
+                    if self.first is None:
+                        seq, micros, _, _, *offset = msgpack.unpackb(payload)
+                        self.first = (seq, from_micros(micros, *offset) if micros is not None else None)
+                    last_event = payload
+                elif kind is not None:
+                    self.encoder.learn(kind, payload)
+                self.size = base + end
+        if self.size < stat.st_size:
+            os.truncate(self.path, self.size)   # a frame torn by a crashed writer
+        if last_event is not None:
+            self.last_seq = msgpack.unpackb(last_event)[0]
+
+    def append(self, record):
+        self.sync()
+        data = self.encoder.encode(record)
+        if self.size == 0:
+            data = MAGIC + data
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self.inode = self.inode or self.path.stat().st_ino
+        self.size += len(data)
+        if self.first is None:
+            self.first = (record.get("seq"), record.get("timestamp"))
+        self.last_seq = record.get("seq")
+        return len(data)
+
+
+def encode_stream(records):
+    encoder = FrameEncoder()
+    return MAGIC + b"".join(encoder.encode(record) for record in records)
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, _ = parse_args(sys.argv[1:])
+    command = args[0] if args else None
+    if not ((command in ("to-frames", "to-jsonl") and len(args) == 3) or (command == "stats" and len(args) == 2)):
+        print("Usage: python event_stream.py to-frames <in.jsonl[.gz]> <out.xpev>", flush=True)
+        print("       python event_stream.py to-jsonl <in.xpev[.gz]> <out.jsonl>", flush=True)
+        print("       python event_stream.py stats <file>", flush=True)
+        sys.exit(1)
+
+    try:
+        start = time.perf_counter()
+        records = list(read_events(args[1]))
+        elapsed = (time.perf_counter() - start) * 1000
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {args[1]}: {e}", flush=True)
+        sys.exit(1)
+
+    if command == "stats":
+        print(f"{args[1]}: {len(records)} records | {Path(args[1]).stat().st_size} bytes | parsed in {elapsed:.1f} ms",
+              flush=True)
+        return
+    with open(args[2], 'wb') as f:
+        if command == "to-frames":
+            f.write(encode_stream(records))
+        else:
+            f.write(b"".join((json.dumps(record) + '\n').encode('utf-8') for record in records))
+    before, after = Path(args[1]).stat().st_size, Path(args[2]).stat().st_size
+    print(f"Converted: {len(records)} records | {before} -> {after} bytes", flush=True)
+    print(f"Saved: {args[2]}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# journal_reader.py - Memory-mapped journal readers with sidecar offset indexes
+# A journal file is memory-mapped and a sidecar index holds the byte offset of
+# every record (record number -> offset). Sidecars are extended incrementally:
+# on open only the bytes appended since the last open are scanned, and nothing
+# is parsed. Single records, slices, the last N records and timestamp windows
+# (binary search) are then read without touching the rest of the file. A record
+# still being written is left out until it is complete.
+#   JsonlReader: JSON-lines logs; <file>.idx holds line offsets
+#   FrameReader: binary event streams (event_stream.py), such as a live journal's
+#     active.xpev; <file>.idx holds event offsets, and <file>.strings.idx /
+#     <file>.shapes.idx the offsets of the string and shape definitions, which
+#     are unpacked only when an event that uses them is read
+#
+# Usage: python journal_reader.py <file.jsonl|file.xpev> [--tail=N] [--from=<n>] [--to=<n>]
+#            [--since=<iso>] [--until=<iso>] [--key=timestamp]
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+from array import array
+from pathlib import Path
+
+import msgpack
+
+from event_stream import MAGIC as STREAM_MAGIC, STRING, SHAPE, EVENT, FrameDecoder, iter_frames
+
+
+INDEX_SUFFIX = ".idx"
+STRINGS_SUFFIX = ".strings.idx"
+SHAPES_SUFFIX = ".shapes.idx"
+HEADER = struct.Struct("<4s4xQ")   # magic, inode of the indexed file (16 bytes, keeps offsets aligned)
+JSONL_MAGIC = b"JLX1"
+FRAME_MAGIC = b"FRX1"
+
+
+def _map(path):
+    # read-only map of path and its inode; the map stays valid after the file is closed, renamed or unlinked
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        return (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""), stat.st_ino
+
+
+class OffsetIndex:
+    # a sidecar array of byte offsets: the stored ones stay memory-mapped, new ones are appended on save
+    def __init__(self, path, inode, magic):
+        self.path = Path(path)
+        self.inode = inode
+        self.magic = magic
+        self.map = None
+        self.stored = self._load()
+        self.new = array('Q')
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return array('Q')
+        magic, inode = HEADER.unpack(index_map[:HEADER.size]) if len(index_map) >= HEADER.size else (b"", 0)
+        if magic != self.magic or inode != self.inode:
+            index_map.close()
+            return array('Q')
+        self.map = index_map
+        count = (len(index_map) - HEADER.size) // 8
+        return memoryview(index_map)[HEADER.size:HEADER.size + count * 8].cast('Q')
+
+    @property
+    def loaded(self):
+        return self.map is not None
+
+    def discard(self):
+        # drops the stored offsets (an index of an older or rewritten file); save() writes a fresh sidecar
+        self.close()
+        self.stored = array('Q')
+        self.new = array('Q')
+
+    def append(self, offset):
+        self.new.append(offset)
+
+    def __len__(self):
+        return len(self.stored) + len(self.new)
+
+    def __getitem__(self, i):
+        n = len(self.stored)
+        if i < 0:
+            i += n + len(self.new)
+        return self.stored[i] if i < n else self.new[i - n]
+
+    def save(self):
+        try:
+            if self.map is not None:
+                if self.new:
+                    with open(self.path, 'ab') as f:
+                        self.new.tofile(f)
+            elif self.new:
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp, 'wb') as f:
+                    f.write(HEADER.pack(self.magic, self.inode))
+                    self.new.tofile(f)
+                os.replace(tmp, self.path)
+        except OSError:
+            pass   # read-only location: the index is rebuilt in memory next time
+
+    def close(self):
+        if self.map is not None:
+            self.stored.release()
+            self.map.close()
+            self.map = None
+
+
+class _Reader:
+    # record access shared by the readers; subclasses define __len__, record(i) and close()
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record(j) for j in range(*i.indices(len(self)))]
+        return self.record(i)
+
+    def records(self, start=0, stop=None):
+        for i in range(start, len(self) if stop is None else min(stop, len(self))):
+            record = self.record(i)
+            if record is not None:
+                yield record
+
+    def tail(self, n):
+        return list(self.records(max(0, len(self) - n)))
+
+    def bisect(self, value, key="timestamp"):
+        # first record whose key is >= value (records must be ordered by key)
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if (self.record(mid) or {}).get(key, "") < value:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def between(self, since=None, until=None, key="timestamp"):
+        start = self.bisect(since, key) if since is not None else 0
+        stop = self.bisect(until, key) if until is not None else len(self)
+        return list(self.records(start, stop))
+
+
+class JsonlReader(_Reader):
+    def __init__(self, path, write_index=True):
+        self.path = Path(path)
+        self.map, inode = _map(self.path)
+        # offsets[i] is where line i starts; the last offset is the end of the last complete line
+        self.offsets = OffsetIndex(self.path.with_name(self.path.name + INDEX_SUFFIX), inode, JSONL_MAGIC)
+        end = self.offsets[-1] if len(self.offsets) else None
+        if end is None or self.offsets[0] != 0 or end > len(self.map) or (end and self.map[end - 1:end] != b"\n"):
+            self.offsets.discard()
+            self.offsets.append(0)
+        self._scan()
+        if write_index:
+            self.offsets.save()
+
+    def _scan(self):
+        pos = self.offsets[-1]
+        find = self.map.find
+        while True:
+            end = find(b"\n", pos)
+            if end < 0:
+                return
+            pos = end + 1
+            self.offsets.append(pos)
+
+    def close(self):
+        self.offsets.close()
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.map[self.offsets[i]:self.offsets[i + 1]]
+
+    def record(self, i):
+        line = self.line(i)
+        return json.loads(line) if line.strip() else None
+
+
+class _Definitions(dict):
+    # id -> string, or shape id -> (field names, positions), unpacked from the stream on first use
+    def __init__(self, data, offsets):
+        super().__init__()
+        self.data = data
+        self.offsets = offsets
+
+    def __missing__(self, key):
+        _, payload, _ = next(iter_frames(self.data, self.offsets[key]))
+        _, *definition = msgpack.unpackb(payload)
+        value = self[key] = definition[0] if len(definition) == 1 else tuple(definition)
+        return value
+
+
+class FrameReader(_Reader):
+    def __init__(self, path, write_index=True):
+        self.path = Path(path)
+        self.map, inode = _map(self.path)
+        if len(self.map) >= len(STREAM_MAGIC) and self.map[:len(STREAM_MAGIC)] != STREAM_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not an event stream")
+
+        def sidecar(suffix):
+            return OffsetIndex(self.path.with_name(self.path.name + suffix), inode, FRAME_MAGIC)
+
+        self.events = sidecar(INDEX_SUFFIX)
+        self.strings = sidecar(STRINGS_SUFFIX)
+        self.shapes = sidecar(SHAPES_SUFFIX)
+        if not self._valid():
+            for index in (self.events, self.strings, self.shapes):
+                index.discard()
+        self._scan()
+        if write_index:
+            # definitions before events: a crash between the writes only rescans definitions
+            for index in (self.strings, self.shapes, self.events):
+                index.save()
+        self.decoder = FrameDecoder()
+        self.decoder.table = _Definitions(self.map, self.strings)
+        self.decoder.shapes = _Definitions(self.map, self.shapes)
+
+    def _frame(self, offset):
+        # (kind, payload, end) of the complete frame at offset, or None
+        try:
+            return next(iter_frames(self.map, offset), None)
+        except ValueError:
+            return None
+
+    def _valid(self):
+        # all three sidecars belong to this file, and each one's last offset is a frame of its kind
+        for index, kind in ((self.events, EVENT), (self.strings, STRING), (self.shapes, SHAPE)):
+            if not index.loaded:
+                return False
+            if len(index):
+                frame = self._frame(index[-1])
+                if frame is None or frame[0] != kind:
+                    return False
+        return True
+
+    def _scan(self):
+        # indexes the frames after the last indexed event; definitions already indexed are skipped by id
+        pos = self._frame(self.events[-1])[2] if len(self.events) else len(STREAM_MAGIC)
+        for kind, payload, end in iter_frames(self.map, pos):
+            if kind == EVENT:
+                self.events.append(pos)
+            elif kind is None:
+                raise ValueError(f"{self.path}: concatenated streams are not indexed")
+            elif kind in (STRING, SHAPE):
+                index = self.strings if kind == STRING else self.shapes
+                if msgpack.unpackb(payload)[0] == len(index):
+                    index.append(pos)
+            pos = end
+
+    def close(self):
+        for name in ("events", "strings", "shapes"):
+            if hasattr(self, name):
+                getattr(self, name).close()
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.decoder.event(self._frame(self.events[i])[1])
+
+    def seq(self, i):
+        # event i's sequence number, without unpacking the rest of it
+        return msgpack.unpackb(self._frame(self.events[i])[1])[0]
+
+    def position(self, seq):
+        # index of the first event with a sequence number >= seq: one lookup when
+        # sequence numbers are contiguous (a journal segment), a binary search otherwise
+        if not len(self) or self.seq(0) is None:
+            return 0
+        guess = seq - self.seq(0)
+        if 0 <= guess < len(self) and self.seq(guess) == seq:
+            return guess
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self.seq(mid) < seq:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+
+def open_reader(path, write_index=True):
+    # a FrameReader for a binary event stream, a JsonlReader for anything else
+    with open(path, 'rb') as f:
+        head = f.read(len(STREAM_MAGIC))
+    if head.startswith(b"\x1f\x8b"):
+        raise ValueError(f"{path} is gzip-compressed and cannot be memory-mapped")
+    reader = FrameReader if head == STREAM_MAGIC else JsonlReader
+    return reader(path, write_index)
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, options = parse_args(sys.argv[1:])
+    if len(args) != 1:
+        print("Usage: python journal_reader.py <file.jsonl|file.xpev> [--tail=N] [--from=<n>] [--to=<n>] "
+              "[--since=<iso>] [--until=<iso>] [--key=timestamp]", flush=True)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        reader = open_reader(args[0])
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", flush=True)
+        sys.exit(1)
+    with reader:
+        if options.get('tail'):
+            records = reader.tail(int(options['tail']))
+        elif options.get('since') or options.get('until'):
+            records = reader.between(options.get('since') or None, options.get('until') or None,
+                                     options.get('key') or "timestamp")
+        else:
+            records = list(reader.records(int(options.get('from', 0)), int(options['to']) if options.get('to') else None))
+        for record in records:
+            print(json.dumps(record), flush=True)
+        print(f"{len(records)} of {len(reader)} records in {(time.perf_counter() - start) * 1000:.1f} ms",
+              file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# lean_mode.py - Request routing for lean recording sessions
+# Blocks heavy resource types and third-party trackers/widgets while recording,
+# but never blocks the application's own documents and API calls.
+
+import json
+from fnmatch import fnmatch
+from urllib.parse import urlparse
+
+
+DEFAULT_LEAN_CONFIG = {
+    # resource types (Playwright request.resource_type) blocked everywhere
+    "block_resource_types": ["image", "media", "font"],
+    # third-party analytics, ads and chat widgets
+    "block_url_patterns": [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*connect.facebook.net*",
+        "*hotjar.com*",
+        "*clarity.ms*",
+        "*segment.io*",
+        "*mixpanel.com*",
+        "*intercom.io*",
+        "*intercomcdn.com*",
+        "*tawk.to*",
+        "*zdassets.com*",
+        "*crisp.chat*",
+        "*freshchat.com*",
+    ],
+    # always allowed, checked before any block rule
+    "allow_url_patterns": [],
+    # these are never blocked when they go to the application's own origin
+    "allow_resource_types": ["document", "xhr", "fetch", "websocket", "eventsource"],
+}
+
+# rough average transfer sizes, used to estimate bytes saved by blocked requests
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 30_000,
+    "script": 60_000,
+    "stylesheet": 20_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+def load_lean_config(path=None):
+    config = {key: list(value) for key, value in DEFAULT_LEAN_CONFIG.items()}
+    if path:
+        with open(path) as f:
+            config.update(json.load(f))
+    return config
+
+
+class LeanRouter:
+    def __init__(self, app_url, config=None):
+        self.config = config or load_lean_config()
+        self.app_origin = origin_of(app_url)
+        self.stats = {
+            "requests": 0,
+            "allowed": 0,
+            "blocked": 0,
+            "blocked_by_type": {},
+            "blocked_by_pattern": 0,
+            "estimated_bytes_saved": 0,
+        }
+
+    def decide(self, request_url, resource_type):
+        # returns (blocked, reason)
+        config = self.config
+        if origin_of(request_url) == self.app_origin and resource_type in config["allow_resource_types"]:
+            return False, "app"
+        if any(fnmatch(request_url, pattern) for pattern in config["allow_url_patterns"]):
+            return False, "allowlist"
+        if resource_type in config["block_resource_types"]:
+            return True, "type"
+        if any(fnmatch(request_url, pattern) for pattern in config["block_url_patterns"]):
+            return True, "pattern"
+        return False, "default"
+
+    # Playwright route handler: page.route("**/*", router.handle)
+    def handle(self, route):
+        request = route.request
+        blocked, reason = self.decide(request.url, request.resource_type)
+        self.stats["requests"] += 1
+        if blocked:
+            self.stats["blocked"] += 1
+            by_type = self.stats["blocked_by_type"]
+            by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+            if reason == "pattern":
+                self.stats["blocked_by_pattern"] += 1
+            self.stats["estimated_bytes_saved"] += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+            route.abort("blockedbyclient")
+        else:
+            self.stats["allowed"] += 1
+            route.continue_()
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['requests']} requests, {s['blocked']} blocked, "
+                f"~{s['estimated_bytes_saved'] / 1024:.0f} KB saved (estimated)")
+
+
+def origin_of(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
@@ -0,0 +1,377 @@
+# live_journal.py - Rotating, compressed journal for the recorder -> Live View stream
+# A journal is a directory: records are appended (with a sequence number) to
+# active.xpev as binary frames (event_stream.py: msgpack, interned strings,
+# integer timestamps, a CRC per frame), which is sealed into a gzip segment once
+# it passes a size or age limit. Sealed segments are written as independent gzip
+# members of FRAME_RECORDS records each (every member a self-contained stream),
+# and index.json keeps every segment's and member's first sequence number,
+# timestamp and byte offset, so readers can start at a sequence number or
+# timestamp without decompressing what is before it. The active segment is
+# memory-mapped with a persisted seq -> offset index (journal_reader.FrameReader),
+# so reads of it seek straight to the requested sequence number or timestamp.
+# Every sealed segment also records the journal's click/input/ungrouped counts up
+# to its end, and active.summary.json keeps them up to date for the active
+# segment, so session-wide totals never read the records themselves.
+# Old journals are archived (sealed and moved to .live_archive/) instead of deleted.
+#
+# Usage: python live_journal.py info <journal>
+#        python live_journal.py cat <journal> [--from-seq=N] [--to-seq=N] [--since=<iso>] [--until=<iso>]
+#        python live_journal.py seal|archive <journal>
+
+import os
+import sys
+import gzip
+import json
+import shutil
+import time
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+
+from event_stream import StreamWriter, encode_stream, iter_records
+from journal_reader import INDEX_SUFFIX, STRINGS_SUFFIX, SHAPES_SUFFIX, FrameReader
+
+try:
+    import fcntl
+except ImportError:   # Windows: appends from the recorder and Live View are not serialized
+    fcntl = None
+
+
+ACTIVE_FILE = "active.xpev"
+INDEX_FILE = "index.json"
+SUMMARY_FILE = "active.summary.json"   # counts up to the end of the active segment
+LOCK_FILE = ".lock"
+ARCHIVE_DIR = ".live_archive"
+SEGMENT_BYTES = 4 * 1024 * 1024   # seal the active segment past this size...
+SEGMENT_SECONDS = 15 * 60         # ...or once its first record is this old
+FRAME_RECORDS = 256               # records per gzip member in a sealed segment
+KEEP_ARCHIVES = 20
+EMPTY_SUMMARY = {"records": 0, "entries": 0, "clicks": 0, "inputs": 0, "ungrouped": 0}
+
+
+class LiveJournal:
+    def __init__(self, path, segment_bytes=None, segment_seconds=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.active_path = self.path / ACTIVE_FILE
+        self.index_path = self.path / INDEX_FILE
+        # keeps the active file's string table and last seq between appends
+        self.writer = StreamWriter(self.active_path)
+        # limits given here are saved, so every process appending to the journal rotates alike
+        if segment_bytes or segment_seconds:
+            with self._lock():
+                index = self._load_index()
+                index["segment_bytes"] = segment_bytes or index["segment_bytes"]
+                index["segment_seconds"] = segment_seconds or index["segment_seconds"]
+                self._save_index(index)
+
+    @contextmanager
+    def _lock(self):
+        with open(self.path / LOCK_FILE, 'w') as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                index = json.load(f)
+        else:
+            index = {"segment_bytes": SEGMENT_BYTES, "segment_seconds": SEGMENT_SECONDS, "segments": []}
+        # an active file left behind by an interrupted seal is already in a segment
+        self.writer.sync()
+        first = self.writer.first
+        if first and index["segments"] and first[0] <= index["segments"][-1]["last_seq"]:
+            self._remove_active()
+            self.writer.sync()
+        return index
+
+    def _remove_active(self):
+        # the active file and everything derived from it
+        self.active_path.unlink(missing_ok=True)
+        for suffix in (INDEX_SUFFIX, STRINGS_SUFFIX, SHAPES_SUFFIX):
+            self.active_path.with_name(ACTIVE_FILE + suffix).unlink(missing_ok=True)
+        (self.path / SUMMARY_FILE).unlink(missing_ok=True)
+
+    def _save_index(self, index):
+        tmp = self.index_path.with_name(f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+    def append(self, record):
+        # returns the record's sequence number
+        with self._lock():
+            index = self._load_index()
+            seq = self._next_seq(index)
+            record = {"seq": seq, **record}
+            record.setdefault("timestamp", datetime.now().isoformat())
+            self.writer.append(record)
+            if self._rotation_due(index):
+                self._seal(index)
+        return seq
+
+    def _next_seq(self, index):
+        # the writer is synced by _load_index
+        if self.writer.last_seq is not None:
+            return self.writer.last_seq + 1
+        return index["segments"][-1]["last_seq"] + 1 if index["segments"] else 0
+
+    def next_seq(self):
+        with self._lock():
+            return self._next_seq(self._load_index())
+
+    def _rotation_due(self, index):
+        if self.writer.size >= index["segment_bytes"]:
+            return True
+        opened = datetime.fromisoformat(self.writer.first[1])
+        return (datetime.now(opened.tzinfo) - opened).total_seconds() >= index["segment_seconds"]
+
+    def seal(self):
+        with self._lock():
+            index = self._load_index()
+            if self.writer.first:
+                self._seal(index)
+
+    def _seal(self, index):
+        with open(self.active_path, 'rb') as f:
+            records = list(iter_records(f))
+        name = f"seg-{records[0]['seq']:08d}.xpev.gz"
+        tmp = self.path / f"{name}.tmp"
+        frames = []
+        with open(tmp, 'wb') as out:
+            for i in range(0, len(records), FRAME_RECORDS):
+                frames.append([records[i]["seq"], records[i]["timestamp"], out.tell()])
+                # each member has its own string table, so reads can start at any member
+                out.write(gzip.compress(encode_stream(records[i:i + FRAME_RECORDS])))
+            compressed = out.tell()
+        os.replace(tmp, self.path / name)
+        previous = self._segment_summary(index, len(index["segments"]) - 1)
+        index["segments"].append({
+            "file": name,
+            "first_seq": records[0]["seq"], "last_seq": records[-1]["seq"],
+            "first_ts": records[0]["timestamp"], "last_ts": records[-1]["timestamp"],
+            "records": len(records), "bytes": self.writer.size, "compressed_bytes": compressed,
+            "frames": frames, "summary": summarize(records, previous),
+        })
+        # segment, then index, then the active file: a crash in between never loses records
+        self._save_index(index)
+        self._remove_active()
+        self.writer.sync()
+
+    def _segment_summary(self, index, i):
+        # counts up to the end of segment i; segments sealed before summaries existed are read once
+        segments = index["segments"][:i + 1]
+        missing = [s for s in segments if "summary" not in s]
+        summary = dict(EMPTY_SUMMARY)
+        for segment in segments:
+            if "summary" not in segment:
+                with open(self.path / segment["file"], 'rb') as f:
+                    segment["summary"] = summarize(iter_records(gzip.GzipFile(fileobj=f)), summary)
+            summary = segment["summary"]
+        if missing:
+            self._save_index(index)
+        return summary
+
+    def summary(self):
+        # session-wide record/entry/click/input/ungrouped counts
+        with self._lock():
+            index = self._load_index()
+            sealed = self._segment_summary(index, len(index["segments"]) - 1)
+            if not self.active_path.exists():
+                return sealed
+            summary_path = self.path / SUMMARY_FILE
+            try:
+                cached = json.loads(summary_path.read_text())
+            except (OSError, ValueError):
+                cached = {}
+            with FrameReader(self.active_path) as reader:
+                # a cache of an older active file is recomputed
+                if cached.get("inode") != reader.events.inode or cached.get("events", 0) > len(reader):
+                    cached = {"events": 0, "summary": sealed}
+                if cached["events"] < len(reader):
+                    cached = {"inode": reader.events.inode, "events": len(reader),
+                              "summary": summarize(reader.records(cached["events"]), cached["summary"])}
+                    tmp = summary_path.with_name(f"{SUMMARY_FILE}.{os.getpid()}.tmp")
+                    tmp.write_text(json.dumps(cached))
+                    os.replace(tmp, summary_path)
+            return cached["summary"]
+
+    def segments(self):
+        with self._lock():
+            return self._load_index()["segments"]
+
+    def read(self, from_seq=None, to_seq=None, since=None, until=None):
+        # records with from_seq <= seq < to_seq and since <= timestamp < until, in order
+        with self._lock():
+            index = self._load_index()
+            # mapped under the lock: later appends and seals do not change what this read sees
+            active = FrameReader(self.active_path) if self.active_path.exists() else None
+        try:
+            yield from self._read(index, active, from_seq, to_seq, since, until)
+        finally:
+            if active:
+                active.close()
+
+    def _read(self, index, active, from_seq, to_seq, since, until):
+        def wanted(record):
+            return ((from_seq is None or record["seq"] >= from_seq) and
+                    (since is None or record["timestamp"] >= since))
+
+        def past_end(record):
+            return ((to_seq is not None and record["seq"] >= to_seq) or
+                    (until is not None and record["timestamp"] >= until))
+
+        for segment in index["segments"]:
+            if ((from_seq is not None and segment["last_seq"] < from_seq) or
+                    (since is not None and segment["last_ts"] < since)):
+                continue
+            if ((to_seq is not None and segment["first_seq"] >= to_seq) or
+                    (until is not None and segment["first_ts"] >= until)):
+                return
+            # start at the last member that begins at or before the requested position
+            offset = 0
+            for seq, ts, frame_offset in segment["frames"] if from_seq is not None or since is not None else []:
+                if (from_seq is None or seq <= from_seq) and (since is None or ts <= since):
+                    offset = frame_offset
+            with open(self.path / segment["file"], 'rb') as f:
+                f.seek(offset)
+                for record in iter_records(gzip.GzipFile(fileobj=f)):
+                    if past_end(record):
+                        return
+                    if wanted(record):
+                        yield record
+
+        if active is None:
+            return
+        start = active.position(from_seq) if from_seq is not None else 0
+        if since is not None:
+            start = max(start, active.bisect(since))
+        for record in active.records(start):
+            if past_end(record):
+                return
+            if wanted(record):
+                yield record
+
+    def tail(self, n):
+        # the last n records
+        return list(self.read(from_seq=max(0, self.next_seq() - n)))
+
+
+def summarize(records, summary=None):
+    # counts of records and xpath entries, continuing the counts of the records before them;
+    # a group marker names every entry before it, so only entries after the last marker are ungrouped
+    summary = dict(summary or EMPTY_SUMMARY)
+    for record in records:
+        summary["records"] += 1
+        kind = record.get("type")
+        if kind == "xpath":
+            summary["entries"] += 1
+            summary["clicks" if record.get("action") == "click" else "inputs"] += 1
+            summary["ungrouped"] += 1
+        elif kind == "group":
+            summary["ungrouped"] = 0
+    return summary
+
+
+def assign_groups(records):
+    # xpath records with the Live View's groups applied: a group marker names every
+    # entry since the previous marker, and a marker right after another one renames it
+    entries, start, previous_start, previous = [], 0, 0, None
+    for record in records:
+        kind = record.get("type")
+        if kind == "xpath":
+            entries.append({**record, "group": ""})
+        elif kind == "group":
+            if previous == "group":
+                start = previous_start
+            for entry in entries[start:]:
+                entry["group"] = record["name"]
+            previous_start, start = start, len(entries)
+        else:
+            continue
+        previous = kind
+    return entries
+
+
+def archive_journal(path, keep=KEEP_ARCHIVES):
+    # seals and moves the journal into .live_archive/ (next to it), keeping the newest `keep`
+    path = Path(path)
+    if not path.exists():
+        return None
+    archive_dir = path.parent / ARCHIVE_DIR
+    archive_dir.mkdir(exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if path.is_dir():
+        journal = LiveJournal(path)
+        journal.seal()
+        if not journal.segments():   # nothing was ever recorded
+            shutil.rmtree(path)
+            return None
+        (path / LOCK_FILE).unlink(missing_ok=True)
+        target = archive_dir / f"{path.name.lstrip('.')}-{stamp}"
+        shutil.move(str(path), target)
+    else:
+        # a plain JSONL capture file from before journals
+        target = archive_dir / f"{path.name.lstrip('.')}-{stamp}.gz"
+        with open(path, 'rb') as src, gzip.open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        path.unlink()
+
+    archives = sorted(archive_dir.iterdir(), key=lambda p: p.stat().st_mtime)
+    for old in archives[:-keep] if keep else []:
+        if old.is_dir():
+            shutil.rmtree(old)
+        else:
+            old.unlink()
+    return target
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, options = parse_args(sys.argv[1:])
+    command = args[0] if args else None
+    if len(args) != 2 or command not in ("info", "cat", "seal", "archive"):
+        print("Usage: python live_journal.py info <journal>", flush=True)
+        print("       python live_journal.py cat <journal> [--from-seq=N] [--to-seq=N] [--since=<iso>] [--until=<iso>]", flush=True)
+        print("       python live_journal.py seal|archive <journal>", flush=True)
+        sys.exit(1)
+    if not Path(args[1]).exists():
+        print(f"ERROR: {args[1]} not found", flush=True)
+        sys.exit(1)
+
+    if command == "archive":
+        print(f"Archived: {archive_journal(args[1])}", flush=True)
+        return
+    journal = LiveJournal(args[1])
+    if command == "seal":
+        journal.seal()
+        print(f"Sealed: {journal.path}", flush=True)
+    elif command == "info":
+        for s in journal.segments():
+            ratio = s["compressed_bytes"] / s["bytes"] if s["bytes"] else 0
+            print(f"{s['file']} | seq {s['first_seq']}-{s['last_seq']} | {s['first_ts'][:19]} .. {s['last_ts'][:19]} | "
+                  f"{s['records']} records | {s['bytes']} -> {s['compressed_bytes']} bytes ({ratio:.0%})", flush=True)
+        active = journal.active_path.stat().st_size if journal.active_path.exists() else 0
+        print(f"active: {active} bytes", flush=True)
+        summary = journal.summary()
+        print(f"totals: {summary['records']} records | {summary['entries']} entries | {summary['clicks']} clicks | "
+              f"{summary['inputs']} inputs | {summary['ungrouped']} ungrouped", flush=True)
+    else:
+        bounds = {key.replace('-', '_'): options.get(key) or None for key in ("from-seq", "to-seq", "since", "until")}
+        for key in ("from_seq", "to_seq"):
+            bounds[key] = int(bounds[key]) if bounds[key] else None
+        start = time.perf_counter()
+        count = 0
+        for record in journal.read(**bounds):
+            print(json.dumps(record), flush=True)
+            count += 1
+        print(f"{count} records in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    main()
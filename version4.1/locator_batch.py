@@ -0,0 +1,41 @@
+# locator_batch.py - Resolve many XPaths in one in-page evaluate
+# One round-trip per page instead of one locator.count() per locator.
+
+import time
+
+
+# arg: list of xpaths -> list of {count, ms, error}
+BATCH_RESOLVE_JS = """
+(xpaths) => xpaths.map((xpath) => {
+    const start = performance.now();
+    try {
+        const result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        return { count: result.snapshotLength, ms: performance.now() - start, error: null };
+    } catch (e) {
+        return { count: 0, ms: performance.now() - start, error: String(e.message || e) };
+    }
+})
+"""
+
+
+def resolve_batch(page, xpaths):
+    # returns (results, round_trip_ms)
+    start = time.perf_counter()
+    results = page.evaluate(BATCH_RESOLVE_JS, list(xpaths))
+    return results, (time.perf_counter() - start) * 1000
+
+
+async def resolve_batch_async(page, xpaths):
+    start = time.perf_counter()
+    results = await page.evaluate(BATCH_RESOLVE_JS, list(xpaths))
+    return results, (time.perf_counter() - start) * 1000
+
+
+def match_status(count, error=None):
+    if error:
+        return "invalid"
+    if count == 1:
+        return "unique"
+    if count == 0:
+        return "missing"
+    return "ambiguous"
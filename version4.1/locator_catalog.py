@@ -0,0 +1,245 @@
+# locator_catalog.py - Global deduplicated catalog of locators across sessions
+# Every captured XPath is canonicalized (double quotes, no cosmetic whitespace,
+# "and"-terms inside predicates sorted) and keyed by the hash of that form, so
+# //*[@id='x'] and //*[ @id = "x" ] are one catalog entry. Sessions are merged
+# incrementally; each locator keeps first-seen/last-seen/seen-count, and an
+# app -> group -> label index answers "what is the current locator for X" with
+# plain dict lookups.
+#
+# Usage: python locator_catalog.py merge <session files or globs...> [--catalog=locator_catalog.json]
+#        python locator_catalog.py merge --db=<sessions.db> [--catalog=...]
+#        python locator_catalog.py lookup <app> <label> [--group=<group>] [--catalog=...]
+#        python locator_catalog.py stats [--catalog=...]
+
+import re
+import sys
+import glob
+import json
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+from session_io import load_session
+from session_store import SessionStore, app_of
+
+
+DEFAULT_CATALOG = str(Path(__file__).parent / "locator_catalog.json")
+LITERAL_RE = re.compile(r'"[^"]*"|\'[^\']*\'')
+# whitespace next to these never matters
+TIGHT_RE = re.compile(r"\s*([\[\]()=,/|]|!=|<=|>=)\s*")
+# keyword operators the tightening glued to ")" / "]" / a literal / "("
+OPERATOR_RE = re.compile(r"(?<=[\])\x00 ])(and|or|div|mod)(?= |\()")
+
+
+def canonicalize(xpath):
+    literals = []
+
+    def stash(match):
+        text = match.group(0)[1:-1]
+        literals.append(f'"{text}"' if '"' not in text else f"'{text}'")
+        return f"\x00{len(literals) - 1}\x00"
+
+    def restore(text):
+        return re.sub(r"\x00(\d+)\x00", lambda m: literals[int(m.group(1))], text)
+
+    code = LITERAL_RE.sub(stash, xpath.strip())
+    code = re.sub(r"\s+", " ", code)
+    code = TIGHT_RE.sub(r"\1", code)
+    # keep operators separated: f(x) and @a, @a and (@b or @c)
+    code = re.sub(r" +", " ", OPERATOR_RE.sub(r" \1 ", code))
+    return restore(_sort_predicates(code, restore))
+
+
+def _split_top(expr, sep):
+    # splits on sep outside any brackets/parens
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(expr):
+        ch = expr[i]
+        if ch in "[(":
+            depth += 1
+        elif ch in "])":
+            depth -= 1
+        elif depth == 0 and expr.startswith(sep, i):
+            parts.append(expr[start:i])
+            i += len(sep)
+            start = i
+            continue
+        i += 1
+    parts.append(expr[start:])
+    return parts
+
+
+def _sort_predicates(code, restore):
+    out, i = [], 0
+    while i < len(code):
+        if code[i] != "[":
+            out.append(code[i])
+            i += 1
+            continue
+        depth, j = 1, i + 1
+        while j < len(code) and depth:
+            depth += {"[": 1, "]": -1}.get(code[j], 0)
+            j += 1
+        inner = _sort_predicates(code[i + 1:j - 1], restore)
+        # "and" is commutative; mixed with "or" the order is left alone
+        if len(_split_top(inner, " or ")) == 1:
+            inner = " and ".join(sorted(_split_top(inner, " and "), key=restore))
+        out.append(f"[{inner}]")
+        i = j
+    return "".join(out)
+
+
+def locator_hash(xpath):
+    return hashlib.sha1(canonicalize(xpath).encode('utf-8')).hexdigest()[:16]
+
+
+def session_key(url, captured_at, entries):
+    # identifies a session's content, so merging the same session twice is a no-op
+    digest = hashlib.sha1(f"{url}|{captured_at}|{len(entries)}".encode('utf-8'))
+    for entry in entries:
+        digest.update(f"{entry['xpath']}|{entry['action']}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class LocatorCatalog:
+    def __init__(self, path=DEFAULT_CATALOG):
+        self.path = Path(path)
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+        else:
+            data = {"locators": {}, "index": {}, "sessions": []}
+        self.locators = data["locators"]   # hash -> locator record
+        self.index = data["index"]         # app -> group -> label -> hash
+        self.sessions = set(data["sessions"])
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump({"updated_at": datetime.now().isoformat(), "locators": self.locators,
+                       "index": self.index, "sessions": sorted(self.sessions)}, f, indent=1)
+        tmp.replace(self.path)
+
+    def merge_session(self, url, entries, captured_at=None):
+        # returns (new locators, updated locators), or None if this session was merged before
+        captured_at = captured_at or datetime.now().isoformat()
+        key = session_key(url, captured_at, entries)
+        if key in self.sessions:
+            return None
+        self.sessions.add(key)
+
+        new = updated = 0
+        counted = set()
+        for entry in entries:
+            if not entry["xpath"]:
+                continue
+            digest = locator_hash(entry["xpath"])
+            app = app_of(entry.get("page") or url)
+            group = entry.get("group") or ""
+            seen_at = entry.get("timestamp") or captured_at
+
+            record = self.locators.get(digest)
+            if record is None:
+                record = self.locators[digest] = {
+                    "canonical": canonicalize(entry["xpath"]),
+                    "xpath": entry["xpath"],
+                    "strategy": entry.get("strategy", ""),
+                    "first_seen": seen_at,
+                    "last_seen": seen_at,
+                    "seen_count": 0,
+                    "apps": [],
+                    "labels": [],
+                }
+                new += 1
+            elif digest not in counted:
+                updated += 1
+            if digest not in counted:
+                record["seen_count"] += 1   # once per session
+                counted.add(digest)
+            record["first_seen"] = min(record["first_seen"], seen_at)
+            if seen_at >= record["last_seen"]:
+                record["last_seen"] = seen_at
+                record["xpath"] = entry["xpath"]
+            if app not in record["apps"]:
+                record["apps"].append(app)
+            if entry["label"] and entry["label"] not in record["labels"]:
+                record["labels"].append(entry["label"])
+
+            # the most recently seen locator becomes the current one for this element
+            labels = self.index.setdefault(app, {}).setdefault(group, {})
+            current = labels.get(entry["label"])
+            if current is None or self.locators[current]["last_seen"] <= seen_at:
+                labels[entry["label"]] = digest
+        return new, updated
+
+    def merge_file(self, path):
+        session = load_session(path)
+        return self.merge_session(session["url"], session["xpaths"], session["captured_at"] or None)
+
+    def lookup(self, app, label, group=None):
+        # current locator record for label on app (in group, or in any group)
+        groups = self.index.get(app, {})
+        if group is not None:
+            digest = groups.get(group, {}).get(label)
+            return self.locators[digest] if digest else None
+        found = [self.locators[labels[label]] for labels in groups.values() if label in labels]
+        return max(found, key=lambda r: r["last_seen"]) if found else None
+
+    def stats(self):
+        return {
+            "locators": len(self.locators),
+            "sessions": len(self.sessions),
+            "apps": len(self.index),
+            "elements": sum(len(labels) for groups in self.index.values() for labels in groups.values()),
+        }
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, options = parse_args(sys.argv[1:])
+    catalog = LocatorCatalog(options.get('catalog') or DEFAULT_CATALOG)
+    command = args[0] if args else None
+
+    if command == "merge" and (len(args) > 1 or options.get('db')):
+        merged = skipped = new = 0
+        if options.get('db'):
+            store = SessionStore(options['db'])
+            sources = [(s["url"], store.session_data(s["id"])["xpaths"], s["captured_at"])
+                       for s in store.list_sessions(limit=-1)]
+            store.close()
+        else:
+            sources = []
+            for path in (p for pattern in args[1:] for p in sorted(glob.glob(pattern, recursive=True))):
+                try:
+                    session = load_session(path)
+                    sources.append((session["url"], session["xpaths"], session["captured_at"] or None))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"ERROR: {path}: {e}", flush=True)
+        for url, entries, captured_at in sources:
+            result = catalog.merge_session(url, entries, captured_at)
+            if result is None:
+                skipped += 1
+            else:
+                merged += 1
+                new += result[0]
+        catalog.save()
+        print(f"Merged: {merged} sessions ({skipped} already merged) | New locators: {new}", flush=True)
+        print(f"Saved: {catalog.path}", flush=True)
+    elif command == "lookup" and len(args) == 3:
+        record = catalog.lookup(args[1], args[2], options['group'] if isinstance(options.get('group'), str) else None)
+        if not record:
+            print(f"No locator for '{args[2]}' on {args[1]}", flush=True)
+            sys.exit(1)
+        print(json.dumps(record, indent=2), flush=True)
+    elif command == "stats":
+        print(" | ".join(f"{k}: {v}" for k, v in catalog.stats().items()), flush=True)
+    else:
+        print("Usage: python locator_catalog.py merge <session files or globs...> [--catalog=locator_catalog.json]", flush=True)
+        print("       python locator_catalog.py merge --db=<sessions.db> [--catalog=...]", flush=True)
+        print("       python locator_catalog.py lookup <app> <label> [--group=<group>] [--catalog=...]", flush=True)
+        print("       python locator_catalog.py stats [--catalog=...]", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# offline_validate.py - Re-validate saved locators against stored HTML, no browser needed
+# Evaluates XPaths with lxml across a process pool, one task per snapshot.
+#
+# Usage: python offline_validate.py <session.json> [--snapshots=<dir>] [--html=<glob>]
+#            [--workers=N] [--out=<report.json>]
+#
+# --snapshots: a recorder snapshot store (defaults to the session's snapshots_dir);
+#              each locator is checked against the snapshot taken at its step
+# --html:      plain HTML files; every locator is checked against every file
+
+import os
+import sys
+import csv
+import glob
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree, html as lxml_html
+
+from dom_snapshots import iter_snapshots
+from locator_batch import match_status
+from recorder import parse_args
+from session_io import load_session, unique_locators
+
+
+_compiled = {}   # per-process XPath cache
+
+
+def _compile(xpath):
+    if xpath not in _compiled:
+        try:
+            _compiled[xpath] = etree.XPath(xpath)
+        except etree.XPathSyntaxError as e:
+            _compiled[xpath] = e
+    return _compiled[xpath]
+
+
+# runs in a worker process
+def evaluate_snapshot(source, html_text, xpaths):
+    if html_text is None:
+        with open(source, 'rb') as f:
+            html_text = f.read()
+    start = time.perf_counter()
+    tree = lxml_html.fromstring(html_text).getroottree()
+    parse_ms = (time.perf_counter() - start) * 1000
+
+    results = {}
+    start = time.perf_counter()
+    for xpath in xpaths:
+        compiled = _compile(xpath)
+        if isinstance(compiled, Exception):
+            results[xpath] = {"count": 0, "error": str(compiled)}
+            continue
+        try:
+            found = compiled(tree)
+            count = len(found) if isinstance(found, list) else int(bool(found))
+            results[xpath] = {"count": count, "error": None}
+        except etree.XPathError as e:
+            results[xpath] = {"count": 0, "error": str(e)}
+    return {"source": source, "parse_ms": parse_ms,
+            "eval_ms": (time.perf_counter() - start) * 1000, "results": results}
+
+
+def snapshot_tasks(session, snapshots_dir):
+    # each locator goes to the snapshot of the step it was captured at (or the latest before it)
+    locators = unique_locators(session["xpaths"])
+    snapshots = list(iter_snapshots(snapshots_dir))
+    steps = sorted(entry["step"] for entry, _ in snapshots)
+    by_step = {entry["step"]: html for entry, html in snapshots}
+
+    assigned = {}
+    for loc in locators:
+        step = loc.get("step")
+        candidates = [s for s in steps if step is None or s <= step]
+        if candidates:
+            assigned.setdefault(candidates[-1], []).append(loc["xpath"])
+    return [(f"{snapshots_dir}#step{step}", by_step[step], xpaths) for step, xpaths in assigned.items()]
+
+
+def html_tasks(session, pattern):
+    xpaths = [loc["xpath"] for loc in unique_locators(session["xpaths"])]
+    return [(path, None, xpaths) for path in sorted(glob.glob(pattern, recursive=True))]
+
+
+def validate(tasks, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(evaluate_snapshot, *zip(*tasks)))
+
+
+def build_rows(session, snapshot_results):
+    labels = {}
+    for loc in session["xpaths"]:
+        labels.setdefault(loc["xpath"], loc)
+
+    rows = []
+    for snap in snapshot_results:
+        for xpath, res in snap["results"].items():
+            loc = labels.get(xpath, {})
+            rows.append({
+                "snapshot": snap["source"],
+                "label": loc.get("label", ""),
+                "group": loc.get("group", ""),
+                "strategy": loc.get("strategy", ""),
+                "xpath": xpath,
+                "matches": res["count"],
+                "status": match_status(res["count"], res["error"]),
+                "error": res["error"] or "",
+            })
+    return rows
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if not args:
+        print("Usage: python offline_validate.py <session.json> [--snapshots=<dir>] [--html=<glob>] "
+              "[--workers=N] [--out=<report.json>]", flush=True)
+        sys.exit(1)
+
+    session = load_session(args[0])
+    if options.get('html'):
+        tasks = html_tasks(session, options['html'])
+    else:
+        with open(args[0]) as f:
+            snapshots_dir = options.get('snapshots') or json.load(f).get("snapshots_dir")
+        if not snapshots_dir or not os.path.isdir(snapshots_dir):
+            print("ERROR: no snapshot store found, pass --snapshots=<dir> or --html=<glob>", flush=True)
+            sys.exit(1)
+        tasks = snapshot_tasks(session, snapshots_dir)
+
+    if not tasks:
+        print("No snapshots to validate against.", flush=True)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = validate(tasks, int(options['workers']) if options.get('workers') else None)
+    wall = time.perf_counter() - start
+    rows = build_rows(session, results)
+
+    statuses = {}
+    for row in rows:
+        statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+    report = {
+        "session": args[0],
+        "validated_at": datetime.now().isoformat(),
+        "snapshots": len(results),
+        "evaluations": len(rows),
+        "wall_seconds": wall,
+        "evaluations_per_second": len(rows) / wall if wall else None,
+        "statuses": statuses,
+        "locators": rows,
+    }
+
+    out = options.get('out') or f"offline_validate_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    csv_file = out.rsplit('.', 1)[0] + ".csv"
+    if rows:
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    print(f"Snapshots: {len(results)} | Evaluations: {len(rows)} | "
+          + " | ".join(f"{k}: {v}" for k, v in sorted(statuses.items())), flush=True)
+    print(f"Time: {wall:.2f}s ({report['evaluations_per_second'] or 0:.0f} evaluations/s)", flush=True)
+    print(f"Saved: {out}", flush=True)
+    print(f"Saved: {csv_file}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
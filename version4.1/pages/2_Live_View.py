@@ -5,13 +5,14 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import time
+from live_journal import LiveJournal, assign_groups
 
 st.set_page_config(page_title="Live View", page_icon="👁️", layout="wide")
 
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 STATE_FILE = BASE_DIR / ".recording_state.json"
-LIVE_CAPTURE_FILE = BASE_DIR / ".live_capture.jsonl"
+LIVE_JOURNAL = BASE_DIR / ".live_capture"
 
 # CSS Styling (matching app_v4.py)
 st.markdown("""
@@ -56,32 +57,14 @@ with col2:
     st.write("")  # Spacer
     if st.button("Assign Group", type="primary", use_container_width=True):
         if group_name.strip():
-            # Check if last line is a group marker (allow rename)
-            should_replace = False
-            if LIVE_CAPTURE_FILE.exists():
-                with open(LIVE_CAPTURE_FILE, 'r') as f:
-                    lines = f.readlines()
-                    if lines:
-                        try:
-                            last_entry = json.loads(lines[-1].strip())
-                            if last_entry.get("type") == "group":
-                                should_replace = True
-                        except:
-                            pass
-            
-            if should_replace:
-                # Remove last line and rewrite
-                with open(LIVE_CAPTURE_FILE, 'w') as f:
-                    f.writelines(lines[:-1])
-            
-            # Write new group marker
+            # Append a group marker (the journal is append-only; a marker
+            # right after another one renames it when groups are applied)
             group_entry = {
                 "type": "group",
                 "name": group_name.strip(),
                 "timestamp": datetime.now().isoformat()
             }
-            with open(LIVE_CAPTURE_FILE, 'a') as f:
-                f.write(json.dumps(group_entry) + '\n')
+            LiveJournal(LIVE_JOURNAL).append(group_entry)
             st.success(f"Group '{group_name}' assigned!")
             time.sleep(0.5)
             st.rerun()
@@ -104,70 +87,49 @@ max_entries = st.slider("Show last N entries", 10, 2000, 1000)
 st.divider()
 
 # Load and display live data
-if not LIVE_CAPTURE_FILE.exists():
+if not LIVE_JOURNAL.exists():
     st.info("Waiting for first interaction...")
 else:
-    # Read JSONL file and process groups
-    entries = []
-    group_markers = []  # List of (index, group_name)
-    
-    with open(LIVE_CAPTURE_FILE) as f:
-        for line in f:
-            try:
-                entry = json.loads(line.strip())
-                if entry.get("type") == "group":
-                    # Record where this group marker appears
-                    group_markers.append((len(entries), entry["name"]))
-                elif entry.get("type") == "xpath":
-                    entries.append(entry)
-            except json.JSONDecodeError:
-                continue
-    
-    if not entries:
+    # Session-wide counts come from the journal's stored summaries; only the last N
+    # records are read for the table (memory-mapped, nothing before them is parsed).
+    # Groups are assigned retroactively: a group marker names every entry captured
+    # since the previous marker, entries after the last marker remain ungrouped
+    journal = LiveJournal(LIVE_JOURNAL)
+    totals = journal.summary()
+    records = journal.tail(max_entries)
+    entries = assign_groups(records)
+
+    if not totals["entries"]:
         st.info("Waiting for interactions...")
     else:
-                # Assign groups to entries (retroactive assignment)
-        # Group marker at position N means: all entries BEFORE it (0 to N-1) get that group
-        for i, entry in enumerate(entries):
-            entry["group"] = ""  # Default: no group
-        
-        # Process group markers in order
-        prev_idx = 0
-        for marker_idx, group_name in group_markers:
-            # Assign group name to entries from prev_idx to marker_idx-1
-            for i in range(prev_idx, marker_idx):
-                entries[i]["group"] = group_name
-            prev_idx = marker_idx
-        # Entries after last marker remain ungrouped (empty)
-
-        
         # Summary metrics
-        st.subheader(f"Captured: {len(entries)} elements")
+        st.subheader(f"Captured: {totals['entries']} elements")
+        if len(entries) < totals["entries"]:
+            st.caption(f"Table shows the last {len(entries)} of {totals['entries']} elements")
         
         col1, col2, col3, col4 = st.columns(4)
-        clicks = sum(1 for e in entries if e["action"] == "click")
-        inputs = sum(1 for e in entries if e["action"] != "click")
-        ungrouped = sum(1 for e in entries if e["group"] == "")
-        col1.metric("Total", len(entries))
-        col2.metric("Clicks", clicks)
-        col3.metric("Inputs", inputs)
-        col4.metric("Ungrouped", ungrouped)
+        col1.metric("Total", totals["entries"])
+        col2.metric("Clicks", totals["clicks"])
+        col3.metric("Inputs", totals["inputs"])
+        col4.metric("Ungrouped", totals["ungrouped"])
         
-        # Show last N entries
-        recent_entries = entries[-max_entries:]
-        df = pd.DataFrame(recent_entries)
+        # Show last N entries (the window can hold only group markers)
+        if not entries:
+            st.info(f"No elements among the last {max_entries} journal records")
+        else:
+            df = pd.DataFrame(entries)
         
-        # Reorder columns - Group first for visibility
-        display_cols = ["group", "label", "action", "values", "strategy", "xpath"]
-        df = df[[c for c in display_cols if c in df.columns]]
-        df.columns = ["Group", "Element", "Action", "Value", "Strategy", "XPath"]
+            # Reorder columns - Group first for visibility
+            display_cols = ["group", "label", "action", "values", "strategy", "xpath"]
+            df = df[[c for c in display_cols if c in df.columns]]
+            df.columns = ["Group", "Element", "Action", "Value", "Strategy", "XPath"]
         
-        st.dataframe(df, use_container_width=True, height=400)
+            st.dataframe(df, use_container_width=True, height=400)
         
-        # Show latest entry highlighted
-        st.subheader("Latest Capture")
-        latest = entries[-1]
-        st.code(f"""Group:    {latest.get('group', '')}
+            # Show latest entry highlighted
+            st.subheader("Latest Capture")
+            latest = entries[-1]
+            st.code(f"""Group:    {latest.get('group', '')}
 Element:  {latest['label']}
 Action:   {latest['action']}
 Value:    {latest.get('values', '')}
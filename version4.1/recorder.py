@@ -9,6 +9,13 @@ import time
 import signal
 from datetime import datetime
 from playwright.sync_api import sync_playwright
+from dom_snapshots import SnapshotStore, SNAPSHOT_JS
+from lean_mode import LeanRouter, load_lean_config
+from auth_cache import auth_state_for
+from session_store import SessionStore, DEFAULT_DB
+from search_index import SearchIndex
+from locator_catalog import LocatorCatalog, DEFAULT_CATALOG
+from live_journal import LiveJournal, archive_journal, assign_groups
 
 
 # storage for captured data
@@ -18,16 +25,17 @@ captured_xpaths = {}
 url = ""
 formats = []
 output_dir = "."
-live_capture_file = None
-
-XPATH_JS = """
+live_journal = None
+snapshot_store = None
+lean_router = None
+auth_state = None
+session_db = DEFAULT_DB
+catalog_file = DEFAULT_CATALOG
+
+# Locator strategies shared by interactive recording and bulk enumeration
+# Installs window.__xpathLocator = { countMatches, getAbsoluteXPath, getXPath, getLabel, getFingerprint }
+LOCATOR_JS = """
 (function () {
-    // Highlight styles
-    const HIGHLIGHT_STYLE = '2px solid red';
-    const HIGHLIGHT_BG = 'rgba(255, 0, 0, 0.1)';
-    let lastHighlighted = null;
-    let originalStyles = {};
-
     function countMatches(xpath) {
         try {
             const result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
@@ -156,6 +164,45 @@ XPATH_JS = """
         return { xpath: getAbsoluteXPath(element), strategy: 'absolute' };
     }
 
+    function getLabel(element) {
+        return element.id || element.name || element.placeholder ||
+            (element.textContent || '').trim().slice(0, 30) || element.tagName.toLowerCase();
+    }
+
+    // stable attributes + normalized text, used to heal the locator if it breaks later
+    function getFingerprint(element) {
+        const attr = (name) => element.getAttribute(name) || '';
+        return {
+            tag: element.tagName.toLowerCase(),
+            id: element.id || '',
+            name: attr('name'),
+            type: attr('type'),
+            role: attr('role'),
+            ariaLabel: attr('aria-label'),
+            placeholder: attr('placeholder'),
+            testid: attr('data-testid'),
+            href: attr('href'),
+            classes: (typeof element.className === 'string' ? element.className.trim().split(/\\s+/) : []).filter(Boolean),
+            text: (element.textContent || '').replace(/\\s+/g, ' ').trim().slice(0, 50),
+            parentTag: element.parentElement ? element.parentElement.tagName.toLowerCase() : ''
+        };
+    }
+
+    window.__xpathLocator = { countMatches, getAbsoluteXPath, getXPath, getLabel, getFingerprint };
+})();
+"""
+
+XPATH_JS = """
+(function () {
+    const { countMatches, getXPath, getFingerprint } = window.__xpathLocator;
+
+    // Highlight styles
+    const HIGHLIGHT_STYLE = '2px solid red';
+    const HIGHLIGHT_BG = 'rgba(255, 0, 0, 0.1)';
+    let lastHighlighted = null;
+    let originalStyles = {};
+    let stepSeq = 0;
+
     function highlightElement(el) {
         if (lastHighlighted && lastHighlighted !== el) {
             // Restore previous element
@@ -176,6 +223,17 @@ XPATH_JS = """
         }
     }
 
+    // Serialize the DOM once the event has been handled so the click itself is never delayed
+    function scheduleSnapshot(step) {
+        if (!window.reportSnapshot || !window.__xpathSnapshot) return;
+        const run = () => window.reportSnapshot(step, location.href, window.__xpathSnapshot());
+        if (window.requestIdleCallback) {
+            requestIdleCallback(run, { timeout: 1000 });
+        } else {
+            setTimeout(run, 0);
+        }
+    }
+
     // Hover highlight
     document.addEventListener('mouseover', function(e) {
         highlightElement(e.target);
@@ -187,8 +245,10 @@ XPATH_JS = """
         const result = getXPath(el);
         const label = el.id || el.name || el.placeholder || el.textContent.trim().slice(0, 30) || el.tagName.toLowerCase();
         const matches = countMatches(result.xpath);
+        const step = ++stepSeq;
 
-        window.reportXPath(label, result.xpath, result.strategy, matches, 'click', '');
+        window.reportXPath(label, result.xpath, result.strategy, matches, 'click', '', step, location.href, getFingerprint(el));
+        scheduleSnapshot(step);
     }, true);
 
     // Change capture
@@ -198,12 +258,68 @@ XPATH_JS = """
     const label = el.id || el.name || el.placeholder || el.tagName.toLowerCase();
     const matches = countMatches(result.xpath);
     const value = el.type === 'checkbox' ? el.checked : el.value;
-    window.reportXPath(label, result.xpath, result.strategy, matches, 'Input', value);
+    const step = ++stepSeq;
+    window.reportXPath(label, result.xpath, result.strategy, matches, 'Input', value, step, location.href, getFingerprint(el));
+    scheduleSnapshot(step);
     }, true);
 
 })();
 """
 
+# arg: {scope, includeHidden} -> one entry per interactive element in scope
+ENUMERATE_JS = """
+({ scope, includeHidden }) => {
+    const { countMatches, getXPath, getLabel, getFingerprint } = window.__xpathLocator;
+    const INTERACTIVE = [
+        'input:not([type="hidden"])', 'select', 'textarea', 'button', 'a[href]',
+        '[role="button"]', '[role="link"]', '[role="checkbox"]', '[role="radio"]',
+        '[role="combobox"]', '[role="listbox"]', '[role="option"]', '[role="menuitem"]',
+        '[role="tab"]', '[role="switch"]', '[role="textbox"]', '[contenteditable="true"]'
+    ].join(', ');
+    const INPUT_ROLES = new Set(['combobox', 'textbox', 'listbox']);
+
+    // scope is an XPath (starts with / or () or a CSS selector
+    let roots = [document];
+    if (scope) {
+        roots = [];
+        if (scope.startsWith('/') || scope.startsWith('(')) {
+            const result = document.evaluate(scope, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (let i = 0; i < result.snapshotLength; i++) roots.push(result.snapshotItem(i));
+        } else {
+            roots = Array.from(document.querySelectorAll(scope));
+        }
+    }
+
+    const seen = new Set();
+    const entries = [];
+    for (const root of roots) {
+        const candidates = Array.from(root.querySelectorAll(INTERACTIVE));
+        if (root !== document && root.matches(INTERACTIVE)) candidates.unshift(root);
+        for (const el of candidates) {
+            if (seen.has(el)) continue;
+            seen.add(el);
+            if (!includeHidden && el.getClientRects().length === 0) continue;
+
+            const tag = el.tagName.toLowerCase();
+            const role = el.getAttribute('role');
+            const isInput = (tag === 'input' && !['button', 'submit', 'reset', 'image'].includes(el.type)) ||
+                tag === 'select' || tag === 'textarea' || el.isContentEditable || INPUT_ROLES.has(role);
+            const result = getXPath(el);
+            entries.push({
+                label: getLabel(el),
+                xpath: result.xpath,
+                strategy: result.strategy,
+                matches: countMatches(result.xpath),
+                action: isInput ? 'Input' : 'click',
+                values: '',
+                fingerprint: getFingerprint(el)
+            });
+        }
+    }
+    return entries;
+}
+"""
+
 # receives data from JS via window.reportXPath, stores in global {}
 # def handle_xpath(label, xpath, strategy, matches,action, values):
 #     key = f"{xpath}|{action}"
@@ -224,8 +340,7 @@ XPATH_JS = """
 #         status = "UNIQUE" if matches == 1 else f"{matches} matches"
 #         print(f"[{len(captured_xpaths)}] {label} | {action} | {status}", flush=True)
 
-def handle_xpath(label, xpath, strategy, matches, action, values):
-    global live_capture_file
+def handle_xpath(label, xpath, strategy, matches, action, values, step=None, page_url=None, fingerprint=None):
     key = f"{xpath}|{action}"
     is_update = key in captured_xpaths
 
@@ -235,11 +350,16 @@ def handle_xpath(label, xpath, strategy, matches, action, values):
         "strategy": strategy,
         "matches": matches,
         "action": action,
-        "values": values
+        "values": values,
+        "step": step,
+        "page": page_url or url,
+        "group": "",
+        "fingerprint": fingerprint,
+        "timestamp": datetime.now().isoformat()
     }
 
-    # write to live capture file for real-time viewing
-    if live_capture_file:
+    # write to the live journal for real-time viewing
+    if live_journal:
         entry = {
             "type": "xpath",
             "label": label,
@@ -248,11 +368,11 @@ def handle_xpath(label, xpath, strategy, matches, action, values):
             "matches": matches,
             "action": action,
             "values": values,
+            "step": step,
+            "page": page_url or url,
             "timestamp": datetime.now().isoformat()
         }
-
-        with open(live_capture_file, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        live_journal.append(entry)
 
     if is_update:
         print(f"[UPDATE] {label}: {values}", flush=True)
@@ -261,6 +381,12 @@ def handle_xpath(label, xpath, strategy, matches, action, values):
         print(f"[{len(captured_xpaths)}] {label} | {action} | {status}", flush=True)
 
 
+# receives the serialized DOM after each step via window.reportSnapshot
+def handle_snapshot(step, page_url, html):
+    if snapshot_store:
+        snapshot_store.capture(step, page_url, html)
+
+
 def save_python(filename, url):
     with open(filename, 'w') as f:
         f.write(f"# XPaths captured from: {url}\n")
@@ -279,6 +405,10 @@ def save_json(filename, url):
         "total_elements": len(captured_xpaths),
         "xpaths": list(captured_xpaths.values()) 
     }
+    if snapshot_store:
+        data["snapshots_dir"] = str(snapshot_store.directory)
+    if lean_router:
+        data["lean_stats"] = lean_router.stats
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
 
@@ -295,12 +425,47 @@ def cleanup(signum=None, frame=None):
     global url, formats, output_dir
     print("STOPPING...", flush=True)
 
+    if snapshot_store:
+        stats = snapshot_store.close()
+        print(f"Snapshots: {stats['stored']} stored, {stats['deduplicated']} deduplicated, "
+              f"{stats['skipped']} skipped ({snapshot_store.bytes_written} bytes)", flush=True)
+
+    if lean_router:
+        print(f"Lean: {lean_router.summary()}", flush=True)
+
+    save_outputs()
+    if live_journal:
+        live_journal.seal()
+
+    print("DONE", flush=True)
+    sys.exit(0)
+
+# applies the Live View's group markers to captured_xpaths
+# (a marker names every entry captured since the previous marker)
+def assign_groups_from_live_file():
+    if not live_journal:
+        return
+    try:
+        entries = assign_groups(live_journal.read())
+    except (OSError, ValueError):
+        return
+
+    for entry in entries:
+        key = f"{entry['xpath']}|{entry['action']}"
+        if entry["group"] and key in captured_xpaths:
+            captured_xpaths[key]["group"] = entry["group"]
+
+# writes captured_xpaths in every requested format
+def save_outputs():
+    assign_groups_from_live_file()
     if captured_xpaths:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        json_file = None
 
         if 'json' in formats:
             filename = f"{output_dir}/xpaths_{timestamp}.json"
             save_json(filename, url)
+            json_file = filename
             print(f"Saved: {filename}", flush=True)
         
         if 'csv' in formats:
@@ -312,38 +477,158 @@ def cleanup(signum=None, frame=None):
             filename = f"{output_dir}/xpaths_{timestamp}.py"
             save_python(filename, url)
             print(f"Saved: {filename}", flush=True)
-        
+
+        if session_db:
+            save_to_store(json_file)
+        if catalog_file:
+            save_to_catalog()
+
         print(f"Total: {len(captured_xpaths)} elements", flush=True)
     else:
         print("No elements captured.", flush=True)
-    
+
+# the whole session goes into the SQLite store in one transaction
+def save_to_store(json_file=None):
+    try:
+        store = SessionStore(session_db)
+        session_id = store.save_session(url, list(captured_xpaths.values()), source_path=json_file,
+                                        snapshots_dir=str(snapshot_store.directory) if snapshot_store else None)
+        store.close()
+        index = SearchIndex(session_db)
+        index.index_session(session_id)
+        index.close()
+        print(f"Stored: session {session_id} in {session_db}", flush=True)
+    except Exception as e:
+        # the files above are already written, a store failure must not lose them
+        print(f"Store failed: {e}", flush=True)
+
+# folds this session's locators into the global catalog
+def save_to_catalog():
+    try:
+        catalog = LocatorCatalog(catalog_file)
+        result = catalog.merge_session(url, list(captured_xpaths.values()))
+        catalog.save()
+        if result:
+            print(f"Catalog: {result[0]} new, {result[1]} seen before", flush=True)
+    except Exception as e:
+        print(f"Catalog update failed: {e}", flush=True)
+
+# headless single pass: every interactive element in scope, one evaluate
+def enumerate_elements(page, scope=None, include_hidden=False):
+    page.evaluate(LOCATOR_JS)
+    return page.evaluate(ENUMERATE_JS, {"scope": scope, "includeHidden": include_hidden})
+
+
+def run_enumeration(scope=None, group=None, include_hidden=False):
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page(storage_state=auth_state)
+        if lean_router:
+            page.route("**/*", lean_router.handle)
+        page.goto(url, wait_until="load")
+        print("ENUMERATING", flush=True)
+
+        start = time.perf_counter()
+        entries = enumerate_elements(page, scope, include_hidden)
+        elapsed = time.perf_counter() - start
+        browser.close()
+
+    for entry in entries:
+        entry["page"] = url
+        entry["group"] = group or ""
+        captured_xpaths[f"{entry['xpath']}|{entry['action']}"] = entry
+
+    print(f"Enumerated: {len(entries)} elements in {elapsed:.2f}s", flush=True)
+    if lean_router:
+        print(f"Lean: {lean_router.summary()}", flush=True)
+    save_outputs()
     print("DONE", flush=True)
-    sys.exit(0)
+
+
+# splits argv into positional args and --key[=value] options
+def parse_args(argv):
+    args = []
+    options = {}
+    for arg in argv:
+        if arg.startswith('--'):
+            key, _, value = arg[2:].partition('=')
+            options[key] = value if value else True
+        else:
+            args.append(arg)
+    return args, options
 
 def main():
-    global url, formats, output_dir, live_capture_file
+    global url, formats, output_dir, live_journal, snapshot_store, lean_router, auth_state, session_db, catalog_file
 
-    if len(sys.argv) < 3:
-        print("Usage: python recorder.py <url> <formats> [output_dir]", flush=True)
+    args, options = parse_args(sys.argv[1:])
+
+    if len(args) < 2:
+        print("Usage: python recorder.py <url> <formats> [output_dir] [live_journal_dir] [options]", flush=True)
         print("Formats: py,json,csv (comma-seperated)", flush=True)
+        print("Options: --snapshots  --snapshot-budget=<MB>  --lean[=<config.json>]", flush=True)
+        print("         --enumerate [--scope=<css|xpath>] [--group=<name>] [--include-hidden]", flush=True)
+        print("         --auth-user=<name> [--auth-login=<login_session.json>] [--auth-validate=<xpath>]", flush=True)
+        print("         --store=<sessions.db> | --no-store  --catalog=<catalog.json> | --no-catalog", flush=True)
+        print("         --journal-rotate-mb=<MB>  --journal-rotate-minutes=<min>", flush=True)
         sys.exit(1)
 
-    url = sys.argv[1]
-    formats = sys.argv[2].split(',')
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else "."
+    url = args[0]
+    formats = args[1].split(',')
+    output_dir = args[2] if len(args) > 2 else "."
+
+    # the previous recording's journal is archived, not overwritten;
+    # headless enumeration never writes to the Live View journal
+    if len(args) > 3 and not options.get('enumerate'):
+        archive_journal(args[3])
+        rotate_mb = float(options.get('journal-rotate-mb', 0)) or None
+        rotate_minutes = float(options.get('journal-rotate-minutes', 0)) or None
+        live_journal = LiveJournal(args[3], int(rotate_mb * 1024 * 1024) if rotate_mb else None,
+                                   rotate_minutes * 60 if rotate_minutes else None)
+
+    if options.get('no-store'):
+        session_db = None
+    elif isinstance(options.get('store'), str):
+        session_db = options['store']
+    if options.get('no-catalog'):
+        catalog_file = None
+    elif isinstance(options.get('catalog'), str):
+        catalog_file = options['catalog']
+
+    # lean mode: block images/fonts/trackers, never the app's own API calls
+    if options.get('lean'):
+        config_path = options['lean'] if isinstance(options['lean'], str) else None
+        lean_router = LeanRouter(url, load_lean_config(config_path))
+
+    # reuse a cached login instead of logging in again on every recording
+    try:
+        auth_state = auth_state_for(url, options)
+    except Exception as e:
+        print(f"ERROR: {e}", flush=True)
+        sys.exit(1)
 
-    live_capture_file = sys.argv[4] if len(sys.argv) > 4 else None
-    #write start marker to live file
-    if live_capture_file:
-        with open(live_capture_file, 'w') as f:
-            f.write(json.dumps({
-                "type": "start",
-                "url": url,
-                "timestamp": datetime.now().isoformat()
-            }) + '\n')
+    #write start marker to live journal
+    if live_journal:
+        live_journal.append({
+            "type": "start",
+            "url": url,
+            "timestamp": datetime.now().isoformat()
+        })
 
     print(f"STARTING: {url}", flush=True)
 
+    # headless bulk mode - no browser window, no live capture
+    if options.get('enumerate'):
+        scope = options['scope'] if isinstance(options.get('scope'), str) else None
+        group = options['group'] if isinstance(options.get('group'), str) else None
+        run_enumeration(scope, group, bool(options.get('include-hidden')))
+        return
+
+    # snapshots are only taken while recording interactively
+    if options.get('snapshots'):
+        budget_mb = float(options.get('snapshot-budget', 50))
+        snapshots_dir = f"{output_dir}/snapshots_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        snapshot_store = SnapshotStore(snapshots_dir, budget_bytes=int(budget_mb * 1024 * 1024))
+
     #Handle termintion signals
     signal.signal(signal.SIGTERM, cleanup)
     signal.signal(signal.SIGINT, cleanup)
@@ -351,9 +636,17 @@ def main():
     try:
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=False)
-            page = browser.new_page()
+            page = browser.new_page(storage_state=auth_state)
+            if lean_router:
+                page.route("**/*", lean_router.handle)
+                print("LEAN MODE", flush=True)
             page.expose_function("reportXPath", handle_xpath)
+            if snapshot_store:
+                page.expose_function("reportSnapshot", handle_snapshot)
             page.goto(url)
+            if snapshot_store:
+                page.evaluate(SNAPSHOT_JS)
+            page.evaluate(LOCATOR_JS)
             page.evaluate(XPATH_JS)
 
             print("RECORDING", flush=True)
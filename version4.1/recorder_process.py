@@ -0,0 +1,125 @@
+# recorder_process.py - Managed recorder subprocess for the Streamlit dashboard
+# Drains the recorder's stdout/stderr on background threads so the child never
+# blocks on a full pipe, and parses the status lines it prints.
+
+import re
+import subprocess
+import threading
+from collections import deque
+from datetime import datetime
+
+
+# status lines printed by recorder.py
+CAPTURE_RE = re.compile(r"^\[(\d+)\] (.*) \| (.*) \| (.*)$")
+UPDATE_RE = re.compile(r"^\[UPDATE\] (.*?): (.*)$")
+TOTAL_RE = re.compile(r"^Total: (\d+) elements$")
+
+
+class RecorderProcess:
+    def __init__(self, cmd, cwd=None, max_lines=500):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.process = None
+        self._lines = deque(maxlen=max_lines)   # ring buffer of (time, stream, line)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._done = threading.Event()
+        self.status = {
+            "state": "IDLE",
+            "url": None,
+            "captured": 0,
+            "updates": 0,
+            "last_capture": None,
+            "saved_files": [],
+            "total": None,
+            "lean": None,
+            "error": None,
+        }
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.cmd,
+            cwd=self.cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        self.status["state"] = "STARTING"
+        for name, stream in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            t = threading.Thread(target=self._pump, args=(name, stream), daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    # reads one stream until EOF - runs on its own thread
+    def _pump(self, name, stream):
+        for raw in iter(stream.readline, ''):
+            line = raw.rstrip('\n')
+            with self._lock:
+                self._lines.append((datetime.now().isoformat(), name, line))
+                if name == "stdout":
+                    self._parse(line)
+        stream.close()
+        if name == "stdout":
+            self._done.set()
+
+    # called with self._lock held
+    def _parse(self, line):
+        status = self.status
+        if line.startswith("STARTING: "):
+            status["state"] = "STARTING"
+            status["url"] = line[len("STARTING: "):]
+        elif line == "RECORDING":
+            status["state"] = "RECORDING"
+        elif line.startswith("STOPPING"):
+            status["state"] = "STOPPING"
+        elif line == "DONE":
+            status["state"] = "DONE"
+        elif line.startswith("Lean: "):
+            status["lean"] = line[len("Lean: "):]
+        elif line.startswith("Saved: "):
+            status["saved_files"].append(line[len("Saved: "):])
+        elif line.startswith("ERROR: "):
+            status["error"] = line[len("ERROR: "):]
+        elif TOTAL_RE.match(line):
+            status["total"] = int(TOTAL_RE.match(line).group(1))
+        elif UPDATE_RE.match(line):
+            status["updates"] += 1
+            label, values = UPDATE_RE.match(line).groups()
+            status["last_capture"] = {"label": label, "action": "update", "values": values}
+        elif CAPTURE_RE.match(line):
+            count, label, action, matches = CAPTURE_RE.match(line).groups()
+            status["captured"] = int(count)
+            status["last_capture"] = {"label": label, "action": action, "matches": matches}
+
+    def snapshot(self):
+        # copy of the parsed status, safe to render from the UI thread
+        with self._lock:
+            status = dict(self.status)
+            status["saved_files"] = list(self.status["saved_files"])
+        status["running"] = self.is_running()
+        return status
+
+    def lines(self, n=None, stream=None):
+        with self._lock:
+            lines = [l for l in self._lines if stream is None or l[1] == stream]
+        return lines[-n:] if n else lines
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self, timeout=10):
+        # SIGTERM lets recorder.py save its files; wait for DONE instead of sleeping
+        if not self.is_running():
+            return self.snapshot()
+        self.process.terminate()
+        if not self._done.wait(timeout):
+            self.process.kill()
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        for t in self._threads:
+            t.join(timeout=1)
+        return self.snapshot()
@@ -0,0 +1,650 @@
+# replay_runner.py - Replay test-scenario CSVs against a session's recorded XPaths
+# Joins the llm_generator.py output (Description + one column per label) to the
+# session's locators and runs each row as click/fill steps. Scenarios run
+# concurrently, each in its own browser context of one headless browser.
+#
+# Usage: python replay_runner.py <session.json> <scenarios.csv> [--concurrency=8]
+#            [--url=<override>] [--timeout=5000] [--heal] [--headed] [--out=<results.csv>]
+#            [--processes=N|auto] [--retries=1] [--batch-size=<n>] [--trie]
+#            [--auth-user=<name> [--auth-login=<login_session.json>] [--auth-validate=<xpath>]]
+#            [--asset-cache[=<dir>]] [--trace [--settle=2000]]
+#
+# With --processes each worker process owns its own browser and is handed one
+# small batch at a time, so idle workers take over whatever is left.
+# With --trie scenarios are compiled into a prefix trie of steps: shared
+# prefixes run once and each branch point forks the browser state.
+# With --auth-user the cached login state (auth_cache.py) is resolved once and
+# every context, in every worker process, starts from it.
+# With --asset-cache static assets are served from a local content store
+# (asset_cache.py) after the first run; documents and API calls still hit the server.
+# With --trace every step records resolve/action/settle times and network
+# activity (step_trace.py) and a latency report is written next to the results.
+#
+# Local fixture: python -m http.server 8000 -d fixtures/site
+#                python replay_runner.py fixtures/form_session.json fixtures/form_scenarios.csv
+
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import asyncio
+import multiprocessing
+from datetime import datetime
+
+from playwright.async_api import async_playwright
+
+from asset_cache import DEFAULT_CACHE_DIR, open_cache
+from auth_cache import auth_state_for
+from recorder import LOCATOR_JS, parse_args
+from self_healing import resolve_with_healing_async, write_patch
+from session_io import load_session
+from step_trace import build_report, monitor_for, save_trace, step_record
+
+
+# optional last column: text the page must show once the steps are done
+EXPECTED_COLUMN = "Expected"
+TRUE_VALUES = ("true", "1", "yes", "on", "checked")
+
+
+def load_scenarios(path):
+    # returns (labels, scenarios); duplicate labels are kept in column order
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+    header = rows[0]
+    has_expected = header[-1] == EXPECTED_COLUMN
+    labels = header[1:-1] if has_expected else header[1:]
+
+    scenarios = []
+    for i, row in enumerate(rows[1:], start=1):
+        row = row + [''] * (len(header) - len(row))
+        scenarios.append({
+            "index": i,
+            "description": row[0],
+            "values": row[1:len(labels) + 1],
+            "expected": row[-1] if has_expected else "",
+        })
+    return labels, scenarios
+
+
+def join_columns(entries, labels):
+    # each column takes the next session entry with that label, in recorded order
+    columns = []
+    position = 0
+    for label in labels:
+        for i in range(position, len(entries)):
+            if entries[i]["label"] == label:
+                columns.append(entries[i])
+                position = i + 1
+                break
+        else:
+            raise ValueError(f"Column '{label}' has no matching locator in the session (after entry {position})")
+    return columns
+
+
+def build_steps(columns, values):
+    steps = []
+    for i, (entry, value) in enumerate(zip(columns, values)):
+        if value == "Click" or entry["action"] == "click":
+            action = "click"
+        else:
+            fingerprint = entry.get("fingerprint") or {}
+            tag, input_type = fingerprint.get("tag"), fingerprint.get("type")
+            if tag == "select":
+                action = "select"
+            elif tag == "input" and input_type in ("checkbox", "radio"):
+                action = "check"
+            elif tag:
+                action = "fill"
+            else:
+                action = "input"   # decided at run time from the element
+        steps.append({
+            "index": i,
+            "label": entry["label"],
+            "group": entry.get("group", ""),
+            "strategy": entry.get("strategy", ""),
+            "xpath": entry["xpath"],
+            "action": action,
+            "value": value,
+            "entry": entry,
+        })
+    return steps
+
+
+async def perform(page, xpath, action, value, timeout):
+    locator = page.locator(f"xpath={xpath}")
+    if action == "input":
+        tag, input_type = await locator.evaluate("(el) => [el.tagName.toLowerCase(), el.type || '']", timeout=timeout)
+        action = "select" if tag == "select" else "check" if input_type in ("checkbox", "radio") else "fill"
+
+    if action == "click":
+        await locator.click(timeout=timeout)
+    elif action == "select":
+        await locator.select_option(value, timeout=timeout)
+    elif action == "check":
+        await locator.set_checked(str(value).strip().lower() in TRUE_VALUES, timeout=timeout)
+    else:
+        await locator.fill(value, timeout=timeout)
+
+
+async def run_step(page, step, options, patches, trace=None, scenario=None):
+    # with a trace list, the step's timings and network activity are appended to it
+    monitor = monitor_for(page) if trace is not None else None
+    before = monitor.counters() if monitor else None
+    timings = {}
+    last = time.perf_counter()
+
+    def mark(phase):
+        nonlocal last
+        now = time.perf_counter()
+        timings[phase] = (now - last) * 1000
+        last = now
+
+    xpath = step["xpath"]
+    try:
+        if options["heal"]:
+            xpath = await resolve_with_healing_async(page, step["entry"], patches)
+        elif monitor:
+            await page.locator(f"xpath={xpath}").first.wait_for(state="attached", timeout=options["timeout"])
+        mark("resolve")
+        await perform(page, xpath, step["action"], step["value"], options["timeout"])
+        mark("action")
+        if monitor:
+            timings["settle"] = await monitor.wait_idle(options["settle"])
+    except Exception as e:
+        if monitor:
+            mark("resolve" if "resolve" not in timings else "action")
+            trace.append(step_record(scenario, step, xpath, timings, before, monitor, str(e).splitlines()[0]))
+        raise
+    if monitor:
+        trace.append(step_record(scenario, step, xpath, timings, before, monitor))
+
+
+async def check_expected(page, expected, timeout):
+    # returns an error message, or "" if the expected text is shown
+    if not expected:
+        return ""
+    try:
+        await page.wait_for_function("(text) => document.body.innerText.includes(text)", arg=expected, timeout=timeout)
+        return ""
+    except Exception:
+        return f"expected text not found: {expected}"
+
+
+async def new_context(browser, options, storage_state):
+    context = await browser.new_context(storage_state=storage_state)
+    if options["asset_cache"]:
+        await context.route("**/*", open_cache(options["asset_cache"]).handle)
+    return context
+
+
+async def run_scenario(browser, url, scenario, steps, options, patches, trace=None):
+    result = {
+        "scenario": scenario["index"],
+        "description": scenario["description"],
+        "status": "pass",
+        "steps_total": len(steps),
+        "steps_run": 0,
+        "failed_step": "",
+        "failed_label": "",
+        "error": "",
+        "expected": scenario["expected"],
+    }
+    timeout = options["timeout"]
+    start = time.perf_counter()
+    context = None
+    try:
+        # a context that cannot be created fails this scenario, not the whole run
+        context = await new_context(browser, options, options["storage_state"])
+        page = await context.new_page()
+        await page.goto(url, wait_until="load")
+        for step in steps:
+            try:
+                await run_step(page, step, options, patches, trace, scenario["index"])
+            except Exception as e:
+                result.update(status="fail", failed_step=step["index"] + 1, failed_label=step["label"],
+                              error=str(e).splitlines()[0])
+                break
+            result["steps_run"] += 1
+
+        if result["status"] == "pass":
+            error = await check_expected(page, scenario["expected"], timeout)
+            if error:
+                result.update(status="fail", error=error)
+    except Exception as e:
+        result.update(status="error", error=str(e).splitlines()[0])
+    finally:
+        if context:
+            await context.close()
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+async def run_all(url, scenarios, columns, options, patches, trace=None):
+    semaphore = asyncio.Semaphore(options["concurrency"])
+    results = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=not options["headed"])
+
+        async def run_one(scenario):
+            async with semaphore:
+                result = await run_scenario(browser, url, scenario, build_steps(columns, scenario["values"]),
+                                            options, patches, trace)
+            results.append(result)
+            print(f"[{len(results)}/{len(scenarios)}] {result['status'].upper()} | {result['description']}"
+                  + (f" | {result['error']}" if result["error"] else ""), flush=True)
+
+        await asyncio.gather(*(run_one(s) for s in scenarios))
+        await browser.close()
+    return sorted(results, key=lambda r: r["scenario"])
+
+
+# ---- multi-process sharding ----
+
+def shard_worker(worker_id, url, columns, options, inbox, result_queue):
+    asyncio.run(_shard_worker(worker_id, url, columns, options, inbox, result_queue))
+
+
+async def _shard_worker(worker_id, url, columns, options, inbox, result_queue):
+    loop = asyncio.get_running_loop()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=not options["headed"])
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        while True:
+            batch = await loop.run_in_executor(None, inbox.get)
+            if batch is None:
+                break
+            batch_id, scenarios = batch
+            start = time.perf_counter()
+            patches = []
+            trace = [] if options["trace"] else None
+
+            async def run_one(scenario):
+                async with semaphore:
+                    return await run_scenario(browser, url, scenario, build_steps(columns, scenario["values"]),
+                                              options, patches, trace)
+
+            results = await asyncio.gather(*(run_one(s) for s in scenarios))
+            result_queue.put(("done", worker_id, batch_id, results, patches, trace or [], time.perf_counter() - start))
+        await browser.close()
+    if options["asset_cache"]:
+        print(f"Assets (worker {worker_id}): {open_cache(options['asset_cache']).summary()}", flush=True)
+
+
+def run_sharded(url, scenarios, columns, options, patches, processes, retries=1, batch_size=None, trace=None):
+    # returns (results, timing report)
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+    batch_size = batch_size or options["concurrency"]
+
+    # the coordinator hands out batches itself, so it always knows which worker owns which
+    batches = {}
+    waiting = []
+    def submit(chunk):
+        batch_id = len(batches)
+        batches[batch_id] = chunk
+        waiting.append(batch_id)
+
+    for i in range(0, len(scenarios), batch_size):
+        submit(scenarios[i:i + batch_size])
+
+    workers = {}
+    inboxes = {}
+    assigned = {}   # worker id -> batch id it is running, None when idle
+    stats = {}
+    def start_worker():
+        worker_id = len(workers)
+        inboxes[worker_id] = ctx.Queue()
+        proc = ctx.Process(target=shard_worker, args=(worker_id, url, columns, options, inboxes[worker_id], result_queue))
+        proc.start()
+        workers[worker_id] = proc
+        assigned[worker_id] = None
+        stats[worker_id] = {"worker": worker_id, "batches": 0, "scenarios": 0, "busy_seconds": 0.0, "crashed": False}
+
+    for _ in range(processes):
+        start_worker()
+
+    attempts = {}
+    final = {}
+    pending = len(batches)
+    while pending:
+        # a crashed worker's batch goes back on the queue; a replacement takes its slot
+        for worker_id, proc in list(workers.items()):
+            if proc.exitcode is None or stats[worker_id]["crashed"]:
+                continue
+            stats[worker_id]["crashed"] = True
+            batch_id, assigned[worker_id] = assigned[worker_id], None
+            if batch_id is not None:
+                pending -= 1
+                retry = []
+                for scenario in batches[batch_id]:
+                    attempts[scenario["index"]] = attempts.get(scenario["index"], 0) + 1
+                    if attempts[scenario["index"]] <= retries:
+                        retry.append(scenario)
+                    else:
+                        final[scenario["index"]] = {"scenario": scenario["index"], "description": scenario["description"],
+                                                    "status": "error", "error": "worker process crashed"}
+                if retry:
+                    submit(retry)
+                    pending += 1
+            print(f"[SHARD] worker {worker_id} exited" + ("" if batch_id is None else f", requeued batch {batch_id}"), flush=True)
+            start_worker()
+        if not pending:
+            break
+
+        for worker_id, batch_id in assigned.items():
+            if batch_id is None and waiting and not stats[worker_id]["crashed"]:
+                assigned[worker_id] = waiting.pop(0)
+                inboxes[worker_id].put((assigned[worker_id], batches[assigned[worker_id]]))
+
+        try:
+            msg = result_queue.get(timeout=1)
+        except queue.Empty:
+            continue
+
+        _, worker_id, batch_id, results, batch_patches, batch_trace, busy = msg
+        if assigned[worker_id] != batch_id:
+            continue   # already requeued after its worker was seen exiting
+        assigned[worker_id] = None
+        pending -= 1
+        patches.extend(batch_patches)
+        if trace is not None:
+            trace.extend(batch_trace)
+        stats[worker_id]["batches"] += 1
+        stats[worker_id]["scenarios"] += len(results)
+        stats[worker_id]["busy_seconds"] += busy
+
+        # infrastructure errors are retried, possibly on another worker; step failures are not
+        retry = []
+        for scenario, result in zip(batches[batch_id], results):
+            attempts[scenario["index"]] = attempts.get(scenario["index"], 0) + 1
+            result["attempts"] = attempts[scenario["index"]]
+            result["worker"] = worker_id
+            if result["status"] == "error" and attempts[scenario["index"]] <= retries:
+                retry.append(scenario)
+            else:
+                final[scenario["index"]] = result
+                print(f"[{len(final)}/{len(scenarios)}] {result['status'].upper()} | w{worker_id} | "
+                      f"{result['description']}" + (f" | {result['error']}" if result["error"] else ""), flush=True)
+        if retry:
+            submit(retry)
+            pending += 1
+
+    for worker_id, proc in workers.items():
+        if proc.exitcode is None:
+            inboxes[worker_id].put(None)
+    for proc in workers.values():
+        proc.join(timeout=30)
+
+    results = [final[i] for i in sorted(final)]
+    timing = {
+        "processes": processes,
+        "batch_size": batch_size,
+        "batches": len(batches),
+        "retried": sum(1 for a in attempts.values() if a > 1),
+        "workers": list(stats.values()),
+        "scenario_seconds": {str(r["scenario"]): r.get("seconds") for r in results},
+    }
+    return results, timing
+
+
+# ---- prefix-trie execution with browser-state forking ----
+
+# arg: none -> current value/checked state of every form control
+FORM_STATE_JS = """
+() => {
+    const { getAbsoluteXPath } = window.__xpathLocator;
+    return Array.from(document.querySelectorAll('input, select, textarea'))
+        .filter((el) => el.type !== 'file')
+        .map((el) => ({ path: getAbsoluteXPath(el), value: el.value, checked: el.checked }));
+}
+"""
+
+# arg: FORM_STATE_JS output -> restores it, firing input/change so frameworks see the values
+RESTORE_FORM_JS = """
+(state) => {
+    let restored = 0;
+    for (const item of state) {
+        const el = document.evaluate(item.path, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (!el) continue;
+        if (el.type === 'checkbox' || el.type === 'radio') {
+            if (el.checked === item.checked) continue;
+            el.checked = item.checked;
+        } else {
+            if (el.value === item.value) continue;
+            const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value').set;
+            setter.call(el, item.value);
+            el.dispatchEvent(new Event('input', { bubbles: true }));
+        }
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+        restored++;
+    }
+    return restored;
+}
+"""
+
+
+def build_trie(scenarios, columns):
+    root = {"step": None, "depth": 0, "children": {}, "scenarios": []}
+    for scenario in scenarios:
+        node = root
+        for step in build_steps(columns, scenario["values"]):
+            key = (step["index"], step["action"], str(step["value"]))
+            if key not in node["children"]:
+                node["children"][key] = {"step": step, "depth": node["depth"] + 1, "children": {}, "scenarios": []}
+            node = node["children"][key]
+        node["scenarios"].append(scenario)
+    return root
+
+
+def trie_scenarios(node):
+    found = list(node["scenarios"])
+    for child in node["children"].values():
+        found.extend(trie_scenarios(child))
+    return found
+
+
+class TrieRunner:
+    def __init__(self, browser, url, columns, options, patches, trace=None):
+        self.browser = browser
+        self.url = url
+        self.steps_total = len(columns)
+        self.options = options
+        self.patches = patches
+        self.trace = trace
+        self.results = {}
+        self.stats = {"steps": 0, "forks": 0}
+
+    def finish(self, scenario, status, steps_run, error="", failed_step=None, start=None):
+        self.results[scenario["index"]] = {
+            "scenario": scenario["index"],
+            "description": scenario["description"],
+            "status": status,
+            "steps_total": self.steps_total,
+            "steps_run": steps_run,
+            "failed_step": failed_step["index"] + 1 if failed_step else "",
+            "failed_label": failed_step["label"] if failed_step else "",
+            "error": error,
+            "expected": scenario["expected"],
+            "seconds": round(time.perf_counter() - start, 3) if start else "",
+        }
+        print(f"[{len(self.results)}] {status.upper()} | {scenario['description']}"
+              + (f" | {error}" if error else ""), flush=True)
+
+    async def run(self, root):
+        start = time.perf_counter()
+        context = await new_context(self.browser, self.options, self.options["storage_state"])
+        page = await context.new_page()
+        try:
+            await page.goto(self.url, wait_until="load")
+        except Exception as e:
+            for scenario in trie_scenarios(root):
+                self.finish(scenario, "error", 0, str(e).splitlines()[0], start=start)
+            await context.close()
+            return
+        await self.run_node(context, page, root, start)
+
+    async def run_node(self, context, page, node, start):
+        # node's own step first; the context is owned (and closed) by this call chain
+        if node["step"]:
+            try:
+                # a shared step is traced once, under the first scenario that runs through it
+                first = min(s["index"] for s in trie_scenarios(node))
+                await run_step(page, node["step"], self.options, self.patches, self.trace, first)
+                self.stats["steps"] += 1
+            except Exception as e:
+                for scenario in trie_scenarios(node):
+                    self.finish(scenario, "fail", node["depth"] - 1, str(e).splitlines()[0], node["step"], start)
+                await context.close()
+                return
+
+        for scenario in node["scenarios"]:
+            error = await check_expected(page, scenario["expected"], self.options["timeout"])
+            self.finish(scenario, "fail" if error else "pass", node["depth"], error, start=start)
+
+        children = list(node["children"].values())
+        if not children:
+            await context.close()
+            return
+
+        # branch point: fork every child but the last from a snapshot, the last continues here
+        if len(children) > 1:
+            snapshot = await self.capture(context, page)
+            forks = children[:-1]
+            size = self.options["concurrency"]
+            for i in range(0, len(forks), size):
+                await asyncio.gather(*(self.fork(snapshot, child, start) for child in forks[i:i + size]))
+        await self.run_node(context, page, children[-1], start)
+
+    async def capture(self, context, page):
+        await page.evaluate(LOCATOR_JS)
+        return {
+            "url": page.url,
+            "storage": await context.storage_state(),
+            "form": await page.evaluate(FORM_STATE_JS),
+        }
+
+    async def fork(self, snapshot, child, start):
+        self.stats["forks"] += 1
+        context = await new_context(self.browser, self.options, snapshot["storage"])
+        page = await context.new_page()
+        try:
+            await page.goto(snapshot["url"], wait_until="load")
+            await page.evaluate(LOCATOR_JS)
+            await page.evaluate(RESTORE_FORM_JS, snapshot["form"])
+        except Exception as e:
+            for scenario in trie_scenarios(child):
+                self.finish(scenario, "error", child["depth"] - 1, f"fork failed: {str(e).splitlines()[0]}", start=start)
+            await context.close()
+            return
+        await self.run_node(context, page, child, start)
+
+
+async def run_trie(url, scenarios, columns, options, patches, trace=None):
+    # returns (results, stats)
+    root = build_trie(scenarios, columns)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=not options["headed"])
+        runner = TrieRunner(browser, url, columns, options, patches, trace)
+        await runner.run(root)
+        await browser.close()
+    runner.stats["steps_without_trie"] = len(scenarios) * len(columns)
+    return [runner.results[i] for i in sorted(runner.results)], runner.stats
+
+
+def save_results(results, filename):
+    with open(filename, 'w', newline='') as f:
+        fieldnames = list(dict.fromkeys(key for r in results for key in r))
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def replay_options(options):
+    return {
+        "concurrency": int(options.get('concurrency', 8)),
+        "timeout": int(options.get('timeout', 5000)),
+        "heal": bool(options.get('heal')),
+        "headed": bool(options.get('headed')),
+        "storage_state": None,
+        "asset_cache": (options['asset-cache'] if isinstance(options.get('asset-cache'), str)
+                        else DEFAULT_CACHE_DIR if options.get('asset-cache') else None),
+        "trace": bool(options.get('trace')),
+        "settle": int(options.get('settle', 2000)),
+    }
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if len(args) < 2:
+        print("Usage: python replay_runner.py <session.json> <scenarios.csv> [--concurrency=8] [--url=<override>] "
+              "[--timeout=5000] [--heal] [--headed] [--out=<results.csv>]", flush=True)
+        sys.exit(1)
+
+    session = load_session(args[0])
+    url = options.get('url') or session["url"]
+    labels, scenarios = load_scenarios(args[1])
+    columns = join_columns(session["xpaths"], labels)
+    run_options = replay_options(options)
+    try:
+        run_options["storage_state"] = auth_state_for(url, options)
+    except Exception as e:
+        print(f"ERROR: {e}", flush=True)
+        sys.exit(1)
+
+    print(f"REPLAYING: {len(scenarios)} scenarios x {len(columns)} steps on {url}", flush=True)
+    processes = options.get('processes')
+    processes = os.cpu_count() if processes == 'auto' else int(processes or 1)
+
+    start = time.perf_counter()
+    patches = []
+    trace = [] if run_options["trace"] else None
+    timing = None
+    if options.get('trie'):
+        results, trie_stats = asyncio.run(run_trie(url, scenarios, columns, run_options, patches, trace))
+        print(f"Trie: {trie_stats['steps']} steps executed instead of {trie_stats['steps_without_trie']}, "
+              f"{trie_stats['forks']} forks", flush=True)
+    elif processes > 1:
+        batch_size = int(options['batch-size']) if options.get('batch-size') else None
+        results, timing = run_sharded(url, scenarios, columns, run_options, patches, processes,
+                                      int(options.get('retries', 1)), batch_size, trace)
+    else:
+        results = asyncio.run(run_all(url, scenarios, columns, run_options, patches, trace))
+    wall = time.perf_counter() - start
+
+    out = options.get('out') or f"replay_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    save_results(results, out)
+    passed = sum(1 for r in results if r["status"] == "pass")
+    print(f"Passed: {passed}/{len(results)} | Time: {wall:.1f}s", flush=True)
+    if run_options["asset_cache"] and (options.get('trie') or processes <= 1):
+        print(f"Assets: {open_cache(run_options['asset_cache']).summary()}", flush=True)
+    print(f"Saved: {out}", flush=True)
+    if timing:
+        timing.update(wall_seconds=wall, scenarios=len(results),
+                      scenarios_per_second=len(results) / wall if wall else None)
+        timing_file = out.rsplit('.', 1)[0] + "_timing.json"
+        with open(timing_file, 'w') as f:
+            json.dump(timing, f, indent=2)
+        print(f"Saved: {timing_file}", flush=True)
+    if trace is not None:
+        trace_file = out.rsplit('.', 1)[0] + "_trace.jsonl"
+        save_trace(trace, trace_file)
+        report = build_report(trace)
+        report_file = out.rsplit('.', 1)[0] + "_latency.json"
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        if trace:
+            overall = report["overall"]
+            print(f"Steps: {overall['steps']} | p50 {overall['p50_ms']:.1f} ms | p95 {overall['p95_ms']:.1f} ms | "
+                  f"slowest: {report['slowest'][0]['label']} ({report['slowest'][0]['total_ms']:.0f} ms)", flush=True)
+        print(f"Saved: {trace_file}", flush=True)
+        print(f"Saved: {report_file}", flush=True)
+    patch_file = write_patch(args[0], patches)
+    if patch_file:
+        print(f"Saved: {patch_file}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
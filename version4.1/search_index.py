@@ -0,0 +1,133 @@
+# search_index.py - Full-text search over every captured event in the session store
+# An SQLite FTS5 inverted index (in the same database as session_store.py) over
+# labels, values, XPaths, groups and URLs. Sessions are indexed incrementally as
+# they are saved. Queries match word prefixes; words with no prefix match fall
+# back to close terms from the index vocabulary, so typos still find results.
+#
+# Usage: python search_index.py update [--db=sessions.db]
+#        python search_index.py <query words...> [--limit=50] [--exact] [--db=sessions.db]
+
+import re
+import sys
+import time
+import sqlite3
+import difflib
+
+from session_store import DEFAULT_DB, SessionStore
+
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+    label, value, xpath, grp, url,
+    event_id UNINDEXED, session_id UNINDEXED,
+    tokenize = "unicode61 tokenchars '_-'"
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS event_search_vocab USING fts5vocab(event_search, 'row');
+CREATE TABLE IF NOT EXISTS search_indexed (session_id INTEGER PRIMARY KEY);
+"""
+
+SEARCH_QUERY = """
+SELECT f.session_id, f.event_id, s.captured_at, s.url AS session_url, f.label, f.value, f.grp AS "group",
+       f.xpath, bm25(event_search) AS rank
+FROM event_search f
+JOIN sessions s ON s.id = f.session_id
+WHERE event_search MATCH ?
+ORDER BY rank
+LIMIT ?
+"""
+
+WORD_RE = re.compile(r"[\w-]+")
+MAX_FUZZY_TERMS = 5
+
+
+class SearchIndex:
+    def __init__(self, path=DEFAULT_DB):
+        SessionStore(path).close()   # makes sure the session tables exist
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def index_session(self, session_id):
+        # one transaction per session; re-indexing a session replaces its rows
+        with self.conn:
+            self.conn.execute("DELETE FROM event_search WHERE session_id = ?", (session_id,))
+            self.conn.execute("""
+                INSERT INTO event_search (label, value, xpath, grp, url, event_id, session_id)
+                SELECT l.label, e.value, l.xpath, COALESCE(g.name, ''), COALESCE(e.page, s.url), e.id, e.session_id
+                FROM events e
+                JOIN sessions s ON s.id = e.session_id
+                JOIN locators l ON l.id = e.locator_id
+                LEFT JOIN groups g ON g.id = e.group_id
+                WHERE e.session_id = ?""", (session_id,))
+            self.conn.execute("INSERT OR IGNORE INTO search_indexed (session_id) VALUES (?)", (session_id,))
+
+    def update(self):
+        # indexes sessions saved since the last update and drops replaced/deleted ones
+        pending = [row[0] for row in self.conn.execute(
+            "SELECT id FROM sessions WHERE id NOT IN (SELECT session_id FROM search_indexed)")]
+        for session_id in pending:
+            self.index_session(session_id)
+        with self.conn:
+            gone = [row[0] for row in self.conn.execute(
+                "SELECT session_id FROM search_indexed WHERE session_id NOT IN (SELECT id FROM sessions)")]
+            for session_id in gone:
+                self.conn.execute("DELETE FROM event_search WHERE session_id = ?", (session_id,))
+                self.conn.execute("DELETE FROM search_indexed WHERE session_id = ?", (session_id,))
+        return len(pending)
+
+    def has_prefix(self, word):
+        return self.conn.execute("SELECT 1 FROM event_search_vocab WHERE term >= ? AND term < ? LIMIT 1",
+                                 (word, word + "\uffff")).fetchone() is not None
+
+    def close_terms(self, word):
+        # vocabulary terms sharing the first letter and of similar length, ranked by similarity
+        candidates = [row[0] for row in self.conn.execute(
+            "SELECT term FROM event_search_vocab WHERE term >= ? AND term < ? AND length(term) BETWEEN ? AND ?",
+            (word[0], word[0] + "\uffff", len(word) - 2, len(word) + 2))]
+        return difflib.get_close_matches(word, candidates, n=MAX_FUZZY_TERMS, cutoff=0.75)
+
+    def build_match(self, query, fuzzy=True):
+        # every word must match: as a prefix, or (fuzzy) as one of its closest indexed terms
+        clauses = []
+        for word in WORD_RE.findall(query.lower()):
+            options = [f'"{word}"*']
+            if fuzzy and len(word) > 2 and not self.has_prefix(word):
+                options += [f'"{term}"' for term in self.close_terms(word)]
+            clauses.append("(" + " OR ".join(options) + ")")
+        return " AND ".join(clauses)
+
+    def search(self, query, limit=50, fuzzy=True):
+        match = self.build_match(query, fuzzy)
+        if not match:
+            return []
+        return [dict(row) for row in self.conn.execute(SEARCH_QUERY, (match, limit))]
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, options = parse_args(sys.argv[1:])
+    if not args:
+        print("Usage: python search_index.py update [--db=sessions.db]", flush=True)
+        print("       python search_index.py <query words...> [--limit=50] [--exact] [--db=sessions.db]", flush=True)
+        sys.exit(1)
+
+    index = SearchIndex(options.get('db') or DEFAULT_DB)
+    if args == ["update"]:
+        print(f"Indexed: {index.update()} sessions", flush=True)
+    else:
+        index.update()
+        start = time.perf_counter()
+        results = index.search(" ".join(args), int(options.get('limit', 50)), fuzzy=not options.get('exact'))
+        elapsed = (time.perf_counter() - start) * 1000
+        for r in results:
+            print(f"[{r['session_id']}] {r['captured_at'][:19]} | {r['group'] or '-'} | {r['label']} | "
+                  f"{r['value'] or '-'} | {r['xpath']}", flush=True)
+        print(f"{len(results)} results in {elapsed:.1f} ms", flush=True)
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
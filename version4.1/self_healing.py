@@ -0,0 +1,301 @@
+# self_healing.py - Heal broken locators at replay time
+# On a miss (0 or >1 matches) the page builds a candidate index once - keyed by
+# tag + stable attribute and tag + normalized text - and scores the indexed
+# candidates against the element fingerprint stored at record time. Healed
+# locators are written next to the session as a suggested patch.
+#
+# Usage: python self_healing.py check <session.json> [--url=<override>]
+#        python self_healing.py apply <session.json> [patch.json]
+
+import sys
+import json
+from pathlib import Path
+from datetime import datetime
+
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+from locator_batch import resolve_batch
+from recorder import LOCATOR_JS, parse_args
+from session_io import load_session, unique_locators
+
+
+# Installs window.__xpathHeal = { heal(fingerprint), invalidate() }
+HEAL_JS = """
+(function () {
+    if (window.__xpathHeal) return;
+    const { getXPath, countMatches } = window.__xpathLocator;
+    const ATTRS = [['id', 'id'], ['name', 'name'], ['data-testid', 'testid'], ['aria-label', 'ariaLabel'],
+                   ['placeholder', 'placeholder'], ['role', 'role'], ['type', 'type'], ['href', 'href']];
+    const WEIGHTS = { id: 5, testid: 5, name: 4, ariaLabel: 3, placeholder: 3, text: 3, href: 2,
+                      classes: 2, role: 1, type: 1, parentTag: 0.5 };
+    const MAX_TEXT_BUCKET = 200;
+
+    let index = null;
+
+    function normText(el) {
+        return (el.textContent || '').replace(/\\s+/g, ' ').trim().slice(0, 50);
+    }
+
+    function add(key, el) {
+        let bucket = index.get(key);
+        if (!bucket) index.set(key, bucket = []);
+        bucket.push(el);
+    }
+
+    // one pass over the DOM; rebuilt lazily after the page mutates
+    function buildIndex() {
+        index = new Map();
+        for (const el of document.body.querySelectorAll('*')) {
+            const tag = el.tagName.toLowerCase();
+            add(tag, el);
+            for (const [attr, field] of ATTRS) {
+                const value = el.getAttribute(attr);
+                if (value) add(tag + '|' + field + '=' + value, el);
+            }
+            // short texts only, so containers of the target do not flood the bucket
+            const text = (el.textContent || '').replace(/\\s+/g, ' ').trim();
+            if (text && text.length <= 50) add(tag + '|text=' + text, el);
+        }
+        return index;
+    }
+
+    // only changes to what the index keys on drop it (class/style toggles do not)
+    new MutationObserver(() => { index = null; })
+        .observe(document.documentElement, { childList: true, subtree: true,
+                                             attributeFilter: ATTRS.map(([attr]) => attr) });
+
+    function score(el, fp) {
+        let total = 0, max = 0;
+        const check = (field, actual) => {
+            if (!fp[field]) return;
+            max += WEIGHTS[field];
+            if (actual === fp[field]) total += WEIGHTS[field];
+        };
+        for (const [attr, field] of ATTRS) check(field, el.getAttribute(attr) || '');
+        check('parentTag', el.parentElement ? el.parentElement.tagName.toLowerCase() : '');
+
+        if (fp.text) {
+            max += WEIGHTS.text;
+            const text = normText(el);
+            if (text === fp.text) total += WEIGHTS.text;
+            else if (text && (text.includes(fp.text) || fp.text.includes(text))) total += WEIGHTS.text / 2;
+        }
+        if (fp.classes && fp.classes.length) {
+            max += WEIGHTS.classes;
+            const classes = new Set(typeof el.className === 'string' ? el.className.trim().split(/\\s+/) : []);
+            const shared = fp.classes.filter((c) => classes.has(c)).length;
+            total += WEIGHTS.classes * shared / new Set([...fp.classes, ...classes]).size;
+        }
+        return max ? total / max : 0;
+    }
+
+    function heal(fp) {
+        const start = performance.now();
+        const rebuilt = !index;
+        if (rebuilt) buildIndex();
+
+        // candidates come only from index buckets matching the fingerprint
+        const candidates = new Set();
+        for (const [, field] of ATTRS) {
+            if (fp[field]) (index.get(fp.tag + '|' + field + '=' + fp[field]) || []).forEach((el) => candidates.add(el));
+        }
+        if (fp.text) (index.get(fp.tag + '|text=' + fp.text) || []).forEach((el) => candidates.add(el));
+        if (candidates.size === 0) {
+            const bucket = index.get(fp.tag) || [];
+            if (bucket.length <= MAX_TEXT_BUCKET) bucket.forEach((el) => candidates.add(el));
+        }
+
+        let best = null, bestScore = 0, secondScore = 0;
+        for (const el of candidates) {
+            const s = score(el, fp);
+            if (s > bestScore) { secondScore = bestScore; bestScore = s; best = el; }
+            else if (s > secondScore) secondScore = s;
+        }
+        const result = { found: !!best, score: bestScore, runnerUp: secondScore, candidates: candidates.size,
+                         indexRebuilt: rebuilt, ms: 0, xpath: null, strategy: null, matches: 0 };
+        if (best) {
+            const locator = getXPath(best);
+            result.xpath = locator.xpath;
+            result.strategy = locator.strategy;
+            result.matches = countMatches(locator.xpath);
+        }
+        result.ms = performance.now() - start;
+        return result;
+    }
+
+    window.__xpathHeal = { heal, invalidate: () => { index = null; } };
+})();
+"""
+
+MIN_SCORE = 0.5
+ATTACH_TIMEOUT_MS = 2000   # how long a step's element may take to render before it counts as missing
+
+
+def install(page):
+    page.evaluate(LOCATOR_JS)
+    page.evaluate(HEAL_JS)
+
+
+def heal_locator(page, entry):
+    # returns the heal result dict, or None if the entry has no fingerprint
+    if not entry.get("fingerprint"):
+        return None
+    if not page.evaluate("() => !!window.__xpathHeal"):
+        install(page)
+    return page.evaluate("(fp) => window.__xpathHeal.heal(fp)", entry["fingerprint"])
+
+
+async def heal_locator_async(page, entry):
+    if not entry.get("fingerprint"):
+        return None
+    if not await page.evaluate("() => !!window.__xpathHeal"):
+        await page.evaluate(LOCATOR_JS)
+        await page.evaluate(HEAL_JS)
+    return await page.evaluate("(fp) => window.__xpathHeal.heal(fp)", entry["fingerprint"])
+
+
+def make_patch(entry, old_matches, result):
+    # a suggested replacement, or None if healing was not confident
+    if not result or not result["found"] or result["score"] < MIN_SCORE or result["matches"] != 1:
+        return None
+    return {
+        "label": entry["label"],
+        "action": entry["action"],
+        "old_xpath": entry["xpath"],
+        "old_matches": old_matches,
+        "new_xpath": result["xpath"],
+        "new_strategy": result["strategy"],
+        "score": round(result["score"], 3),
+        "runner_up": round(result["runnerUp"], 3),
+        "heal_ms": round(result["ms"], 3),
+        "healed_at": datetime.now().isoformat(),
+    }
+
+
+def resolve_with_healing(page, entry, patches, timeout_ms=ATTACH_TIMEOUT_MS):
+    # returns the xpath to use for this step; appends a patch when it had to heal
+    locator = page.locator(f"xpath={entry['xpath']}")
+    # the element may still be rendering after the previous step: only a real miss heals
+    try:
+        locator.first.wait_for(state="attached", timeout=timeout_ms)
+    except PlaywrightTimeoutError:
+        pass
+    count = locator.count()
+    if count == 1:
+        return entry["xpath"]
+    patch = make_patch(entry, count, heal_locator(page, entry))
+    if patch:
+        patches.append(patch)
+        print(f"[HEALED] {entry['label']}: {entry['xpath']} -> {patch['new_xpath']} "
+              f"(score {patch['score']}, {patch['heal_ms']:.1f} ms)", flush=True)
+        return patch["new_xpath"]
+    return entry["xpath"]
+
+
+async def resolve_with_healing_async(page, entry, patches, timeout_ms=ATTACH_TIMEOUT_MS):
+    locator = page.locator(f"xpath={entry['xpath']}")
+    try:
+        await locator.first.wait_for(state="attached", timeout=timeout_ms)
+    except PlaywrightTimeoutError:
+        pass
+    count = await locator.count()
+    if count == 1:
+        return entry["xpath"]
+    patch = make_patch(entry, count, await heal_locator_async(page, entry))
+    if patch:
+        patches.append(patch)
+        return patch["new_xpath"]
+    return entry["xpath"]
+
+
+def patch_path_for(session_path):
+    path = Path(session_path)
+    return path.with_name(path.stem + ".heal.json")
+
+
+def write_patch(session_path, patches):
+    # merges with any existing suggestions; last suggestion per (old_xpath, action) wins
+    if not patches:
+        return None
+    patch_file = patch_path_for(session_path)
+    existing = []
+    if patch_file.exists():
+        with open(patch_file) as f:
+            existing = json.load(f)["patches"]
+    merged = {(p["old_xpath"], p["action"]): p for p in existing + patches}
+    with open(patch_file, 'w') as f:
+        json.dump({"session": str(session_path), "patches": list(merged.values())}, f, indent=2)
+    return patch_file
+
+
+def apply_patch(session_path, patch_file=None):
+    patch_file = Path(patch_file) if patch_file else patch_path_for(session_path)
+    with open(patch_file) as f:
+        patches = {(p["old_xpath"], p["action"]): p for p in json.load(f)["patches"]}
+    with open(session_path) as f:
+        data = json.load(f)
+
+    applied = 0
+    for item in data["xpaths"]:
+        action = "Input" if item.get("action") == "change" else item.get("action")
+        patch = patches.get((item["xpath"], action))
+        if patch:
+            item["previous_xpath"] = item["xpath"]
+            item["xpath"] = patch["new_xpath"]
+            item["strategy"] = patch["new_strategy"]
+            item["matches"] = 1
+            applied += 1
+
+    with open(session_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return applied
+
+
+def check_session(session_path, url_override=None):
+    session = load_session(session_path)
+    locators = unique_locators(session["xpaths"])
+    pages = {}
+    for loc in locators:
+        pages.setdefault(url_override or loc["page"], []).append(loc)
+
+    patches = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        for page_url, entries in pages.items():
+            page.goto(page_url, wait_until="load")
+            results, _ = resolve_batch(page, [e["xpath"] for e in entries])
+            for entry, res in zip(entries, results):
+                if res["count"] == 1:
+                    continue
+                patch = make_patch(entry, res["count"], heal_locator(page, entry))
+                if patch:
+                    patches.append(patch)
+                    print(f"[HEALED] {entry['label']}: {entry['xpath']} -> {patch['new_xpath']} "
+                          f"(score {patch['score']})", flush=True)
+                else:
+                    print(f"[BROKEN] {entry['label']}: {entry['xpath']} ({res['count']} matches)", flush=True)
+        browser.close()
+    return patches
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if len(args) < 2 or args[0] not in ("check", "apply"):
+        print("Usage: python self_healing.py check <session.json> [--url=<override>]", flush=True)
+        print("       python self_healing.py apply <session.json> [patch.json]", flush=True)
+        sys.exit(1)
+
+    if args[0] == "check":
+        patches = check_session(args[1], options.get('url') or None)
+        patch_file = write_patch(args[1], patches)
+        print(f"Healed: {len(patches)} locators", flush=True)
+        if patch_file:
+            print(f"Saved: {patch_file}", flush=True)
+    else:
+        applied = apply_patch(args[1], args[2] if len(args) > 2 else None)
+        print(f"Applied: {applied} patched locators to {args[1]}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# session_archive.py - Columnar Parquet archive of recorded sessions for analytics
+# Exports events from the session store into a Parquet dataset partitioned by
+# app and date (hive layout: archive/app=<host>/date=<YYYY-MM-DD>/part-*.parquet).
+# Repeated strings (app, url, label, strategy, action, group, page) are
+# dictionary-encoded. Analyses read only the columns they need and push app/date
+# filters down to partition pruning and row-group statistics.
+#
+# Usage: python session_archive.py export [--db=sessions.db] [--archive=session_archive]
+#        python session_archive.py compact [--archive=session_archive]
+#        python session_archive.py strategy-mix|absolute-rate|regressions [--app=<host>]
+#            [--since=YYYY-MM-DD] [--until=YYYY-MM-DD] [--archive=session_archive]
+
+import sys
+import json
+import shutil
+import time
+from pathlib import Path
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from recorder import parse_args
+from session_store import DEFAULT_DB, SessionStore
+from locator_catalog import session_key
+
+
+DEFAULT_ARCHIVE = str(Path(__file__).parent / "session_archive")
+EXPORTED_FILE = "_exported.json"   # content keys of the sessions already in the archive
+
+DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema([
+    ("app", pa.string()),
+    ("date", pa.string()),
+    ("session_id", pa.int64()),
+    ("session_at", pa.timestamp("us")),
+    ("url", DICT_STRING),
+    ("seq", pa.int32()),
+    ("step", pa.int32()),
+    ("captured_at", pa.timestamp("us")),
+    ("label", DICT_STRING),
+    ("xpath", pa.string()),
+    ("strategy", DICT_STRING),
+    ("action", DICT_STRING),
+    ("value", pa.string()),
+    ("matches", pa.int32()),
+    ("group", DICT_STRING),
+    ("page", DICT_STRING),
+])
+PARTITIONING = ds.partitioning(pa.schema([("app", pa.string()), ("date", pa.string())]), flavor="hive")
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def session_rows(session, events):
+    session_at = _timestamp(session["captured_at"])
+    for event in events:
+        yield {
+            "app": session["app"] or "unknown",
+            "date": session["captured_at"][:10],
+            "session_id": session["id"],
+            "session_at": session_at,
+            "url": session["url"],
+            "seq": event["seq"],
+            "step": event["step"],
+            "captured_at": _timestamp(event["captured_at"]) or session_at,
+            "label": event["label"],
+            "xpath": event["xpath"],
+            "strategy": event["strategy"],
+            "action": event["action"],
+            "value": event["values"],
+            "matches": event["matches"],
+            "group": event["group"],
+            "page": event["page"],
+        }
+
+
+def write_options():
+    return ds.ParquetFileFormat().make_write_options(compression="zstd", use_dictionary=True)
+
+
+def export(db_path, archive):
+    # appends sessions not yet archived; returns (sessions, rows) written.
+    # Sessions are keyed by content, not store id, so a re-imported session is not archived twice
+    archive = Path(archive)
+    archive.mkdir(parents=True, exist_ok=True)
+    exported_file = archive / EXPORTED_FILE
+    exported = set(json.loads(exported_file.read_text())) if exported_file.exists() else set()
+
+    store = SessionStore(db_path)
+    sessions, rows = [], []
+    for session in sorted(store.list_sessions(limit=-1), key=lambda s: s["captured_at"]):
+        events = store.session_events(session["id"])
+        key = session_key(session["url"], session["captured_at"], events)
+        # older archives recorded store ids
+        if key in exported or session["id"] in exported:
+            exported.discard(session["id"])
+            exported.add(key)
+            continue
+        exported.add(key)
+        sessions.append(session)
+        rows.extend(session_rows(session, events))
+    store.close()
+    if rows:
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        ds.write_dataset(table, archive, format="parquet", partitioning=PARTITIONING,
+                         basename_template=f"part-{int(time.time())}-{{i}}.parquet",
+                         existing_data_behavior="overwrite_or_ignore", file_options=write_options())
+    # written after the data, so a failed write leaves its sessions pending
+    exported_file.write_text(json.dumps(sorted(key for key in exported if isinstance(key, str))))
+    return len(sessions), len(rows)
+
+
+def compact(archive):
+    # rewrites every partition as one file per partition, streaming through the scanner
+    archive = Path(archive)
+    tmp = archive.with_name(archive.name + ".compacting")
+    shutil.rmtree(tmp, ignore_errors=True)
+    dataset = open_archive(archive)
+    ds.write_dataset(dataset, tmp, format="parquet", partitioning=PARTITIONING, basename_template="part-0-{i}.parquet",
+                     file_options=write_options())
+    if (archive / EXPORTED_FILE).exists():
+        shutil.copyfile(archive / EXPORTED_FILE, tmp / EXPORTED_FILE)
+    shutil.rmtree(archive)
+    tmp.rename(archive)
+
+
+def open_archive(archive):
+    return ds.dataset(archive, format="parquet", partitioning=PARTITIONING,
+                      exclude_invalid_files=True, ignore_prefixes=["_", "."])
+
+
+def scan(archive, columns, app=None, since=None, until=None):
+    # column-pruned scan; app/date filters prune partitions before any file is read
+    expression = None
+    for condition in (ds.field("app") == app if app else None,
+                      ds.field("date") >= since if since else None,
+                      ds.field("date") < until if until else None):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+    return open_archive(archive).to_table(columns=columns, filter=expression).to_pandas()
+
+
+def strategy_mix(archive, **filters):
+    df = scan(archive, ["app", "strategy"], **filters)
+    counts = df.groupby(["app", "strategy"], observed=True).size().rename("events").reset_index()
+    counts["share"] = counts["events"] / counts.groupby("app")["events"].transform("sum")
+    return counts.sort_values(["app", "events"], ascending=[True, False])
+
+
+def absolute_rate(archive, **filters):
+    # share of captured events that fell back to an absolute XPath, per app and month
+    df = scan(archive, ["app", "date", "strategy"], **filters)
+    df["month"] = df["date"].str[:7]
+    df["absolute"] = df["strategy"].astype(str) == "absolute"
+    return (df.groupby(["app", "month"], observed=True)["absolute"]
+            .agg(events="size", absolute="sum", rate="mean").reset_index())
+
+
+def regressions(archive, **filters):
+    # locators that were unique in one session and not in the next session that used them
+    df = scan(archive, ["app", "session_id", "session_at", "label", "xpath", "matches"], **filters)
+    df = df.dropna(subset=["matches"]).drop_duplicates(["app", "session_id", "xpath"])
+    df = df.sort_values(["app", "xpath", "session_at"])
+    df["prev_matches"] = df.groupby(["app", "xpath"], observed=True)["matches"].shift()
+    df["prev_session"] = df.groupby(["app", "xpath"], observed=True)["session_id"].shift()
+    broken = df[(df["prev_matches"] == 1) & (df["matches"] != 1)]
+    return broken[["app", "label", "xpath", "prev_session", "session_id", "session_at", "prev_matches", "matches"]]
+
+
+ANALYSES = {"strategy-mix": strategy_mix, "absolute-rate": absolute_rate, "regressions": regressions}
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    archive = options.get('archive') or DEFAULT_ARCHIVE
+    command = args[0] if args else None
+
+    if command == "export":
+        start = time.perf_counter()
+        sessions, rows = export(options.get('db') or DEFAULT_DB, archive)
+        print(f"Archived: {sessions} sessions, {rows} events in {time.perf_counter() - start:.2f}s", flush=True)
+        print(f"Saved: {archive}", flush=True)
+    elif command == "compact":
+        compact(archive)
+        print(f"Compacted: {archive}", flush=True)
+    elif command in ANALYSES:
+        filters = {key: options.get(key) or None for key in ("app", "since", "until")}
+        start = time.perf_counter()
+        result = ANALYSES[command](archive, **filters)
+        print(result.to_string(index=False), flush=True)
+        print(f"\n{len(result)} rows in {time.perf_counter() - start:.2f}s", flush=True)
+        if options.get('out'):
+            result.to_csv(options['out'], index=False)
+            print(f"Saved: {options['out']}", flush=True)
+    else:
+        print("Usage: python session_archive.py export [--db=sessions.db] [--archive=session_archive]", flush=True)
+        print("       python session_archive.py compact [--archive=session_archive]", flush=True)
+        print("       python session_archive.py strategy-mix|absolute-rate|regressions [--app=<host>] "
+              "[--since=YYYY-MM-DD] [--until=YYYY-MM-DD] [--archive=session_archive] [--out=<csv>]", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# session_io.py - Load saved sessions into one common shape
+# Handles recorder JSON (old and new), recorder CSV and the Live View CSV export
+# (which adds a Group column). Every entry gets label/xpath/strategy/matches/
+# action/values/group/page keys.
+
+import csv
+import json
+from pathlib import Path
+
+
+def normalize_entry(item, default_page=""):
+    action = item.get("action", "click")
+    return {
+        "label": item.get("label", ""),
+        "xpath": item.get("xpath", ""),
+        "strategy": item.get("strategy", ""),
+        "matches": int(item["matches"]) if str(item.get("matches", "")).strip().isdigit() else None,
+        # older sessions used "change" for what the recorder now calls "Input"
+        "action": "Input" if action == "change" else action,
+        "values": item.get("values", ""),
+        "group": item.get("group") or "",
+        "page": item.get("page") or default_page,
+        **{k: v for k, v in item.items() if k in ("step", "fingerprint")},
+    }
+
+
+def load_session(path):
+    path = Path(path)
+    if path.suffix == ".csv":
+        return load_session_csv(path)
+
+    with open(path) as f:
+        data = json.load(f)
+    url = data.get("url", "")
+    return {
+        "path": str(path),
+        "url": url,
+        "captured_at": data.get("captured_at", ""),
+        "xpaths": [normalize_entry(item, url) for item in data.get("xpaths", [])],
+    }
+
+
+def load_session_csv(path, url=""):
+    # recorder CSV: Label,XPath,Strategy,Matches,Action,Value
+    # Live View export: ,Group,Element,Action,Value,Strategy,XPath
+    entries = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            entries.append(normalize_entry({
+                "label": row.get("Label") or row.get("Element", ""),
+                "xpath": row.get("XPath", ""),
+                "strategy": row.get("Strategy", ""),
+                "matches": row.get("Matches", ""),
+                "action": row.get("Action", "click"),
+                "values": row.get("Value", ""),
+                "group": row.get("Group", ""),
+            }, url))
+    return {"path": str(path), "url": url, "captured_at": "", "xpaths": entries}
+
+
+def unique_locators(entries):
+    # one entry per distinct (page, xpath), keeping the first label seen
+    seen = {}
+    for entry in entries:
+        key = (entry["page"], entry["xpath"])
+        if entry["xpath"] and key not in seen:
+            seen[key] = entry
+    return list(seen.values())
@@ -0,0 +1,285 @@
+# session_store.py - SQLite store for recorded sessions
+# One database instead of loose xpaths_*.json/.csv files: sessions, their
+# groups, the distinct locators and every captured event, indexed on URL,
+# label, xpath, strategy and time. The recorder writes each session in a single
+# transaction; the dashboard lists and filters sessions with indexed queries.
+# A per-session manifest (click/input counts, groups, first/last event time) is
+# written with each session, so listings never scan events.
+#
+# Usage: python session_store.py import <session files or globs...> [--db=sessions.db]
+#        python session_store.py list [--url=<substring>] [--since=YYYY-MM-DD] [--db=sessions.db]
+#        python session_store.py stats [--db=sessions.db]
+
+import sys
+import glob
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlparse
+
+from session_io import load_session
+
+
+DEFAULT_DB = str(Path(__file__).parent / "sessions.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,   -- ids are never reused, derived indexes key on them
+    url TEXT NOT NULL,
+    app TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    source_path TEXT UNIQUE,
+    total_elements INTEGER NOT NULL,
+    snapshots_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    UNIQUE (session_id, name)
+);
+CREATE TABLE IF NOT EXISTS locators (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    xpath TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    UNIQUE (xpath, label, strategy)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    step INTEGER,
+    locator_id INTEGER NOT NULL REFERENCES locators(id),
+    group_id INTEGER REFERENCES groups(id),
+    action TEXT NOT NULL,
+    value TEXT,
+    matches INTEGER,
+    page TEXT,
+    captured_at TEXT,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS session_manifest (
+    session_id INTEGER PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+    clicks INTEGER NOT NULL,
+    inputs INTEGER NOT NULL,
+    groups TEXT NOT NULL,   -- JSON list in recorded order
+    first_event_at TEXT,
+    last_event_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_url ON sessions(url);
+CREATE INDEX IF NOT EXISTS idx_sessions_app_time ON sessions(app, captured_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_time ON sessions(captured_at);
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups(name);
+CREATE INDEX IF NOT EXISTS idx_locators_label ON locators(label);
+CREATE INDEX IF NOT EXISTS idx_locators_strategy ON locators(strategy);
+CREATE INDEX IF NOT EXISTS idx_events_session ON events(session_id, seq);
+CREATE INDEX IF NOT EXISTS idx_events_locator ON events(locator_id);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events(captured_at);
+"""
+
+# events joined back into the recorder's entry shape
+EVENT_QUERY = """
+SELECT e.seq, l.label, l.xpath, l.strategy, e.matches, e.action, e.value AS "values", e.step, e.page,
+       COALESCE(g.name, '') AS "group", e.captured_at, e.fingerprint
+FROM events e
+JOIN locators l ON l.id = e.locator_id
+LEFT JOIN groups g ON g.id = e.group_id
+WHERE e.session_id = ?
+ORDER BY e.seq
+"""
+
+
+def data_version(path=DEFAULT_DB):
+    # changes whenever anything is written to the database (WAL included); cache key for readers
+    return tuple(Path(f"{path}{suffix}").stat().st_mtime_ns if Path(f"{path}{suffix}").exists() else 0
+                 for suffix in ("", "-wal"))
+
+
+def app_of(url):
+    parsed = urlparse(url)
+    return parsed.netloc or url
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.update_manifest()
+
+    def close(self):
+        self.conn.close()
+
+    def locator_id(self, label, xpath, strategy):
+        self.conn.execute("INSERT OR IGNORE INTO locators (label, xpath, strategy) VALUES (?, ?, ?)",
+                          (label, xpath, strategy or ""))
+        return self.conn.execute("SELECT id FROM locators WHERE xpath = ? AND label = ? AND strategy = ?",
+                                 (xpath, label, strategy or "")).fetchone()[0]
+
+    def save_session(self, url, entries, captured_at=None, source_path=None, snapshots_dir=None):
+        # the whole session in one transaction; returns its id
+        captured_at = captured_at or datetime.now().isoformat()
+        source_path = str(Path(source_path).resolve()) if source_path else None
+        with self.conn:
+            if source_path:
+                # re-importing a file replaces its earlier copy
+                self.conn.execute("DELETE FROM sessions WHERE source_path = ?", (source_path,))
+            session_id = self.conn.execute(
+                "INSERT INTO sessions (url, app, captured_at, source_path, total_elements, snapshots_dir) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, app_of(url), captured_at, source_path, len(entries), snapshots_dir)).lastrowid
+
+            group_ids = {}
+            for name in dict.fromkeys(e.get("group") or "" for e in entries):
+                if name:
+                    group_ids[name] = self.conn.execute(
+                        "INSERT INTO groups (session_id, name, position) VALUES (?, ?, ?)",
+                        (session_id, name, len(group_ids))).lastrowid
+
+            rows = []
+            for seq, entry in enumerate(entries):
+                fingerprint = entry.get("fingerprint")
+                rows.append((
+                    session_id, seq, entry.get("step"),
+                    self.locator_id(entry["label"], entry["xpath"], entry.get("strategy")),
+                    group_ids.get(entry.get("group") or ""),
+                    entry["action"], str(entry.get("values", "")), entry.get("matches"),
+                    entry.get("page") or url, entry.get("timestamp") or captured_at,
+                    json.dumps(fingerprint) if fingerprint else None,
+                ))
+            self.conn.executemany(
+                "INSERT INTO events (session_id, seq, step, locator_id, group_id, action, value, matches, page, "
+                "captured_at, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.write_manifest(session_id)
+        return session_id
+
+    def write_manifest(self, session_id):
+        clicks, inputs, first, last = self.conn.execute(
+            "SELECT COALESCE(SUM(action = 'click'), 0), COALESCE(SUM(action IN ('change', 'Input')), 0), "
+            "MIN(captured_at), MAX(captured_at) FROM events WHERE session_id = ?", (session_id,)).fetchone()
+        groups = [row[0] for row in self.conn.execute(
+            "SELECT name FROM groups WHERE session_id = ? ORDER BY position", (session_id,))]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO session_manifest (session_id, clicks, inputs, groups, first_event_at, last_event_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)", (session_id, clicks, inputs, json.dumps(groups), first, last))
+
+    def update_manifest(self):
+        # fills in manifests for sessions stored before the manifest existed
+        with self.conn:
+            missing = [row[0] for row in self.conn.execute(
+                "SELECT id FROM sessions WHERE id NOT IN (SELECT session_id FROM session_manifest)")]
+            for session_id in missing:
+                self.write_manifest(session_id)
+        return len(missing)
+
+    def import_file(self, path):
+        session = load_session(path)
+        with open(path) as f:
+            raw = json.load(f) if Path(path).suffix == ".json" else {}
+        return self.save_session(session["url"], session["xpaths"], session["captured_at"] or None,
+                                 path, raw.get("snapshots_dir"))
+
+    def list_sessions(self, url_filter=None, since=None, until=None, limit=500):
+        where, params = [], []
+        if url_filter:
+            where.append("url LIKE ?")
+            params.append(f"%{url_filter}%")
+        if since:
+            where.append("captured_at >= ?")
+            params.append(since)
+        if until:
+            where.append("captured_at < ?")
+            params.append(until)
+        sql = ("SELECT id, url, app, captured_at, total_elements, source_path, snapshots_dir, "
+               "m.clicks, m.inputs, m.groups, m.first_event_at, m.last_event_at "
+               "FROM sessions LEFT JOIN session_manifest m ON m.session_id = sessions.id"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY captured_at DESC LIMIT ?")
+        sessions = [dict(row) for row in self.conn.execute(sql, params + [limit])]
+        for session in sessions:
+            session["groups"] = json.loads(session["groups"] or "[]")
+        return sessions
+
+    def source_paths(self):
+        return {row[0] for row in self.conn.execute("SELECT source_path FROM sessions WHERE source_path IS NOT NULL")}
+
+    def get_session(self, session_id):
+        row = self.conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return dict(row) if row else None
+
+    def session_events(self, session_id):
+        events = []
+        for row in self.conn.execute(EVENT_QUERY, (session_id,)):
+            event = dict(row)
+            event["fingerprint"] = json.loads(event["fingerprint"]) if event["fingerprint"] else None
+            events.append(event)
+        return events
+
+    def session_data(self, session_id):
+        # the session in the recorder's JSON layout
+        session = self.get_session(session_id)
+        events = self.session_events(session_id)
+        for event in events:
+            del event["seq"]
+        data = {"url": session["url"], "captured_at": session["captured_at"],
+                "total_elements": session["total_elements"], "xpaths": events}
+        if session["snapshots_dir"]:
+            data["snapshots_dir"] = session["snapshots_dir"]
+        return data
+
+    def sessions_using(self, label=None, xpath=None, strategy=None, limit=500):
+        where, params = [], []
+        for column, value in (("label", label), ("xpath", xpath), ("strategy", strategy)):
+            if value:
+                where.append(f"l.{column} = ?")
+                params.append(value)
+        sql = ("SELECT DISTINCT s.id, s.url, s.captured_at FROM sessions s "
+               "JOIN events e ON e.session_id = s.id JOIN locators l ON l.id = e.locator_id"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY s.captured_at DESC LIMIT ?")
+        return [dict(row) for row in self.conn.execute(sql, params + [limit])]
+
+    def stats(self):
+        return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("sessions", "groups", "locators", "events", "session_manifest")}
+
+
+def main():
+    from recorder import parse_args   # recorder imports this module
+    args, options = parse_args(sys.argv[1:])
+    store = SessionStore(options.get('db') or DEFAULT_DB)
+
+    if len(args) > 1 and args[0] == "import":
+        paths = [p for pattern in args[1:] for p in sorted(glob.glob(pattern, recursive=True))]
+        imported = 0
+        for path in paths:
+            try:
+                session_id = store.import_file(path)
+                imported += 1
+                print(f"[{session_id}] {path}", flush=True)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"ERROR: {path}: {e}", flush=True)
+        print(f"Imported: {imported}/{len(paths)} sessions", flush=True)
+    elif args and args[0] == "list":
+        for s in store.list_sessions(options.get('url') or None, options.get('since') or None):
+            print(f"[{s['id']}] {s['captured_at'][:19]} | {s['total_elements']:>4} elements | {s['clicks']} clicks, "
+                  f"{s['inputs']} inputs | {s['url']} | groups: {', '.join(s['groups']) or '-'}", flush=True)
+    elif args and args[0] == "stats":
+        print(" | ".join(f"{k}: {v}" for k, v in store.stats().items()), flush=True)
+    else:
+        print("Usage: python session_store.py import <session files or globs...> [--db=sessions.db]", flush=True)
+        print("       python session_store.py list [--url=<substring>] [--since=YYYY-MM-DD] [--db=sessions.db]", flush=True)
+        print("       python session_store.py stats [--db=sessions.db]", flush=True)
+        sys.exit(1)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
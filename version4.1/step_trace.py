@@ -0,0 +1,190 @@
+# step_trace.py - Per-step latency tracing for replay runs and the timing report
+# Each traced step records how long locator resolution, the action itself and the
+# page settling afterwards took, plus the network requests it triggered. The
+# report aggregates percentiles per element, group and locator strategy and
+# ranks the slowest steps.
+#
+# Usage: python step_trace.py <trace.jsonl> [--top=20] [--out=<report.json>]
+
+import sys
+import json
+import time
+import asyncio
+import weakref
+
+from recorder import parse_args
+
+
+PERCENTILES = (50, 90, 95, 99)
+QUIET_MS = 100   # no requests in flight for this long = settled
+API_RESOURCE_TYPES = ("xhr", "fetch")
+
+
+class NetworkMonitor:
+    # counts requests on one page; attached once per page
+    def __init__(self, page):
+        self.inflight = set()
+        self.requests = 0
+        self.api_requests = 0
+        self.failed = 0
+        self.last_change = time.perf_counter()
+        page.on("request", self._started)
+        page.on("requestfinished", self._ended)
+        page.on("requestfailed", self._failed)
+
+    def _started(self, request):
+        self.inflight.add(request)
+        self.requests += 1
+        if request.resource_type in API_RESOURCE_TYPES:
+            self.api_requests += 1
+        self.last_change = time.perf_counter()
+
+    def _ended(self, request):
+        self.inflight.discard(request)
+        self.last_change = time.perf_counter()
+
+    def _failed(self, request):
+        self.failed += 1
+        self._ended(request)
+
+    def counters(self):
+        return self.requests, self.api_requests, self.failed
+
+    async def wait_idle(self, max_ms):
+        # returns how long the page took to go quiet (capped at max_ms), not counting the quiet window
+        start = time.perf_counter()
+        while (time.perf_counter() - start) * 1000 < max_ms:
+            if not self.inflight and (time.perf_counter() - self.last_change) * 1000 >= QUIET_MS:
+                return max(0.0, (self.last_change - start) * 1000)
+            await asyncio.sleep(0.01)
+        return float(max_ms)
+
+
+_monitors = weakref.WeakKeyDictionary()
+
+
+def monitor_for(page):
+    if page not in _monitors:
+        _monitors[page] = NetworkMonitor(page)
+    return _monitors[page]
+
+
+def step_record(scenario, step, xpath, timings, before, monitor, error=""):
+    requests, api_requests, failed = (now - then for now, then in zip(monitor.counters(), before))
+    entry = step["entry"]
+    return {
+        "scenario": scenario,
+        "step": step["index"] + 1,
+        "label": step["label"],
+        "group": entry.get("group", ""),
+        "strategy": entry.get("strategy", ""),
+        "action": step["action"],
+        "xpath": xpath,
+        "healed": xpath != step["xpath"],
+        "resolve_ms": round(timings.get("resolve", 0.0), 3),
+        "action_ms": round(timings.get("action", 0.0), 3),
+        "settle_ms": round(timings.get("settle", 0.0), 3),
+        "total_ms": round(sum(timings.values()), 3),
+        "requests": requests,
+        "api_requests": api_requests,
+        "failed_requests": failed,
+        "status": "fail" if error else "ok",
+        "error": error,
+    }
+
+
+def save_trace(records, path):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ---- report ----
+
+def percentile(sorted_values, p):
+    # nearest-rank
+    if not sorted_values:
+        return None
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(records):
+    totals = sorted(r["total_ms"] for r in records)
+    row = {"steps": len(records), "failed": sum(1 for r in records if r["status"] != "ok")}
+    for p in PERCENTILES:
+        row[f"p{p}_ms"] = percentile(totals, p)
+    row["max_ms"] = totals[-1] if totals else None
+    for part in ("resolve", "action", "settle"):
+        row[f"{part}_p50_ms"] = percentile(sorted(r[f"{part}_ms"] for r in records), 50)
+    row["requests_per_step"] = round(sum(r["requests"] for r in records) / len(records), 2) if records else 0
+    return row
+
+
+def aggregate(records, key):
+    buckets = {}
+    for record in records:
+        buckets.setdefault(key(record), []).append(record)
+    rows = [{"key": k, **summarize(v)} for k, v in buckets.items()]
+    return sorted(rows, key=lambda r: r["p50_ms"] or 0, reverse=True)
+
+
+def build_report(records, top=20):
+    return {
+        "steps": len(records),
+        "overall": summarize(records),
+        "by_strategy": aggregate(records, lambda r: r["strategy"] or "(unknown)"),
+        "by_group": aggregate(records, lambda r: r["group"] or "(ungrouped)"),
+        "by_element": aggregate(records, lambda r: f"{r['label']} [{r['action']}]"),
+        "slowest": sorted(records, key=lambda r: r["total_ms"], reverse=True)[:top],
+    }
+
+
+def print_table(title, rows, limit=15):
+    print(f"\n{title}", flush=True)
+    print(f"  {'':32} {'steps':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'resolve':>8} {'action':>8} {'settle':>8}", flush=True)
+    for row in rows[:limit]:
+        print(f"  {str(row['key'])[:32]:32} {row['steps']:>6} {row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['resolve_p50_ms']:>8.1f} {row['action_p50_ms']:>8.1f} "
+              f"{row['settle_p50_ms']:>8.1f}", flush=True)
+
+
+def print_report(report, top=20):
+    overall = report["overall"]
+    if not report["steps"]:
+        print("No traced steps.", flush=True)
+        return
+    print(f"Steps: {report['steps']} | p50 {overall['p50_ms']:.1f} ms | p95 {overall['p95_ms']:.1f} ms | "
+          f"max {overall['max_ms']:.1f} ms", flush=True)
+    print_table("By strategy (ms)", report["by_strategy"])
+    print_table("By group (ms)", report["by_group"])
+    print_table("By element (ms)", report["by_element"])
+    print(f"\nSlowest {min(top, len(report['slowest']))} steps", flush=True)
+    for r in report["slowest"][:top]:
+        print(f"  {r['total_ms']:>8.1f} ms | scenario {r['scenario']} step {r['step']} | {r['label']} | "
+              f"{r['strategy']} | resolve {r['resolve_ms']:.0f} / action {r['action_ms']:.0f} / "
+              f"settle {r['settle_ms']:.0f} | {r['requests']} req", flush=True)
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if not args:
+        print("Usage: python step_trace.py <trace.jsonl> [--top=20] [--out=<report.json>]", flush=True)
+        sys.exit(1)
+
+    top = int(options.get('top', 20))
+    report = build_report(load_trace(args[0]), top)
+    print_report(report, top)
+    out = options.get('out') or args[0].rsplit('.', 1)[0] + "_report.json"
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved: {out}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# suite_generator.py - Generate a pytest-playwright suite from a grouped session
+# Writes a package with one test module per Live View group, shared fixtures in
+# conftest.py and the session/scenario data it reads at collection time. Each
+# test gets its own browser context from pytest-playwright and all loaded data
+# is read-only, so the suite runs under pytest-xdist without changes.
+# Groups need not be reachable on their own: a group's tests first replay the
+# steps before it (the recorded ones, or the scenario's own), so wizard pages,
+# revealed sections and post-submit pages are tested in the state they were recorded in.
+#
+# Usage: python suite_generator.py <session.json|csv> [scenarios.csv] [--out=generated_suite] [--url=<override>]
+# Run:   pytest generated_suite -n auto [--base-url=<url>] [--browser=firefox]
+
+import re
+import sys
+import json
+import shutil
+from pathlib import Path
+
+from recorder import parse_args
+from replay_runner import EXPECTED_COLUMN, join_columns, load_scenarios
+from session_io import load_session
+
+
+HELPERS_PY = '''# helpers.py - Session data and step actions for the generated suite
+# Everything here is loaded once at import time and frozen, so parallel workers
+# and tests never share mutable state.
+
+import csv
+import json
+from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+DATA_DIR = Path(__file__).parent / "data"
+EXPECTED_COLUMN = "Expected"
+TRUE_VALUES = ("true", "1", "yes", "on", "checked")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+with open(DATA_DIR / "session.json") as f:
+    SESSION = _freeze(json.load(f))
+STEP_TIMEOUT_MS = SESSION["timeout_ms"]
+
+
+def locators_for(group):
+    # one entry per distinct xpath in the group
+    seen = {}
+    for entry in SESSION["entries"]:
+        if entry["group"] == group and entry["xpath"] not in seen:
+            seen[entry["xpath"]] = entry
+    return list(seen.values())
+
+
+def setup_steps(group):
+    # the recorded steps before the group's first entry, with their recorded values
+    steps = []
+    for entry in SESSION["entries"]:
+        if entry["group"] == group:
+            break
+        steps.append({"label": entry["label"], "group": entry["group"], "xpath": entry["xpath"],
+                      "page": entry["page"], "action": _action(entry, entry["value"]), "value": entry["value"]})
+    return tuple(steps)
+
+
+def _join(labels):
+    # each column takes the next session entry with that label, in recorded order
+    columns, position = [], 0
+    entries = SESSION["entries"]
+    for label in labels:
+        for i in range(position, len(entries)):
+            if entries[i]["label"] == label:
+                columns.append(entries[i])
+                position = i + 1
+                break
+        else:
+            raise ValueError(f"Column '{label}' has no matching locator in the session")
+    return columns
+
+
+def _action(entry, value):
+    if value == "Click" or entry["action"] == "click":
+        return "click"
+    if entry["tag"] == "select":
+        return "select"
+    if entry["tag"] == "input" and entry["type"] in ("checkbox", "radio"):
+        return "check"
+    return "fill" if entry["tag"] else "input"
+
+
+def _load_scenarios():
+    path = DATA_DIR / "scenarios.csv"
+    if not path.exists():
+        return ()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+    header = rows[0]
+    has_expected = header[-1] == EXPECTED_COLUMN
+    labels = header[1:-1] if has_expected else header[1:]
+    columns = _join(labels)
+
+    scenarios = []
+    for i, row in enumerate(rows[1:], start=1):
+        row = row + [''] * (len(header) - len(row))
+        steps = [{"label": entry["label"], "group": entry["group"], "xpath": entry["xpath"], "page": entry["page"],
+                  "action": _action(entry, value), "value": value}
+                 for entry, value in zip(columns, row[1:len(labels) + 1])]
+        scenarios.append({"id": f"s{i:03d}", "description": row[0], "steps": steps,
+                          "expected": row[-1] if has_expected else ""})
+    return _freeze(scenarios)
+
+
+SCENARIOS = _load_scenarios()
+
+
+def scenarios_for(group=None):
+    # scenarios that reach the group, cut after its last step (all steps when group is None);
+    # the steps before it are kept as the setup that gets the app there
+    found = []
+    for scenario in SCENARIOS:
+        positions = [i for i, s in enumerate(scenario["steps"]) if group is None or s["group"] == group]
+        if positions:
+            found.append(MappingProxyType({**scenario, "steps": scenario["steps"][:positions[-1] + 1]}))
+    return found
+
+
+def page_url(app_url, recorded_url):
+    # the recorded page, moved onto the app_url origin (for --base-url runs)
+    recorded, app = urlparse(recorded_url or app_url), urlparse(app_url)
+    return recorded._replace(scheme=app.scheme, netloc=app.netloc).geturl()
+
+
+def open_group(page, app_url, group, first_page):
+    # replays the recorded steps before the group, or opens first_page if it starts the recording
+    steps = setup_steps(group)
+    page.goto(page_url(app_url, steps[0]["page"] if steps else first_page), wait_until="load")
+    for step in steps:
+        perform(page, step, STEP_TIMEOUT_MS)
+
+
+def perform(page, step, timeout):
+    locator = page.locator(f"xpath={step['xpath']}")
+    action = step["action"]
+    if action == "input":
+        tag, input_type = locator.evaluate("(el) => [el.tagName.toLowerCase(), el.type || '']", timeout=timeout)
+        action = "select" if tag == "select" else "check" if input_type in ("checkbox", "radio") else "fill"
+
+    if action == "click":
+        locator.click(timeout=timeout)
+    elif action == "select":
+        locator.select_option(step["value"], timeout=timeout)
+    elif action == "check":
+        locator.set_checked(str(step["value"]).strip().lower() in TRUE_VALUES, timeout=timeout)
+    else:
+        locator.fill(step["value"], timeout=timeout)
+    return action
+
+
+def assert_applied(page, step, action):
+    # the value the step typed/checked is what the element now holds
+    locator = page.locator(f"xpath={step['xpath']}")
+    if action == "fill":
+        assert locator.input_value() == step["value"], f"{step['label']}: value not applied"
+    elif action == "check":
+        expected = str(step["value"]).strip().lower() in TRUE_VALUES
+        assert locator.is_checked() == expected, f"{step['label']}: checked state not applied"
+'''
+
+CONFTEST_PY = '''# conftest.py - Shared fixtures for the generated suite
+# pytest-playwright gives every worker one browser and every test a fresh
+# context, so tests never see each other's cookies, storage or page state.
+
+import pytest
+
+from .helpers import SESSION, STEP_TIMEOUT_MS
+
+
+@pytest.fixture(scope="session")
+def app_url(base_url):
+    return base_url or SESSION["url"]
+
+
+@pytest.fixture(scope="session")
+def browser_context_args(browser_context_args):
+    return {**browser_context_args, "ignore_https_errors": True}
+
+
+@pytest.fixture
+def app_page(page):
+    page.set_default_timeout(STEP_TIMEOUT_MS)
+    return page
+'''
+
+GROUP_TEST_PY = '''# {module}.py - Group "{group}"
+# Generated by suite_generator.py from {session}
+
+import pytest
+
+from .helpers import STEP_TIMEOUT_MS, assert_applied, locators_for, open_group, page_url, perform, scenarios_for
+
+GROUP = {group_repr}
+
+
+@pytest.mark.parametrize("locator", locators_for(GROUP), ids=lambda l: l["label"] or l["xpath"])
+def test_locator_is_unique(app_page, app_url, locator):
+    # earlier groups' recorded steps run first, so the group is in its recorded state
+    open_group(app_page, app_url, GROUP, locator["page"])
+    app_page.locator(f"xpath={{locator['xpath']}}").first.wait_for(state="attached", timeout=STEP_TIMEOUT_MS)
+    assert app_page.locator(f"xpath={{locator['xpath']}}").count() == 1
+
+
+@pytest.mark.parametrize("scenario", scenarios_for(GROUP), ids=lambda s: s["id"])
+def test_scenario_steps(app_page, app_url, scenario):
+    # the scenario's steps from earlier groups are setup; only this group's steps are asserted
+    app_page.goto(page_url(app_url, scenario["steps"][0]["page"]), wait_until="load")
+    for step in scenario["steps"]:
+        action = perform(app_page, step, STEP_TIMEOUT_MS)
+        if step["group"] == GROUP:
+            assert_applied(app_page, step, action)
+'''
+
+END_TO_END_TEST_PY = '''# test_end_to_end.py - Full scenarios across all groups, checked against the {expected} column
+# Generated by suite_generator.py from {session}
+
+import pytest
+
+from .helpers import STEP_TIMEOUT_MS, page_url, perform, scenarios_for
+
+
+@pytest.mark.parametrize("scenario", scenarios_for(), ids=lambda s: s["id"])
+def test_scenario(app_page, app_url, scenario):
+    app_page.goto(page_url(app_url, scenario["steps"][0]["page"]), wait_until="load")
+    for step in scenario["steps"]:
+        perform(app_page, step, STEP_TIMEOUT_MS)
+    if scenario["expected"]:
+        app_page.get_by_text(scenario["expected"]).first.wait_for(timeout=STEP_TIMEOUT_MS)
+'''
+
+def module_name(group):
+    slug = re.sub(r"[^a-z0-9]+", "_", (group or "ungrouped").lower()).strip("_")
+    return f"test_{slug or 'ungrouped'}"
+
+
+def session_data(session, url, timeout_ms):
+    entries = []
+    for entry in session["xpaths"]:
+        fingerprint = entry.get("fingerprint") or {}
+        entries.append({
+            "label": entry["label"],
+            "xpath": entry["xpath"],
+            "action": entry["action"],
+            "strategy": entry["strategy"],
+            "group": entry["group"],
+            "page": entry["page"] or url,
+            "value": str(entry.get("values") or ""),
+            "tag": fingerprint.get("tag", ""),
+            "type": fingerprint.get("type", ""),
+        })
+    return {"url": url, "captured_at": session["captured_at"], "timeout_ms": timeout_ms, "entries": entries}
+
+
+def generate_suite(session_path, scenarios_path=None, out_dir="generated_suite", url=None, timeout_ms=5000):
+    # returns the list of files written
+    session = load_session(session_path)
+    url = url or session["url"]
+    if not url:
+        raise ValueError("session has no URL, pass --url=<url>")
+    if scenarios_path:
+        # fail at generation time rather than at collection time
+        labels, _ = load_scenarios(scenarios_path)
+        join_columns(session["xpaths"], labels)
+
+    out = Path(out_dir)
+    (out / "data").mkdir(parents=True, exist_ok=True)
+    written = []
+
+    def write(name, text):
+        path = out / name
+        with open(path, 'w') as f:
+            f.write(text)
+        written.append(path)
+
+    with open(out / "data" / "session.json", 'w') as f:
+        json.dump(session_data(session, url, timeout_ms), f, indent=2)
+    written.append(out / "data" / "session.json")
+    if scenarios_path:
+        shutil.copyfile(scenarios_path, out / "data" / "scenarios.csv")
+        written.append(out / "data" / "scenarios.csv")
+
+    write("__init__.py", "")
+    write("helpers.py", HELPERS_PY)
+    write("conftest.py", CONFTEST_PY)
+
+    # groups in the order they were first recorded
+    groups = list(dict.fromkeys(entry["group"] for entry in session["xpaths"]))
+    modules = {}
+    for group in groups:
+        name = module_name(group)
+        if name in modules:   # two groups that slug the same
+            name = f"{name}_{len(modules)}"
+        modules[name] = group
+        write(f"{name}.py", GROUP_TEST_PY.format(module=name, group=group or "(ungrouped)", group_repr=repr(group),
+                                                 session=Path(session_path).name))
+    if scenarios_path:
+        write("test_end_to_end.py", END_TO_END_TEST_PY.format(expected=EXPECTED_COLUMN, session=Path(session_path).name))
+    return written
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    if not args:
+        print("Usage: python suite_generator.py <session.json|csv> [scenarios.csv] [--out=generated_suite] "
+              "[--url=<override>] [--timeout=5000]", flush=True)
+        sys.exit(1)
+
+    out_dir = options.get('out') or "generated_suite"
+    try:
+        written = generate_suite(args[0], args[1] if len(args) > 1 else None, out_dir,
+                                 options.get('url') or None, int(options.get('timeout', 5000)))
+    except ValueError as e:
+        print(f"ERROR: {e}", flush=True)
+        sys.exit(1)
+
+    tests = [p for p in written if p.name.startswith("test_")]
+    print(f"Generated: {len(tests)} test modules, {len(written)} files", flush=True)
+    print(f"Saved: {out_dir}", flush=True)
+    print(f"Run: pytest {out_dir} -n auto", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# conftest.py - Makes the version4.1 scripts importable from the tests
+#
+# Usage: python -m pytest version4.1/tests
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
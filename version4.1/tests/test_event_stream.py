@@ -0,0 +1,98 @@
+# test_event_stream.py - Binary event frames: round trips, interning, torn writes, CRC checks
+
+import io
+import json
+
+import pytest
+
+from event_stream import EVENT, MAGIC, FRAME, StreamWriter, encode_stream, iter_frames, iter_records, read_events
+
+
+RECORDS = [
+    {"seq": 0, "type": "start", "url": "https://example.com/", "timestamp": "2026-01-01T10:00:00"},
+    {"seq": 1, "type": "xpath", "label": "Search", "xpath": "//input[@name='q']", "action": "fill",
+     "values": "shoes", "matches": 1, "timestamp": "2026-01-01T10:00:01.250000"},
+    {"seq": 2, "type": "xpath", "label": "Search", "xpath": "//input[@name='q']", "action": "click",
+     "values": "", "matches": 1, "timestamp": "2026-01-01T10:00:02.000001"},
+    {"seq": 3, "type": "group", "name": "Login", "timestamp": "2026-01-01T10:00:03"},
+]
+
+
+def decode(data):
+    return list(iter_records(io.BytesIO(data)))
+
+
+def test_round_trip():
+    assert decode(encode_stream(RECORDS)) == RECORDS
+
+
+def test_timezone_aware_timestamps_round_trip():
+    records = [{"seq": i, "type": "xpath", "timestamp": ts} for i, ts in enumerate(
+        ["2026-03-01T10:00:00.123456+02:00", "2026-03-01T08:00:00+00:00", "2026-03-01T10:00:00-05:30"])]
+    assert decode(encode_stream(records)) == records
+
+
+def test_non_iso_timestamp_is_kept_as_a_field():
+    records = [{"seq": 0, "type": "xpath", "timestamp": "yesterday"}]
+    assert decode(encode_stream(records)) == records
+
+
+def test_repeated_strings_are_written_once():
+    data = encode_stream([{**RECORDS[1], "seq": i} for i in range(50)])
+    assert data.count(b"//input[@name='q']") == 1
+
+
+def test_concatenated_streams_reset_the_string_table():
+    first = encode_stream(RECORDS[:2])
+    second = encode_stream([{**RECORDS[3], "seq": 10}])
+    assert decode(first + second) == RECORDS[:2] + [{**RECORDS[3], "seq": 10}]
+
+
+def test_torn_frame_at_the_end_is_left_for_the_next_read():
+    data = encode_stream(RECORDS)
+    for cut in range(len(MAGIC) + 1, len(data)):
+        records = decode(data[:cut])
+        assert records == RECORDS[:len(records)]
+    # the last frame's payload fully written but garbled: still treated as in progress
+    assert decode(data[:-1] + bytes([data[-1] ^ 0xFF])) == RECORDS[:-1]
+
+
+def test_crc_mismatch_before_the_end_is_corruption():
+    data = bytearray(encode_stream(RECORDS))
+    kind, payload, end = next(f for f in iter_frames(bytes(data), len(MAGIC)) if f[0] == EVENT)
+    data[end - 1] ^= 0xFF
+    with pytest.raises(ValueError, match="CRC mismatch"):
+        decode(bytes(data))
+
+
+def test_frame_header_layout():
+    data = encode_stream(RECORDS[:1])
+    kind, payload, end = list(iter_frames(data, len(MAGIC)))[-1]
+    assert kind == EVENT
+    length, _ = FRAME.unpack_from(data, end - len(payload) - FRAME.size)
+    assert length == len(payload)
+
+
+def test_jsonl_streams_are_readable(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in RECORDS) + "\n")
+    assert list(read_events(path)) == RECORDS
+
+
+def test_writers_share_one_file(tmp_path):
+    path = tmp_path / "active.xpev"
+    a, b = StreamWriter(path), StreamWriter(path)
+    a.append(RECORDS[0])
+    b.append(RECORDS[1])
+    a.append(RECORDS[2])
+    assert list(read_events(path)) == RECORDS[:3]
+    assert path.read_bytes().count(b"//input[@name='q']") == 1
+    assert (b.first, b.last_seq) == ((0, RECORDS[0]["timestamp"]), 1)
+
+
+def test_writer_truncates_a_torn_tail(tmp_path):
+    path = tmp_path / "active.xpev"
+    path.write_bytes(encode_stream(RECORDS[:2])[:-3])
+    writer = StreamWriter(path)
+    writer.append({**RECORDS[3], "seq": 1})
+    assert list(read_events(path)) == [RECORDS[0], {**RECORDS[3], "seq": 1}]
@@ -0,0 +1,107 @@
+# test_journal_reader.py - Memory-mapped JSONL and frame readers: sidecar indexes, tails, seeks, partial records
+
+import json
+
+import pytest
+
+from event_stream import StreamWriter, encode_stream
+from journal_reader import FrameReader, JsonlReader, open_reader
+
+
+def record(i):
+    return {"seq": i, "type": "xpath", "label": f"field {i % 7}", "xpath": f"//input[{i}]",
+            "action": "click" if i % 2 else "fill", "timestamp": f"2026-01-01T10:{i // 60:02d}:{i % 60:02d}"}
+
+
+def write_jsonl(path, records):
+    with open(path, 'a') as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+
+def write_frames(path, records):
+    writer = StreamWriter(path)
+    for r in records:
+        writer.append(r)
+
+
+def test_jsonl_tail_and_window(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_jsonl(path, [record(i) for i in range(500)])
+    with JsonlReader(path) as reader:
+        assert len(reader) == 500
+        assert [r["seq"] for r in reader.tail(3)] == [497, 498, 499]
+        assert [r["seq"] for r in reader.between("2026-01-01T10:01:00", "2026-01-01T10:01:05")] == list(range(60, 65))
+        assert reader[10] == record(10)
+
+
+def test_jsonl_sidecar_is_extended_and_partial_lines_wait(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_jsonl(path, [record(i) for i in range(10)])
+    JsonlReader(path).close()
+    size = (tmp_path / "log.jsonl.idx").stat().st_size
+    write_jsonl(path, [record(10)])
+    with open(path, 'a') as f:
+        f.write('{"seq": 11, "type": ')   # still being written
+    with JsonlReader(path) as reader:
+        assert reader.offsets.loaded
+        assert len(reader) == 11
+    assert (tmp_path / "log.jsonl.idx").stat().st_size == size + 8
+
+
+def test_frame_reader_tail_and_seek_by_seq(tmp_path):
+    path = tmp_path / "active.xpev"
+    records = [record(i + 1000) for i in range(300)]
+    write_frames(path, records)
+    with FrameReader(path) as reader:
+        assert len(reader) == 300
+        assert reader.tail(2) == records[-2:]
+        assert reader.position(1250) == 250
+        assert reader.position(0) == 0
+        assert reader.position(5000) == 300
+        assert reader[100] == records[100]
+        assert reader.between(records[10]["timestamp"], records[12]["timestamp"]) == records[10:12]
+
+
+def test_frame_sidecars_are_reused_and_extended(tmp_path):
+    path = tmp_path / "active.xpev"
+    write_frames(path, [record(i) for i in range(50)])
+    FrameReader(path).close()
+    write_frames(path, [record(i) for i in range(50, 60)])
+    with FrameReader(path) as reader:
+        assert reader.events.loaded and reader.strings.loaded and reader.shapes.loaded
+        assert len(reader.events.stored) == 50
+        assert len(reader) == 60
+        # strings first defined after the last indexed event are not indexed twice
+        assert len(reader.strings) == len(set(reader.strings[i] for i in range(len(reader.strings))))
+        assert [r["seq"] for r in reader.records(48)] == list(range(48, 60))
+
+
+def test_frame_reader_ignores_a_torn_frame(tmp_path):
+    path = tmp_path / "active.xpev"
+    write_frames(path, [record(i) for i in range(5)])
+    with open(path, 'ab') as f:
+        f.write(encode_stream([record(5)])[8:-3])
+    with FrameReader(path, write_index=False) as reader:
+        assert [r["seq"] for r in reader.records()] == list(range(5))
+
+
+def test_frame_sidecar_of_a_replaced_file_is_rebuilt(tmp_path):
+    path = tmp_path / "active.xpev"
+    write_frames(path, [record(i) for i in range(40)])
+    FrameReader(path).close()
+    path.unlink()
+    path.write_bytes(encode_stream([{"seq": 7, "type": "group", "name": "Login"}]))
+    with FrameReader(path) as reader:
+        assert reader.records().__next__() == {"seq": 7, "type": "group", "name": "Login"}
+        assert len(reader) == 1
+
+
+def test_open_reader_picks_the_format(tmp_path):
+    write_jsonl(tmp_path / "log.jsonl", [record(0)])
+    write_frames(tmp_path / "log.xpev", [record(0)])
+    with open_reader(tmp_path / "log.jsonl") as jsonl, open_reader(tmp_path / "log.xpev") as frames:
+        assert isinstance(jsonl, JsonlReader) and isinstance(frames, FrameReader)
+        assert jsonl[0] == frames[0] == record(0)
+    with pytest.raises(ValueError):
+        FrameReader(tmp_path / "log.jsonl")
@@ -0,0 +1,150 @@
+# test_live_journal.py - Journal rotation, reads by sequence number / time, tail, summaries, group assignment
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from live_journal import FRAME_RECORDS, LiveJournal, assign_groups
+
+
+# recent enough that only the size limit rotates segments
+START = datetime.now().replace(microsecond=0)
+
+
+def at(i):
+    return (START + timedelta(seconds=i)).isoformat()
+
+
+def fill(journal, n):
+    for i in range(n):
+        journal.append({"type": "xpath", "label": f"field {i}", "xpath": f"//input[{i}]", "timestamp": at(i)})
+
+
+def test_rotates_by_size_without_losing_records(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_bytes=2048)
+    fill(journal, 300)
+    segments = journal.segments()
+    assert len(segments) > 1
+    assert all(s["file"].endswith(".xpev.gz") for s in segments)
+    for before, after in zip(segments, segments[1:]):
+        assert after["first_seq"] == before["last_seq"] + 1
+    assert [r["seq"] for r in journal.read()] == list(range(300))
+
+
+def test_rotates_by_age(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_seconds=60)
+    journal.append({"type": "xpath", "timestamp": "2020-01-01T00:00:00"})
+    journal.append({"type": "xpath"})
+    assert len(journal.segments()) == 1
+    assert journal.next_seq() == 2
+
+
+def test_rotation_limits_are_shared_by_every_writer(tmp_path):
+    LiveJournal(tmp_path / "journal", segment_bytes=1024)
+    other = LiveJournal(tmp_path / "journal")
+    fill(other, 200)
+    assert len(other.segments()) > 1
+
+
+def test_sealed_segments_are_gzip_members(tmp_path):
+    journal = LiveJournal(tmp_path / "journal")
+    fill(journal, FRAME_RECORDS * 2 + 10)
+    journal.seal()
+    [segment] = journal.segments()
+    assert [f[0] for f in segment["frames"]] == [0, FRAME_RECORDS, FRAME_RECORDS * 2]
+    with open(tmp_path / "journal" / segment["file"], 'rb') as f:
+        f.seek(segment["frames"][1][2])
+        assert gzip.GzipFile(fileobj=f).read(1)   # a member starts at every recorded offset
+    assert not journal.active_path.exists()
+
+
+def test_reads_by_seq_and_time(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_bytes=4096)
+    fill(journal, 600)
+    assert [r["seq"] for r in journal.read(from_seq=250, to_seq=260)] == list(range(250, 260))
+    window = list(journal.read(since=at(300), until=at(310)))
+    assert [r["seq"] for r in window] == list(range(300, 310))
+
+
+def test_tail_spans_sealed_and_active_segments(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_bytes=2048)
+    fill(journal, 150)
+    assert journal.active_path.exists()
+    tail = journal.tail(40)
+    assert [r["seq"] for r in tail] == list(range(110, 150))
+    assert tail[-1]["label"] == "field 149"
+    assert len(journal.tail(1000)) == 150
+
+
+def test_reopened_journal_continues_the_sequence(tmp_path):
+    fill(LiveJournal(tmp_path / "journal", segment_bytes=2048), 100)
+    journal = LiveJournal(tmp_path / "journal")
+    assert journal.append({"type": "xpath"}) == 100
+
+
+def test_interrupted_seal_does_not_duplicate_records(tmp_path):
+    journal = LiveJournal(tmp_path / "journal")
+    fill(journal, 20)
+    active = journal.active_path.read_bytes()
+    journal.seal()
+    # crash between writing the index and removing the active file
+    journal.active_path.write_bytes(active)
+    assert [r["seq"] for r in LiveJournal(tmp_path / "journal").read()] == list(range(20))
+
+
+def test_index_is_plain_json(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_bytes=1024)
+    fill(journal, 50)
+    index = json.loads(journal.index_path.read_text())
+    assert index["segment_bytes"] == 1024
+    assert index["segments"] == journal.segments()
+
+
+def test_assign_groups():
+    records = [
+        {"type": "start"},
+        {"type": "xpath", "label": "a"},
+        {"type": "xpath", "label": "b"},
+        {"type": "group", "name": "Login"},
+        {"type": "xpath", "label": "c"},
+        {"type": "group", "name": "Search"},
+        {"type": "group", "name": "Search box"},   # renames the group just named
+        {"type": "xpath", "label": "d"},
+    ]
+    assert [(e["label"], e["group"]) for e in assign_groups(records)] == [
+        ("a", "Login"), ("b", "Login"), ("c", "Search box"), ("d", "")]
+
+
+def test_active_segment_is_read_through_its_sidecar_index(tmp_path):
+    journal = LiveJournal(tmp_path / "journal")
+    fill(journal, 30)
+    assert [r["seq"] for r in journal.read(from_seq=25)] == list(range(25, 30))
+    assert (tmp_path / "journal" / "active.xpev.idx").exists()
+    journal.seal()
+    assert not (tmp_path / "journal" / "active.xpev.idx").exists()
+
+
+def test_summary_counts_the_whole_session(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_bytes=2048)
+    fill(journal, 100)
+    journal.append({"type": "group", "name": "Login"})
+    for i in range(100, 140):
+        journal.append({"type": "xpath", "label": "x", "xpath": "//a", "action": "click", "timestamp": at(i)})
+    assert len(journal.segments()) > 1
+    summary = journal.summary()
+    assert summary == {"records": 141, "entries": 140, "clicks": 40, "inputs": 100, "ungrouped": 40}
+    # unchanged when nothing was appended, and kept up to date afterwards
+    assert journal.summary() == summary
+    journal.append({"type": "group", "name": "Search"})
+    assert journal.summary()["ungrouped"] == 0
+
+
+def test_summary_of_segments_sealed_without_one(tmp_path):
+    journal = LiveJournal(tmp_path / "journal", segment_bytes=2048)
+    fill(journal, 100)
+    index = json.loads(journal.index_path.read_text())
+    for segment in index["segments"]:
+        del segment["summary"]
+    journal.index_path.write_text(json.dumps(index))
+    assert journal.summary()["entries"] == 100
+    assert all("summary" in s for s in journal.segments())
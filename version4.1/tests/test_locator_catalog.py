@@ -0,0 +1,48 @@
+# test_locator_catalog.py - Canonical XPath keys of the locator catalog
+
+from locator_catalog import LocatorCatalog, canonicalize, locator_hash
+
+
+def test_quotes_and_whitespace_are_cosmetic():
+    assert canonicalize("//*[ @id = 'x' ]") == '//*[@id="x"]'
+    assert locator_hash("//*[@id='x']") == locator_hash('//*[ @id = "x" ]')
+
+
+def test_literals_are_kept_verbatim():
+    assert canonicalize('//a[@x="a and (b)"]') == '//a[@x="a and (b)"]'
+    assert canonicalize("//a[text()='say \"hi\"']") == "//a[text()='say \"hi\"']"
+
+
+def test_and_terms_are_sorted():
+    assert canonicalize('//input[@name="q" and @type="text"]') == canonicalize('//input[@type="text" and @name="q"]')
+
+
+def test_or_terms_keep_their_order():
+    assert canonicalize('//a[@b="2" or @a="1"]') == '//a[@b="2" or @a="1"]'
+
+
+def test_operators_stay_separated():
+    assert canonicalize('//a[not(@x)and @a="1"]') == '//a[@a="1" and not(@x)]'
+    assert canonicalize("//div[floor(@n) div 2 = 1]") == "//div[floor(@n) div 2=1]"
+    assert canonicalize('//a[@x or(@y)]') == '//a[@x or (@y)]'
+
+
+def test_reordered_parenthesized_predicates_share_a_key():
+    a = '//a[@a="1" and (@b="2" or @c="3")]'
+    b = '//a[(@b="2" or @c="3") and @a="1"]'
+    c = '//a[ ( @b = "2" or @c = "3" ) and @a = "1" ]'
+    assert canonicalize(a) == canonicalize(b) == canonicalize(c)
+    assert locator_hash(a) == locator_hash(b)
+
+
+def test_merge_counts_each_locator_once_per_session(tmp_path):
+    catalog = LocatorCatalog(tmp_path / "catalog.json")
+    entries = [
+        {"label": "Search", "xpath": "//input[@name='q']", "action": "fill", "timestamp": "2026-01-01T10:00:00"},
+        {"label": "Search", "xpath": '//input[ @name = "q" ]', "action": "click", "timestamp": "2026-01-01T10:00:05"},
+    ]
+    assert catalog.merge_session("https://example.com/", entries, "2026-01-01T10:00:00") == (1, 0)
+    assert catalog.merge_session("https://example.com/", entries, "2026-01-01T10:00:00") is None
+    record = catalog.lookup("example.com", "Search")
+    assert record["seen_count"] == 1
+    assert record["xpath"] == '//input[ @name = "q" ]'
@@ -0,0 +1,80 @@
+# test_replay_runner.py - Scenario replay against the local fixture form
+# The fixture tests need Chromium (playwright install chromium) and are skipped without it.
+
+import asyncio
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+from playwright.sync_api import sync_playwright
+
+from replay_runner import build_steps, join_columns, load_scenarios, replay_options, run_all, run_scenario
+from session_io import load_session
+
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+
+def chromium_installed():
+    try:
+        with sync_playwright() as p:
+            return Path(p.chromium.executable_path).exists()
+    except Exception:
+        return False
+
+
+@pytest.fixture(scope="module")
+def site():
+    # python -m http.server 8000 -d fixtures/site, on a free port
+    handler = partial(SimpleHTTPRequestHandler, directory=str(FIXTURES / "site"))
+    handler.log_message = lambda *args: None
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def fixture_scenarios():
+    session = load_session(str(FIXTURES / "form_session.json"))
+    labels, scenarios = load_scenarios(FIXTURES / "form_scenarios.csv")
+    return scenarios, join_columns(session["xpaths"], labels)
+
+
+def test_context_failure_is_a_scenario_error():
+    class Browser:
+        async def new_context(self, **kwargs):
+            raise RuntimeError("Target page, context or browser has been closed")
+
+    scenarios, columns = fixture_scenarios()
+    scenario = scenarios[0]
+    result = asyncio.run(run_scenario(Browser(), "http://127.0.0.1:9/", scenario,
+                                      build_steps(columns, scenario["values"]), replay_options({}), []))
+    assert result["status"] == "error"
+    assert result["steps_run"] == 0
+    assert "has been closed" in result["error"]
+
+
+@pytest.mark.skipif(not chromium_installed(), reason="Chromium is not installed")
+def test_fixture_form_scenarios(site):
+    scenarios, columns = fixture_scenarios()
+    patches = []
+    results = asyncio.run(run_all(f"{site}/contact/form.html", scenarios, columns,
+                                  replay_options({"concurrency": "4"}), patches))
+    assert [r["scenario"] for r in results] == [s["index"] for s in scenarios]
+    failed = {r["description"]: r["error"] for r in results if r["status"] != "pass"}
+    assert not failed
+    assert all(r["steps_run"] == r["steps_total"] for r in results)
+    assert patches == []
+
+
+@pytest.mark.skipif(not chromium_installed(), reason="Chromium is not installed")
+def test_fixture_form_detects_a_wrong_expectation(site):
+    scenarios, columns = fixture_scenarios()
+    scenario = {**scenarios[0], "expected": "Invalid"}   # the perfect template is submitted
+    [result] = asyncio.run(run_all(f"{site}/contact/form.html", [scenario], columns, replay_options({}), []))
+    assert result["status"] == "fail"
+    assert result["error"] == "expected text not found: Invalid"
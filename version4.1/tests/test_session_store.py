@@ -0,0 +1,51 @@
+# test_session_store.py - Session manifest: written on save, backfilled for older databases
+
+from session_store import SessionStore
+
+
+ENTRIES = [
+    {"label": "Email", "xpath": "//input[@id='email']", "action": "change", "values": "a@b.c",
+     "group": "Login", "timestamp": "2026-01-01T10:00:01"},
+    {"label": "Sign in", "xpath": "//button[@id='go']", "action": "click",
+     "group": "Login", "timestamp": "2026-01-01T10:00:02"},
+    {"label": "Search", "xpath": "//input[@name='q']", "action": "Input", "values": "shoes",
+     "group": "Search", "timestamp": "2026-01-01T10:00:05"},
+    {"label": "Result", "xpath": "//a[1]", "action": "click", "timestamp": "2026-01-01T10:00:09"},
+]
+
+
+def test_manifest_is_written_on_save(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db")
+    session_id = store.save_session("https://example.com/", ENTRIES, "2026-01-01T10:00:00")
+    [session] = store.list_sessions()
+    assert session["id"] == session_id
+    assert (session["clicks"], session["inputs"]) == (2, 2)
+    assert session["groups"] == ["Login", "Search"]
+    assert (session["first_event_at"], session["last_event_at"]) == ("2026-01-01T10:00:01", "2026-01-01T10:00:09")
+    store.close()
+
+
+def test_manifest_is_backfilled_on_open(tmp_path):
+    path = tmp_path / "sessions.db"
+    store = SessionStore(path)
+    store.save_session("https://example.com/", ENTRIES, "2026-01-01T10:00:00")
+    store.save_session("https://example.com/other", ENTRIES[:1], "2026-01-02T10:00:00")
+    expected = store.list_sessions()
+    # a database written before the manifest existed
+    with store.conn:
+        store.conn.execute("DELETE FROM session_manifest")
+    assert all(s["clicks"] is None for s in store.list_sessions())
+    store.close()
+
+    store = SessionStore(path)
+    assert store.list_sessions() == expected
+    assert store.update_manifest() == 0
+    store.close()
+
+
+def test_manifest_of_an_empty_session(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db")
+    store.save_session("https://example.com/", [], "2026-01-01T10:00:00")
+    [session] = store.list_sessions()
+    assert (session["clicks"], session["inputs"], session["groups"], session["first_event_at"]) == (0, 0, [], None)
+    store.close()
@@ -0,0 +1,190 @@
+# verify_sessions.py - Batched locator verification for saved sessions
+# Resolves all of a page's locators in one evaluate and verifies many sessions
+# concurrently, one headless browser per worker process.
+#
+# Usage: python verify_sessions.py <session files, globs or dirs...> [--workers=4]
+#            [--url=<override>] [--out=<report.json>]
+
+import sys
+import csv
+import glob
+import json
+import time
+import atexit
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from playwright.sync_api import sync_playwright
+
+from locator_batch import resolve_batch, match_status
+from recorder import parse_args
+from session_io import load_session, unique_locators
+
+
+# per-process browser, started by the pool initializer
+_playwright = None
+_browser = None
+
+
+def _init_worker():
+    global _playwright, _browser
+    _playwright = sync_playwright().start()
+    _browser = _playwright.chromium.launch(headless=True)
+    atexit.register(_close_worker)
+
+
+def _close_worker():
+    try:
+        _browser.close()
+        _playwright.stop()
+    except Exception:
+        pass
+
+
+def verify_session(path, url_override=None, timeout_ms=30000):
+    session = load_session(path)
+    if url_override:
+        for entry in session["xpaths"]:
+            entry["page"] = url_override
+
+    # one navigation + one evaluate per page
+    pages = {}
+    for loc in unique_locators(session["xpaths"]):
+        pages.setdefault(loc["page"], []).append(loc)
+
+    result = {"session": str(path), "error": None, "pages": [], "locators": []}
+    start = time.perf_counter()
+    context = None
+    try:
+        context = _browser.new_context()
+        page = context.new_page()
+        for page_url, locators in pages.items():
+            if not page_url:
+                result["error"] = "session has no URL (use --url)"
+                continue
+            # a page that fails is recorded on its own entry; the session's other pages still run
+            try:
+                page_start = time.perf_counter()
+                page.goto(page_url, wait_until="load", timeout=timeout_ms)
+                goto_ms = (time.perf_counter() - page_start) * 1000
+                resolved, round_trip_ms = resolve_batch(page, [loc["xpath"] for loc in locators])
+            except Exception as e:
+                result["pages"].append({"page": page_url, "locators": len(locators),
+                                        "goto_ms": None, "resolve_ms": None, "error": str(e)})
+                page.close()
+                page = context.new_page()
+                continue
+            result["pages"].append({"page": page_url, "locators": len(locators),
+                                    "goto_ms": goto_ms, "resolve_ms": round_trip_ms, "error": None})
+            for loc, res in zip(locators, resolved):
+                result["locators"].append({
+                    "session": str(path),
+                    "page": page_url,
+                    "group": loc["group"],
+                    "label": loc["label"],
+                    "strategy": loc["strategy"],
+                    "xpath": loc["xpath"],
+                    "recorded_matches": loc["matches"],
+                    "matches": res["count"],
+                    "status": match_status(res["count"], res["error"]),
+                    "ms": round(res["ms"], 3),
+                })
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if context:
+            context.close()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def expand_paths(args):
+    paths = []
+    for arg in args:
+        p = Path(arg)
+        if p.is_dir():
+            paths.extend(sorted(p.glob("xpaths_*.json")))
+        elif any(ch in arg for ch in "*?["):
+            paths.extend(Path(m) for m in sorted(glob.glob(arg)))
+        else:
+            paths.append(p)
+    return paths
+
+
+def summarize(result):
+    counts = {"unique": 0, "missing": 0, "ambiguous": 0, "invalid": 0}
+    for loc in result["locators"]:
+        counts[loc["status"]] += 1
+    counts["page_errors"] = sum(1 for page in result["pages"] if page["error"])
+    return counts
+
+
+def summarize_groups(locators):
+    groups = {}
+    for loc in locators:
+        key = (loc["session"], loc["group"] or "(ungrouped)")
+        g = groups.setdefault(key, {"session": key[0], "group": key[1], "locators": 0, "unique": 0})
+        g["locators"] += 1
+        g["unique"] += loc["status"] == "unique"
+    return list(groups.values())
+
+
+def verify_all(paths, workers=4, url_override=None):
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(verify_session, str(p), url_override): p for p in paths}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"session": str(futures[future]), "error": str(e), "pages": [], "locators": [], "seconds": 0}
+            counts = summarize(result)
+            status = f"ERROR: {result['error']}" if result["error"] else \
+                " | ".join(f"{k}: {v}" for k, v in counts.items())
+            print(f"[{len(results) + 1}/{len(paths)}] {Path(result['session']).name} | {status}", flush=True)
+            for page in result["pages"]:
+                if page["error"]:
+                    print(f"    ERROR: {page['page']}: {page['error']}", flush=True)
+            results.append(result)
+    return results
+
+
+def main():
+    args, options = parse_args(sys.argv[1:])
+    paths = expand_paths(args)
+    if not paths:
+        print("Usage: python verify_sessions.py <session files, globs or dirs...> [--workers=4] "
+              "[--url=<override>] [--out=<report.json>]", flush=True)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = verify_all(paths, int(options.get('workers', 4)), options.get('url') or None)
+    wall = time.perf_counter() - start
+
+    locators = [loc for r in results for loc in r["locators"]]
+    report = {
+        "verified_at": datetime.now().isoformat(),
+        "wall_seconds": wall,
+        "sessions": [{"session": r["session"], "error": r["error"], "seconds": r["seconds"],
+                      "pages": r["pages"], **summarize(r)} for r in results],
+        "groups": summarize_groups(locators),
+    }
+
+    out = options.get('out') or f"verify_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    csv_file = out.rsplit('.', 1)[0] + ".csv"
+    if locators:
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(locators[0].keys()))
+            writer.writeheader()
+            writer.writerows(locators)
+
+    print(f"Verified {len(locators)} locators in {len(results)} sessions in {wall:.1f}s", flush=True)
+    print(f"Saved: {out}", flush=True)
+    print(f"Saved: {csv_file}", flush=True)
+
+
+if __name__ == "__main__":
+    main()